@@ -70,6 +70,13 @@ def main():
 
     print(f"[add_edge] appended: {edge_id} ({args.source} -> {args.target}) -> {edges_path}")
 
+    # Cached pipeline results were computed from the old data
+    try:
+        from result_cache import invalidate_results
+        invalidate_results()
+    except Exception as e:
+        print(f"[add_edge] Warning: could not clear pipeline result cache: {e}")
+
 
 if __name__ == "__main__":
     main()
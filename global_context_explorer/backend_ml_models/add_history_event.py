@@ -96,6 +96,13 @@ def main():
     print(f"[add_history_event] appended: {node_id} -> {history_path}")
     print(f"===ASSIGNED_NODE_ID==={node_id}===")
 
+    # Cached pipeline results were computed from the old data
+    try:
+        from result_cache import invalidate_results
+        invalidate_results()
+    except Exception as e:
+        print(f"[add_history_event] Warning: could not clear pipeline result cache: {e}")
+
     if args.rebuild_nodes:
         # Local import to avoid hard dependency when used standalone
         from build_nodes_from_history import build_nodes, write_nodes_csv
@@ -0,0 +1,165 @@
+"""
+Per-layer benchmarks: each layer in isolation, fed the intermediates of one full run
+(see the stage_inputs fixture), over every dataset in BENCH_SIZES.
+"""
+
+from urllib.parse import urlparse
+
+import pytest
+
+from conftest import run_benchmark, stub_health
+
+
+def test_layer0_parse(benchmark, pipeline, dataset, sample_input):
+    query = run_benchmark(benchmark, pipeline.layer0.parse, setup=lambda: ((sample_input, None, None), {}),
+                          rounds=50, nodes=dataset.num_nodes)
+    assert query["local_event_text"]
+
+
+def test_layer0_match_local_event(benchmark, pipeline, dataset, stage_inputs):
+    local_event_id, _ = run_benchmark(benchmark, pipeline._find_local_event,
+                                      setup=lambda: ((dict(stage_inputs.query),), {}),
+                                      rounds=50, nodes=dataset.num_nodes)
+    assert local_event_id == stage_inputs.local_event_id
+
+
+def test_layer1_collect(benchmark, pipeline, dataset, stage_inputs):
+    # Every round is cold: the response cache is off (see conftest.isolated_env)
+    evidence = run_benchmark(benchmark, pipeline.layer1.collect, setup=lambda: ((dict(stage_inputs.query),), {}),
+                             rounds=10, nodes=dataset.num_nodes)
+    assert evidence["raw_text_evidence"]
+
+
+@pytest.mark.parametrize("wiki_cap", [1, 4])
+def test_layer1_collect_over_http(benchmark, wiki_stubs, dataset, stage_inputs, wiki_cap):
+    """
+    Layer 1 against wiki_stub_server.py over real sockets: the worker threads, the pooled
+    keep-alive connections and the per-host caps (`wiki_cap` for Wikipedia, the default for
+    Seshat), with conftest.STUB_DELAY of latency per request. No rate limit.
+    """
+    from layer1_knowledge_collection import KnowledgeCollector
+    from wiki_stub_server import point_collector
+
+    wiki_url, seshat_url = wiki_stubs
+    collector = KnowledgeCollector(rate_limit=0, host_concurrency={urlparse(wiki_url).netloc: wiki_cap})
+    point_collector(collector, wiki_url, seshat_url)
+
+    try:
+        evidence = run_benchmark(benchmark, collector.collect, setup=lambda: ((dict(stage_inputs.query),), {}),
+                                 rounds=10, nodes=dataset.num_nodes, wiki_cap=wiki_cap)
+    finally:
+        collector.session.close()
+
+    wiki, seshat = stub_health(wiki_url), stub_health(seshat_url)
+    benchmark.extra_info.update(
+        wiki_requests=wiki["requests"], wiki_max_in_flight=wiki["max_in_flight"],
+        seshat_requests=seshat["requests"], seshat_max_in_flight=seshat["max_in_flight"],
+    )
+    assert evidence["raw_text_evidence"]
+    assert 0 < wiki["max_in_flight"] <= wiki_cap
+    assert seshat["max_in_flight"] <= collector.default_host_concurrency
+    if wiki_cap > 1:
+        assert wiki["max_in_flight"] > 1, "requests to one host never overlapped"
+
+
+def test_layer2_generate_candidates(benchmark, pipeline, dataset, stage_inputs):
+    candidates = run_benchmark(
+        benchmark,
+        pipeline.layer2.generate_candidates,
+        setup=lambda: ((stage_inputs.query, stage_inputs.evidence),
+                       {"top_k": 50, "local_event_names": stage_inputs.local_event_names}),
+        rounds=10,
+        nodes=dataset.num_nodes,
+        evidence_snippets=len(stage_inputs.evidence.get("raw_text_evidence", [])),
+    )
+    assert isinstance(candidates, list)
+
+
+def test_layer3_construct_subgraph(benchmark, pipeline, dataset, stage_inputs):
+    graph = run_benchmark(
+        benchmark,
+        pipeline.layer3.construct_subgraph,
+        setup=lambda: ((stage_inputs.local_event_id, stage_inputs.candidates, stage_inputs.evidence),
+                       {"local_event_data": stage_inputs.local_event_data}),
+        rounds=10,
+        nodes=dataset.num_nodes,
+        candidates=len(stage_inputs.candidates),
+    )
+    assert graph["nodes"]
+
+
+def test_layer3_build_graph(benchmark, dataset):
+    """Base graph built from the CSVs -- the cold-start cost Layers 3/4 share."""
+    from data_loader import HistoricalDataLoader
+
+    data = run_benchmark(
+        benchmark,
+        lambda loader: loader.build_graph(),
+        setup=lambda: ((HistoricalDataLoader(dataset.nodes_file, dataset.edges_file),), {}),
+        rounds=3,
+        nodes=dataset.num_nodes,
+    )
+    assert data.num_nodes == dataset.num_nodes
+
+
+def test_layer3_load_graph_snapshot(benchmark, pipeline, dataset):
+    """Base graph served from the binary snapshot (written when the pipeline started)."""
+    from data_loader import HistoricalDataLoader
+
+    data = run_benchmark(
+        benchmark,
+        lambda loader: loader.load_graph(),
+        setup=lambda: ((HistoricalDataLoader(dataset.nodes_file, dataset.edges_file),), {}),
+        rounds=5,
+        nodes=dataset.num_nodes,
+    )
+    assert data.num_nodes == dataset.num_nodes
+
+
+def test_layer4_predict_links(benchmark, pipeline, dataset, stage_inputs):
+    predictions = run_benchmark(
+        benchmark,
+        pipeline.layer4.predict_links,
+        setup=lambda: ((stage_inputs.graph, stage_inputs.local_event_id), {"top_k": 10}),
+        rounds=10,
+        nodes=dataset.num_nodes,
+        subgraph_nodes=len(stage_inputs.graph["nodes"]),
+    )
+    assert isinstance(predictions, list)
+
+
+def test_layer5_score_links(benchmark, pipeline, dataset, stage_inputs):
+    scored = run_benchmark(
+        benchmark,
+        pipeline.layer5.score_links,
+        setup=lambda: (([dict(p) for p in stage_inputs.predictions], stage_inputs.graph, stage_inputs.evidence), {}),
+        rounds=20,
+        nodes=dataset.num_nodes,
+        predictions=len(stage_inputs.predictions),
+    )
+    assert len(scored) <= len(stage_inputs.predictions)
+
+
+def test_layer6_construct_paths(benchmark, pipeline, dataset, stage_inputs):
+    predictions = stage_inputs.scored_predictions[:10]
+
+    def construct_all():
+        return {p["global_event_id"]: pipeline.layer6.construct_paths(p, stage_inputs.graph, max_paths=2)
+                for p in predictions}
+
+    paths = run_benchmark(benchmark, construct_all, rounds=20, nodes=dataset.num_nodes,
+                          predictions=len(predictions))
+    assert len(paths) == len(predictions)
+
+
+def test_layer7_package_results(benchmark, pipeline, dataset, stage_inputs):
+    results = run_benchmark(
+        benchmark,
+        pipeline.layer7.package_results,
+        setup=lambda: ((stage_inputs.local_event_id, stage_inputs.local_event_data,
+                        [dict(p) for p in stage_inputs.scored_predictions], stage_inputs.paths,
+                        stage_inputs.evidence), {}),
+        rounds=20,
+        nodes=dataset.num_nodes,
+    )
+    assert "top_influences" in results
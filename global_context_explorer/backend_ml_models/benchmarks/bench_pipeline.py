@@ -0,0 +1,58 @@
+"""
+End-to-end benchmarks: `CausalLogicPipeline.process()` with an offline Layer 1, pipeline
+startup and result serialization, over every dataset in BENCH_SIZES.
+"""
+
+import pytest
+
+from conftest import run_benchmark
+
+
+def test_process_end_to_end(benchmark, pipeline, dataset, sample_input):
+    # Layer 1's response cache and the result cache are off (see conftest.isolated_env)
+    results = run_benchmark(benchmark, pipeline.process, setup=lambda: ((sample_input,), {"top_k": 10}),
+                            rounds=5, nodes=dataset.num_nodes)
+    assert "error" not in results
+    benchmark.extra_info["layer_wall_seconds"] = {
+        f"{entry['layer']}:{entry['name']}": entry["wall_seconds"]
+        for entry in results.get("timings", {}).get("layers", [])
+    }
+
+
+def test_pipeline_startup(benchmark, isolated_env, dataset, tmp_path):
+    """
+    Constructing the pipeline: graph load (built and snapshotted in round 1, snapshot
+    afterwards), model and indexes. Runs on a copy of the CSVs so the shared GraphStore
+    held by the `pipeline` fixture is not reused.
+    """
+    import shutil
+
+    from pipeline_main import CausalLogicPipeline
+
+    nodes_file = shutil.copy(dataset.nodes_file, tmp_path / "nodes.csv")
+    edges_file = shutil.copy(dataset.edges_file, tmp_path / "edges.csv")
+
+    def start():
+        CausalLogicPipeline(str(nodes_file), str(edges_file)).close()
+
+    run_benchmark(benchmark, start, rounds=3, nodes=dataset.num_nodes)
+
+
+@pytest.mark.parametrize("transport", ["indent", "compact", "compact_fields"])
+def test_result_serialization(benchmark, pipeline, dataset, stage_inputs, transport):
+    """Packaged result -> JSON as the bridge receives it (see result_transport.py)."""
+    from result_transport import SERIALIZER, dumps, prepare_result
+
+    results = pipeline.layer7.package_results(
+        stage_inputs.local_event_id, stage_inputs.local_event_data,
+        [dict(p) for p in stage_inputs.scored_predictions], stage_inputs.paths, stage_inputs.evidence,
+    )
+    fields = ["local_event.data", "evidence_summary.wikipedia_pages", "statistics", "top_influences"]
+
+    def serialize():
+        if transport == "indent":
+            return dumps(results, indent=True)
+        return dumps(prepare_result(results, fields if transport == "compact_fields" else None, compact=True))
+
+    payload = run_benchmark(benchmark, serialize, rounds=50, nodes=dataset.num_nodes, serializer=SERIALIZER)
+    benchmark.extra_info["payload_bytes"] = len(payload.encode("utf-8"))
@@ -0,0 +1,254 @@
+"""
+Shared fixtures for the pipeline benchmarks.
+
+Datasets: BENCH_SIZES (default "history,50,5000,50000") picks the graphs every benchmark
+runs over. Numbers are synthetic graphs of that many nodes generated from the
+`History (1).csv` schema (see synthetic.py); "history" is the repo's own
+nodes_from_history.csv / edges_template.csv.
+
+Layer 1 never touches the network: KnowledgeCollector.session is a FixtureSession that
+replays benchmarks/fixtures/layer1_responses.json (record_fixtures.py) and answers
+anything else synthetically. test_layer1_collect_over_http instead sends real requests over
+loopback to wiki_stub_server.py, which answers with the same synthetic responses. Snapshots, the result cache, the response cache, the
+persisted TF-IDF corpus and the LLM enricher are switched off or pointed at a temp dir,
+so rounds measure the layers and not the caches in front of them.
+
+Each benchmark stores latency percentiles (p50/p90/p95/p99, seconds) and the process'
+peak RSS (MB) in extra_info, which pytest-benchmark prints with --benchmark-verbose and
+writes to --benchmark-json / --benchmark-autosave output.
+"""
+
+import json
+import os
+import sys
+import threading
+import urllib.request
+from dataclasses import dataclass
+from pathlib import Path
+from http.server import ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional
+
+import pytest
+
+BENCH_DIR = Path(__file__).resolve().parent
+BACKEND_DIR = BENCH_DIR.parent
+sys.path.insert(0, str(BACKEND_DIR))
+sys.path.insert(0, str(BENCH_DIR))
+
+from synthetic import Dataset, FixtureSession, SyntheticWikipedia, load_recorded, write_dataset  # noqa: E402
+from wiki_stub_server import make_handler  # noqa: E402
+
+FIXTURES_FILE = BENCH_DIR / "fixtures" / "layer1_responses.json"
+DEFAULT_SIZES = "history,50,5000,50000"
+PERCENTILES = (50, 90, 95, 99)
+# Per-request latency of the Layer 1 stub servers, seconds
+STUB_DELAY = 0.02
+
+
+def _bench_sizes() -> List[str]:
+    raw = os.getenv("BENCH_SIZES", DEFAULT_SIZES)
+    return [s.strip() for s in raw.split(",") if s.strip()]
+
+
+def _env_rounds(default: int) -> int:
+    try:
+        return max(1, int(os.getenv("BENCH_ROUNDS", default)))
+    except ValueError:
+        return default
+
+
+@pytest.fixture(scope="session", autouse=True)
+def isolated_env(tmp_path_factory):
+    """Keep every on-disk cache out of the measurements and the working tree."""
+    tmp = tmp_path_factory.mktemp("bench_cache")
+    overrides = {
+        "GRAPH_SNAPSHOT_DIR": str(tmp),
+        "RESULT_CACHE": "off",
+        "KNOWLEDGE_CACHE": "off",
+        "CANDIDATE_IDF_PATH": "off",
+    }
+    removed = ("KNOWLEDGE_OFFLINE", "INFLUENCE_LLM_API_KEY", "OPENAI_API_KEY")
+    saved = {k: os.environ.get(k) for k in list(overrides) + list(removed)}
+    os.environ.update(overrides)
+    for key in removed:
+        os.environ.pop(key, None)
+    yield
+    for key, value in saved.items():
+        if value is None:
+            os.environ.pop(key, None)
+        else:
+            os.environ[key] = value
+
+
+@pytest.fixture(scope="session")
+def recorded_responses() -> Dict:
+    return load_recorded(FIXTURES_FILE)
+
+
+@pytest.fixture(scope="session", params=_bench_sizes())
+def dataset(request, tmp_path_factory) -> Dataset:
+    """One benchmark graph (see BENCH_SIZES)."""
+    if request.param == "history":
+        import pandas as pd
+
+        nodes_file = BACKEND_DIR / "nodes_from_history.csv"
+        edges_file = BACKEND_DIR / "edges_template.csv"
+        nodes = pd.read_csv(nodes_file)
+        edges = pd.read_csv(edges_file)
+        is_local = nodes["node_type"].astype(str).str.lower().str.contains("local")
+        # The graph also has the global ids that only appear in the edges CSV
+        node_ids = set(nodes["node_id"]) | set(edges["source_node_id"]) | set(edges["target_node_id"])
+        return Dataset(
+            num_nodes=len(node_ids),
+            history_file=str(BACKEND_DIR / "History (1).csv"),
+            nodes_file=str(nodes_file),
+            edges_file=str(edges_file),
+            local_names=nodes.loc[is_local, "event_name"].astype(str).tolist(),
+            global_names=nodes.loc[~is_local, "event_name"].astype(str).tolist(),
+        )
+    size = int(request.param)
+    return write_dataset(tmp_path_factory.mktemp(f"graph_{size}"), size)
+
+
+@pytest.fixture(scope="session")
+def fixture_session(dataset, recorded_responses) -> FixtureSession:
+    return FixtureSession(recorded_responses, SyntheticWikipedia(dataset.global_names))
+
+
+@pytest.fixture(scope="session")
+def pipeline(isolated_env, dataset, fixture_session):
+    """Pipeline over `dataset` with an offline Layer 1 (built once per dataset)."""
+    from layer1_knowledge_collection import KnowledgeCollector
+    from pipeline_main import CausalLogicPipeline
+
+    pipe = CausalLogicPipeline(dataset.nodes_file, dataset.edges_file)
+    pipe.layer1 = KnowledgeCollector(rate_limit=0)
+    pipe.layer1.http_cache = None
+    pipe.layer1.session = fixture_session
+    yield pipe
+    pipe.close()
+
+
+@pytest.fixture
+def wiki_stubs(dataset):
+    """
+    Base URLs of two wiki_stub_server.py instances (Wikipedia, Seshat) on free loopback ports,
+    so the collector sees two hosts as in production. New servers (and ports) per test, so
+    the process-wide host caps a test sizes are not reused by the next one.
+    """
+    synthetic = SyntheticWikipedia(dataset.global_names)
+    servers = []
+    for _ in range(2):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(STUB_DELAY, synthetic.respond))
+        server.RequestHandlerClass.log_message = lambda *args: None
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+    yield tuple(f"http://{s.server_address[0]}:{s.server_address[1]}" for s in servers)
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def stub_health(base_url: str) -> Dict:
+    """Request count and peak in-flight requests of a wiki_stub_server.py instance."""
+    with urllib.request.urlopen(f"{base_url}/health") as resp:
+        return json.loads(resp.read())
+
+
+@pytest.fixture(scope="session")
+def sample_input(dataset) -> str:
+    """Curator input that resolves to a local event of the dataset."""
+    return dataset.local_names[len(dataset.local_names) // 2]
+
+
+@dataclass
+class StageInputs:
+    """Intermediate values of one full run, used as inputs for per-layer benchmarks."""
+    query: Dict
+    local_event_id: str
+    local_event_data: Dict
+    evidence: Dict
+    local_event_names: List[str]
+    candidates: List[Dict]
+    graph: Dict
+    predictions: List[Dict]
+    scored_predictions: List[Dict]
+    paths: Dict
+
+
+@pytest.fixture(scope="session")
+def stage_inputs(pipeline, sample_input) -> StageInputs:
+    query, local_event_id, local_event_data, early = pipeline._prepare_request(sample_input)
+    assert early is None, f"sample input did not resolve to a local event: {sample_input}"
+    evidence = pipeline._collect_evidence(query)
+    local_event_names = list(pipeline.local_index.event_names) + [local_event_data.get("event_name", "")]
+    candidates = pipeline.layer2.generate_candidates(query, evidence, top_k=50, local_event_names=local_event_names)
+    graph = pipeline.layer3.construct_subgraph(local_event_id, candidates, evidence, local_event_data=local_event_data)
+    predictions = pipeline.layer4.predict_links(graph, local_event_id, top_k=10)
+    scored = pipeline.layer5.score_links(predictions, graph, evidence)
+    paths = {p["global_event_id"]: pipeline.layer6.construct_paths(p, graph, max_paths=2) for p in scored[:10]}
+    return StageInputs(
+        query=query,
+        local_event_id=local_event_id,
+        local_event_data=local_event_data,
+        evidence=evidence,
+        local_event_names=local_event_names,
+        candidates=candidates,
+        graph=graph,
+        predictions=predictions,
+        scored_predictions=scored,
+        paths=paths,
+    )
+
+
+def peak_rss_mb() -> Optional[float]:
+    """High-water mark of this process' resident set size, in MB."""
+    try:
+        import resource
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # KB on Linux, bytes on macOS
+        return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+    except ImportError:
+        pass
+    try:
+        import psutil
+
+        info = psutil.Process().memory_info()
+        return round(getattr(info, "peak_wset", info.rss) / (1024 * 1024), 1)
+    except ImportError:
+        return None
+
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    rank = (len(sorted_values) - 1) * pct / 100.0
+    low = int(rank)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (rank - low)
+
+
+def run_benchmark(benchmark, fn: Callable, setup: Optional[Callable] = None, rounds: int = 10, **info):
+    """
+    benchmark.pedantic() with percentile and peak-RSS reporting.
+
+    Args:
+        benchmark: pytest-benchmark fixture
+        fn: Callable under test (takes the args returned by `setup`, if any)
+        setup: Per-round setup returning (args, kwargs); not timed
+        rounds: Rounds to run (overridable with BENCH_ROUNDS)
+        **info: Extra labels stored in extra_info (dataset size, counts, ...)
+    """
+    rss_before = peak_rss_mb()
+    result = benchmark.pedantic(fn, setup=setup, rounds=_env_rounds(rounds), iterations=1, warmup_rounds=0)
+    stats = getattr(benchmark, "stats", None)
+    data = sorted(getattr(getattr(stats, "stats", None), "data", None) or [])
+    for pct in PERCENTILES:
+        benchmark.extra_info[f"p{pct}"] = round(_percentile(data, pct), 6)
+    rss_after = peak_rss_mb()
+    benchmark.extra_info["peak_rss_mb"] = rss_after
+    if rss_before is not None and rss_after is not None:
+        benchmark.extra_info["peak_rss_growth_mb"] = round(rss_after - rss_before, 1)
+    benchmark.extra_info.update(info)
+    return result
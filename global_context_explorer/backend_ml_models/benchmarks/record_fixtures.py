@@ -0,0 +1,87 @@
+"""
+Record the Layer 1 responses used by the benchmarks.
+
+Runs Layer 0 + Layer 1 of the real pipeline (live network, on-disk cache bypassed) for the
+local events in nodes_from_history.csv and stores every GET response in
+benchmarks/fixtures/layer1_responses.json, keyed like the on-disk response cache. The
+benchmarks replay these through FixtureSession; requests that were not recorded (e.g. for
+synthetic events) are answered by SyntheticWikipedia.
+
+Usage (from backend_ml_models/):
+    python benchmarks/record_fixtures.py [--limit 10] [--out benchmarks/fixtures/layer1_responses.json]
+"""
+
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR.parent))
+
+DEFAULT_OUT = BENCH_DIR / "fixtures" / "layer1_responses.json"
+
+
+class RecordingSession:
+    """Wraps a requests.Session and keeps (status, body) of every GET."""
+
+    def __init__(self, session):
+        self.session = session
+        self.recorded = {}
+
+    def get(self, url, params=None, **kwargs):
+        from http_cache import HttpResponseCache
+
+        response = self.session.get(url, params=params, **kwargs)
+        self.recorded[HttpResponseCache.make_key(url, params)] = {
+            "status": response.status_code,
+            "body": response.text,
+        }
+        return response
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record Layer 1 responses for the benchmarks")
+    parser.add_argument("--nodes", default="nodes_from_history.csv", help="Nodes CSV")
+    parser.add_argument("--edges", default="edges_template.csv", help="Edges CSV")
+    parser.add_argument("--limit", type=int, default=10, help="Local events to record (0 = all)")
+    parser.add_argument("--out", default=str(DEFAULT_OUT), help="Output JSON file")
+    args = parser.parse_args()
+
+    # Every request must reach the network to be recorded
+    os.environ["KNOWLEDGE_CACHE"] = "off"
+    os.environ["RESULT_CACHE"] = "off"
+
+    from pipeline_main import CausalLogicPipeline
+
+    pipeline = CausalLogicPipeline(args.nodes, args.edges)
+    recorder = RecordingSession(pipeline.layer1.session)
+    pipeline.layer1.session = recorder
+
+    names = list(pipeline.local_index.event_names)
+    if args.limit:
+        names = names[:args.limit]
+    try:
+        for i, name in enumerate(names, 1):
+            print(f"[record] {i}/{len(names)}: {name}")
+            query, local_event_id, _, early = pipeline._prepare_request(name)
+            if early is not None or not local_event_id:
+                print(f"[record] skipped (no local event match): {name}")
+                continue
+            pipeline._collect_evidence(query)
+    finally:
+        pipeline.close()
+
+    out = Path(args.out)
+    if not recorder.recorded:
+        # An empty file would silently turn every benchmark request into a synthetic one
+        raise SystemExit(f"[record] No responses recorded (network unreachable?); {out} not written")
+    out.parent.mkdir(parents=True, exist_ok=True)
+    with out.open("w", encoding="utf-8") as f:
+        json.dump(recorder.recorded, f, ensure_ascii=False, indent=1, sort_keys=True)
+    print(f"[record] Wrote {len(recorder.recorded)} responses to {out}")
+
+
+if __name__ == "__main__":
+    main()
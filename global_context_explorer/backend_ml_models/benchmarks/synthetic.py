@@ -0,0 +1,264 @@
+"""
+Synthetic datasets and offline Layer 1 responses for the benchmarks.
+
+- write_dataset() generates a History CSV (the `History (1).csv` schema: LocalEvent and
+  GlobalEvent rows, mixed date formats), builds the nodes CSV from it with
+  build_nodes_from_history, and writes an edges CSV (GLOBAL -> LOC edges plus some
+  GLOBAL -> GLOBAL chains so multi-hop paths exist).
+- FixtureSession stands in for KnowledgeCollector.session: responses recorded by
+  record_fixtures.py are replayed by key, everything else is answered by
+  SyntheticWikipedia with deterministic Wikipedia-shaped JSON built from the dataset's
+  global event names. No request leaves the machine.
+"""
+
+import csv
+import hashlib
+import json
+import random
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import unquote
+
+from build_nodes_from_history import build_nodes, write_nodes_csv
+from http_cache import CachedResponse, HttpResponseCache
+
+
+THEMES = [
+    ("tea", "plantation"), ("railway", "transport"), ("coffee", "rust"), ("port", "trade"),
+    ("labor", "migration"), ("colonial", "governance"), ("university", "education"),
+    ("cotton", "textile"), ("rubber", "export"), ("steam", "shipping"),
+]
+PLACES = ["Colombo", "Kandy", "Galle", "Jaffna", "Madras", "London", "Calcutta", "Bombay", "Trincomalee", "Batavia"]
+GLOBAL_HEADS = ["Expansion", "Collapse", "Reform", "Boom", "Crisis", "Opening", "Treaty", "Revolution"]
+LOCAL_HEADS = ["Establishment", "Decline", "Construction", "Founding", "Growth", "Arrival"]
+
+EDGE_COLUMNS = [
+    "edge_id", "source_node_id", "target_node_id", "causal_description",
+    "directness_score", "source_count", "max_sources_required", "source_references",
+]
+
+
+@dataclass
+class Dataset:
+    """Paths and names of one generated dataset."""
+    num_nodes: int
+    history_file: str
+    nodes_file: str
+    edges_file: str
+    local_names: List[str] = field(default_factory=list)
+    global_names: List[str] = field(default_factory=list)
+
+
+def _date(rng: random.Random, low: int, high: int) -> str:
+    year = rng.randint(low, high)
+    roll = rng.random()
+    if roll < 0.1:
+        return f"{year}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+    if roll < 0.2:
+        return f"{year}–{year + rng.randint(2, 30)}"
+    if roll < 0.25:
+        return f"{(year // 100) + 1}th century"
+    return str(year)
+
+
+def generate_history_rows(num_nodes: int, seed: int = 7, global_ratio: float = 0.3) -> List[List[str]]:
+    """History rows (no header, EXPECTED_COLUMNS order) for `num_nodes` events."""
+    rng = random.Random(seed)
+    num_global = max(1, int(num_nodes * global_ratio))
+    rows: List[List[str]] = []
+    for i in range(num_nodes):
+        is_global = i < num_global
+        theme, noun = THEMES[rng.randrange(len(THEMES))]
+        place = PLACES[rng.randrange(len(PLACES))]
+        if is_global:
+            node_id = f"GLOBAL_{i + 1:05d}"
+            name = f"{GLOBAL_HEADS[rng.randrange(len(GLOBAL_HEADS))]} of {theme.title()} {noun.title()} in {place} {i + 1}"
+            date = _date(rng, 1750, 1930)
+        else:
+            node_id = f"LOC_{i + 1 - num_global:05d}"
+            name = f"{LOCAL_HEADS[rng.randrange(len(LOCAL_HEADS))]} of {theme.title()} {noun.title()} in {place} {i + 1}"
+            date = _date(rng, 1800, 1960)
+        sources = rng.randint(1, 5)
+        rows.append([
+            node_id,
+            "GlobalEvent" if is_global else "LocalEvent",
+            name,
+            date,
+            f"{place}, Sri Lanka" if not is_global else place,
+            f"{name}: {theme} {noun} changes around {place} linked to colonial trade and {THEMES[rng.randrange(len(THEMES))][0]}",
+            f"{noun.title()} history",
+            f"{theme.title()} Heritage Exhibit",
+            str(sources),
+            str(sources + rng.randint(0, 3)),
+            "; ".join(f"Archive {rng.randint(1, 50)}" for _ in range(sources)),
+        ])
+    return rows
+
+
+def write_dataset(out_dir: Path, num_nodes: int, seed: int = 7, edges_per_local: int = 3,
+                  global_chain_ratio: float = 0.5) -> Dataset:
+    """Write history, nodes and edges CSVs for a synthetic graph of `num_nodes` nodes."""
+    out_dir.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(seed + 1)
+    rows = generate_history_rows(num_nodes, seed=seed)
+
+    history_path = out_dir / "history.csv"
+    with history_path.open("w", encoding="utf-8", newline="") as f:
+        csv.writer(f).writerows(rows)
+
+    nodes_path = out_dir / "nodes.csv"
+    write_nodes_csv(build_nodes(history_path), nodes_path)
+
+    global_ids = [r[0] for r in rows if r[1] == "GlobalEvent"]
+    local_ids = [r[0] for r in rows if r[1] == "LocalEvent"]
+    edges: List[List[str]] = []
+
+    def add_edge(source: str, target: str) -> None:
+        edges.append([
+            f"EDGE_{len(edges) + 1:06d}", source, target,
+            f"{source} shaped {target} through trade and labour flows",
+            f"{rng.uniform(0.3, 1.0):.3f}", str(rng.randint(1, 5)), "5",
+            "Synthetic archive",
+        ])
+
+    for target in local_ids:
+        for source in rng.sample(global_ids, min(edges_per_local, len(global_ids))):
+            add_edge(source, target)
+    for source in global_ids:
+        if len(global_ids) > 1 and rng.random() < global_chain_ratio:
+            target = global_ids[rng.randrange(len(global_ids))]
+            if target != source:
+                add_edge(source, target)
+
+    edges_path = out_dir / "edges.csv"
+    with edges_path.open("w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(EDGE_COLUMNS)
+        writer.writerows(edges)
+
+    return Dataset(
+        num_nodes=num_nodes,
+        history_file=str(history_path),
+        nodes_file=str(nodes_path),
+        edges_file=str(edges_path),
+        local_names=[r[2] for r in rows if r[1] == "LocalEvent"],
+        global_names=[r[2] for r in rows if r[1] == "GlobalEvent"],
+    )
+
+
+def _stable_int(text: str) -> int:
+    return int(hashlib.sha256(text.encode("utf-8")).hexdigest()[:12], 16)
+
+
+class SyntheticWikipedia:
+    """Deterministic Wikipedia / Seshat answers for the requests KnowledgeCollector makes."""
+
+    def __init__(self, titles: List[str], results_per_search: int = 8):
+        self.titles = list(titles) or ["Industrial Revolution"]
+        self.results_per_search = results_per_search
+        # pageid -> title it was handed out for, so revisions lookups return the same page
+        self._titles_by_pageid: Dict[int, str] = {}
+
+    def _pageid(self, title: str) -> int:
+        pid = 1000 + _stable_int(title) % 10_000_000
+        self._titles_by_pageid.setdefault(pid, title)
+        return pid
+
+    def _pick(self, query: str, limit: int) -> List[str]:
+        start = _stable_int(query) % len(self.titles)
+        picked = [self.titles[(start + i * 7919) % len(self.titles)] for i in range(limit)]
+        return list(dict.fromkeys(picked))
+
+    def _text(self, title: str, paragraphs: int = 3) -> str:
+        rng = random.Random(_stable_int(title))
+        out = []
+        for _ in range(paragraphs):
+            theme, noun = THEMES[rng.randrange(len(THEMES))]
+            place = PLACES[rng.randrange(len(PLACES))]
+            year = rng.randint(1750, 1940)
+            out.append(
+                f"{title} began in {year} and reshaped {theme} {noun} across {place}. "
+                f"Colonial trade, {theme} exports and labour migration grew after {year + rng.randint(1, 20)}, "
+                f"which led to new {noun} policies in Ceylon."
+            )
+        return "\n\n".join(out)
+
+    def respond(self, url: str, params: Optional[Dict] = None) -> Tuple[int, str]:
+        """(status, body) for a GET request."""
+        params = params or {}
+        if "/page/summary/" in url:
+            title = unquote(url.rsplit("/", 1)[-1]).replace("_", " ")
+            body = {
+                "title": title,
+                "extract": self._text(title, paragraphs=1),
+                "pageid": self._pageid(title),
+                "content_urls": {"desktop": {"page": f"https://en.wikipedia.org/wiki/{title.replace(' ', '_')}"}},
+            }
+            return 200, json.dumps(body)
+        if "seshat" in url:
+            return 200, json.dumps([{"name": f"Religion {i}", "id": i} for i in range(10)])
+        if params.get("list") == "search":
+            limit = int(params.get("srlimit") or self.results_per_search)
+            results = [
+                {
+                    "title": t,
+                    "snippet": self._text(t, paragraphs=1)[:200],
+                    "pageid": self._pageid(t),
+                    "size": 1000 + _stable_int(t) % 50_000,
+                    "wordcount": 200 + _stable_int(t) % 8000,
+                }
+                for t in self._pick(str(params.get("srsearch", "")), limit)
+            ]
+            return 200, json.dumps({"query": {"search": results}})
+        if params.get("list") == "categorymembers":
+            limit = int(params.get("cmlimit") or 20)
+            members = [{"title": t, "pageid": self._pageid(t), "ns": 0}
+                       for t in self._pick(str(params.get("cmtitle", "")), limit)]
+            return 200, json.dumps({"query": {"categorymembers": members}})
+        if params.get("prop") == "extracts":
+            title = str(params.get("titles", ""))
+            pid = self._pageid(title)
+            page = {"pageid": pid, "title": title, "extract": self._text(title, paragraphs=4)}
+            return 200, json.dumps({"query": {"pages": {str(pid): page}}})
+        if params.get("prop") == "revisions":
+            pid = str(params.get("pageids", ""))
+            if pid.isdigit():
+                title = self._titles_by_pageid.get(int(pid)) or self.titles[int(pid) % len(self.titles)]
+            else:
+                title = pid
+            markup = "'''" + title + "''' " + self._text(title, paragraphs=6).replace(" Ceylon", " [[Ceylon]]")
+            page = {"pageid": int(pid) if pid.isdigit() else 0, "title": title, "revisions": [{"*": markup}]}
+            return 200, json.dumps({"query": {"pages": {pid: page}}})
+        return 404, "{}"
+
+
+def load_recorded(path: Path) -> Dict[str, Tuple[int, str]]:
+    """Recorded responses ({key: {"status", "body"}} written by record_fixtures.py)."""
+    if not path.exists():
+        return {}
+    with path.open("r", encoding="utf-8") as f:
+        raw = json.load(f)
+    return {key: (int(entry["status"]), entry["body"]) for key, entry in raw.items()}
+
+
+class FixtureSession:
+    """KnowledgeCollector.session replacement: recorded responses first, then synthetic ones."""
+
+    def __init__(self, recorded: Optional[Dict[str, Tuple[int, str]]] = None,
+                 synthetic: Optional[SyntheticWikipedia] = None):
+        self.recorded = recorded or {}
+        self.synthetic = synthetic
+        self.replayed = 0
+        self.generated = 0
+
+    def get(self, url: str, params: Optional[Dict] = None, timeout=None, **kwargs) -> CachedResponse:
+        entry = self.recorded.get(HttpResponseCache.make_key(url, params))
+        if entry is not None:
+            self.replayed += 1
+            return CachedResponse(*entry)
+        self.generated += 1
+        if self.synthetic is None:
+            return CachedResponse(404, "{}")
+        return CachedResponse(*self.synthetic.respond(url, params))
+
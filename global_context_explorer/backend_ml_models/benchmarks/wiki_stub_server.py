@@ -0,0 +1,118 @@
+"""
+Local stand-in for the Wikipedia REST / MediaWiki / Seshat APIs that Layer 1 calls.
+
+Lets KnowledgeCollector run over real sockets (connection pool, per-host caps, worker threads)
+without the network: every GET is answered by SyntheticWikipedia (see synthetic.py) after an
+optional delay to mimic API latency. The server speaks HTTP/1.1 keep-alive like the real APIs,
+so the collector's pooled connections are reused.
+
+Usage (from backend_ml_models/):
+    python benchmarks/wiki_stub_server.py --port 8766 --delay 0.05
+
+and in Python:
+    point_collector(collector, "http://127.0.0.1:8766")
+
+Run a second instance on another port and pass it as `seshat_url` to give Seshat its own host
+(and so its own concurrency cap), as the real deployment has.
+
+GET /health reports how many requests were served and the most that were in flight at once.
+"""
+
+import argparse
+import csv
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR.parent))
+sys.path.insert(0, str(BENCH_DIR))
+
+from synthetic import SyntheticWikipedia  # noqa: E402
+
+DEFAULT_NODES = BENCH_DIR.parent / "nodes_from_history.csv"
+
+
+def make_handler(delay: float, respond: Callable[[str, Dict], Tuple[int, str]]):
+    state = {"requests": 0, "in_flight": 0, "max_in_flight": 0}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _send(self, status: int, body: str):
+            data = body.encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            parts = urlsplit(self.path)
+            if parts.path.rstrip("/") == "/health":
+                with lock:
+                    self._send(200, json.dumps({"ok": True, **state}))
+                return
+
+            with lock:
+                state["requests"] += 1
+                state["in_flight"] += 1
+                state["max_in_flight"] = max(state["max_in_flight"], state["in_flight"])
+            try:
+                if delay > 0:
+                    time.sleep(delay)
+                status, body = respond(f"http://{self.headers.get('Host', '')}{parts.path}",
+                                       dict(parse_qsl(parts.query)))
+            finally:
+                with lock:
+                    state["in_flight"] -= 1
+            self._send(status, body)
+
+        def log_message(self, format, *args):
+            print(f"[wiki stub] {self.address_string()} - {format % args}")
+
+    return Handler
+
+
+def point_collector(collector, wikipedia_url: str, seshat_url: Optional[str] = None) -> None:
+    """Send a KnowledgeCollector's Wikipedia (and Seshat) requests to stub servers."""
+    wikipedia_url = wikipedia_url.rstrip("/")
+    seshat_url = (seshat_url or wikipedia_url).rstrip("/")
+    collector.wikipedia_rest_base = f"{wikipedia_url}/api/rest_v1/page/summary/"
+    collector.mediawiki_api = f"{wikipedia_url}/w/api.php"
+    collector.seshat_api_base = f"{seshat_url}/seshat/api/core"
+
+
+def load_titles(nodes_file: Path) -> list:
+    """Event names from a nodes CSV, used as the page titles the stub hands out."""
+    with Path(nodes_file).open("r", encoding="utf-8", newline="") as f:
+        return [row["event_name"] for row in csv.DictReader(f) if row.get("event_name")]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stub Wikipedia / Seshat APIs for Layer 1 benchmarks")
+    parser.add_argument("--host", type=str, default="127.0.0.1", help="Interface to bind")
+    parser.add_argument("--port", type=int, default=8766, help="Port to listen on")
+    parser.add_argument("--delay", type=float, default=0.0, help="Seconds to wait before each reply")
+    parser.add_argument("--nodes", type=str, default=str(DEFAULT_NODES), help="Nodes CSV supplying page titles")
+    args = parser.parse_args()
+
+    synthetic = SyntheticWikipedia(load_titles(Path(args.nodes)))
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(args.delay, synthetic.respond))
+    print(f"[wiki stub] Listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
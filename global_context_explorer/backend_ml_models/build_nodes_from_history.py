@@ -6,7 +6,10 @@ Supports both:
   - `History (1).csv` (no header, 11 columns, more rows, mixed date formats)
 
 Output schema matches what the pipeline expects:
-  node_id,node_type,event_name,date,location,description,purpose,exhibit_name,source_count,max_sources_required,source_references
+  node_id,node_type,event_name,date,location,description,purpose,exhibit_name,source_count,max_sources_required,source_references,start_year,end_year
+
+start_year/end_year are the date parsed once by date_utils.parse_year_range (empty when
+unparseable), so loaders can use them instead of re-parsing the date strings.
 """
 
 import argparse
@@ -14,6 +17,8 @@ import csv
 from pathlib import Path
 from typing import List, Dict, Optional
 
+from date_utils import parse_year_range
+
 
 EXPECTED_COLUMNS = [
     "node_id",
@@ -29,6 +34,9 @@ EXPECTED_COLUMNS = [
     "source_references",
 ]
 
+# Columns written to the nodes CSV (History files only have EXPECTED_COLUMNS).
+OUTPUT_COLUMNS = EXPECTED_COLUMNS + ["start_year", "end_year"]
+
 
 def _normalize_node_type(raw: str) -> str:
     s = (raw or "").strip().lower()
@@ -104,24 +112,29 @@ def read_history_rows(history_path: Path) -> List[Dict]:
     return rows
 
 
+def node_from_history_row(r: Dict) -> Dict:
+    """One History row (dict keyed by EXPECTED_COLUMNS) -> one nodes CSV row."""
+    date = _normalize_date(r.get("date", ""))
+    start_year, end_year = parse_year_range(date)
+    return {
+        "node_id": (r.get("node_id") or "").strip(),
+        "node_type": _normalize_node_type(r.get("node_type", "")),
+        "event_name": (r.get("event_name") or "").strip(),
+        "date": date,
+        "location": (r.get("location") or "").strip(),
+        "description": (r.get("description") or "").strip(),
+        "purpose": (r.get("purpose") or "").strip(),
+        "exhibit_name": (r.get("exhibit_name") or "").strip(),
+        "source_count": _safe_int(r.get("source_count", 0), 0),
+        "max_sources_required": _safe_int(r.get("max_sources_required", 5), 5),
+        "source_references": (r.get("source_references") or "").strip(),
+        "start_year": "" if start_year is None else start_year,
+        "end_year": "" if end_year is None else end_year,
+    }
+
+
 def build_nodes(history_path: Path) -> List[Dict]:
-    raw_rows = read_history_rows(history_path)
-    out: List[Dict] = []
-
-    for r in raw_rows:
-        out.append({
-            "node_id": (r.get("node_id") or "").strip(),
-            "node_type": _normalize_node_type(r.get("node_type", "")),
-            "event_name": (r.get("event_name") or "").strip(),
-            "date": _normalize_date(r.get("date", "")),
-            "location": (r.get("location") or "").strip(),
-            "description": (r.get("description") or "").strip(),
-            "purpose": (r.get("purpose") or "").strip(),
-            "exhibit_name": (r.get("exhibit_name") or "").strip(),
-            "source_count": _safe_int(r.get("source_count", 0), 0),
-            "max_sources_required": _safe_int(r.get("max_sources_required", 5), 5),
-            "source_references": (r.get("source_references") or "").strip(),
-        })
+    out = [node_from_history_row(r) for r in read_history_rows(history_path)]
 
     # drop empty ids
     out = [r for r in out if r.get("node_id")]
@@ -131,12 +144,45 @@ def build_nodes(history_path: Path) -> List[Dict]:
 def write_nodes_csv(nodes: List[Dict], out_path: Path) -> None:
     out_path.parent.mkdir(parents=True, exist_ok=True)
     with out_path.open("w", encoding="utf-8", newline="") as f:
-        writer = csv.DictWriter(f, fieldnames=EXPECTED_COLUMNS)
+        writer = csv.DictWriter(f, fieldnames=OUTPUT_COLUMNS)
         writer.writeheader()
         for row in nodes:
             writer.writerow(row)
 
 
+def append_nodes_csv(nodes: List[Dict], out_path: Path) -> bool:
+    """
+    Append rows to an existing nodes CSV without rewriting it.
+
+    Rows follow the file's own header (columns it lacks are dropped) and line ending.
+
+    Returns:
+        False if the file does not exist or has no header (write it with write_nodes_csv)
+    """
+    if not out_path.exists():
+        return False
+    last = b"\n"
+    with out_path.open("rb") as f:
+        head = f.readline()
+        f.seek(0, 2)
+        size = f.tell()
+        if size:
+            f.seek(size - 1)
+            last = f.read(1)
+    if not head.strip():
+        return False
+    header = next(csv.reader([head.decode("utf-8-sig")]))
+    line_end = "\r\n" if head.endswith(b"\r\n") else "\n"
+
+    with out_path.open("a", encoding="utf-8", newline="") as f:
+        if last not in (b"\n", b"\r"):
+            f.write(line_end)
+        writer = csv.DictWriter(f, fieldnames=header, extrasaction="ignore", lineterminator=line_end)
+        for row in nodes:
+            writer.writerow(row)
+    return True
+
+
 def main():
     parser = argparse.ArgumentParser(description="Build nodes_from_history.csv from a History CSV")
     parser.add_argument("--history", type=str, default="History (1).csv", help="Input history CSV file")
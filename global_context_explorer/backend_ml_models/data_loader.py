@@ -10,7 +10,8 @@ from typing import Dict, List, Tuple, Optional
 import torch
 from torch_geometric.data import Data
 
-from date_utils import year_for_ordering
+from date_utils import year_columns, year_for_ordering
+import graph_snapshot
 
 
 class HistoricalDataLoader:
@@ -30,6 +31,7 @@ class HistoricalDataLoader:
         self.edges_df = None
         self.node_to_idx = {}
         self.idx_to_node = {}
+        self._nodes_by_id_df = None
         
     def load_data(self) -> Tuple[pd.DataFrame, pd.DataFrame]:
         """Load nodes and edges from CSV files."""
@@ -48,6 +50,7 @@ class HistoricalDataLoader:
         }
         self.nodes_df = pd.read_csv(self.nodes_file, dtype=dtype_dict)
         self.edges_df = pd.read_csv(self.edges_file, dtype=dtype_dict)
+        self._nodes_by_id_df = None
         # Do NOT coerce nodes_df['date'] to datetime here.
         # Temporal comparisons are handled via date_utils.year_for_ordering where needed.
         
@@ -101,101 +104,78 @@ class HistoricalDataLoader:
         if self.nodes_df is None or self.edges_df is None:
             self.load_data()
         
-        num_nodes = len(self.node_to_idx)
-        
-        # Create node features
-        node_features = []
-        node_types = []
-        node_dates = []
-        
-        for node_id in sorted(self.node_to_idx.keys()):
-            node_data = self.nodes_df[self.nodes_df['node_id'] == node_id]
-            if len(node_data) == 0:
-                # Global node not in nodes_df, create default features
-                node_features.append([0.0] * 10)  # Default feature vector
-                node_types.append(0)  # 0 = global
-                node_dates.append(None)
-            else:
-                row = node_data.iloc[0]
-                # Feature vector: [node_type_encoded, source_count, max_sources, ...]
-                features = [
-                    1.0 if row['node_type'] == 'local' else 0.0,  # Local indicator
-                    float(row.get('source_count', 0)),
-                    float(row.get('max_sources_required', 5)),
-                    float(row.get('source_count', 0)) / max(float(row.get('max_sources_required', 5)), 1.0),  # Source ratio
-                ]
-                # Pad to 10 features
-                while len(features) < 10:
-                    features.append(0.0)
-                node_features.append(features[:10])
-                node_types.append(1 if row['node_type'] == 'local' else 0)
-                node_dates.append(row['date'])
-        
+        # Index order (sorted ids after load_data; nodes added by append_node come last)
+        node_ids = [self.idx_to_node[i] for i in range(len(self.idx_to_node))]
+        num_nodes = len(node_ids)
+
+        # Index nodes once; the first row wins for duplicated ids (same as the old iloc[0] lookups).
+        nodes_by_id = self._nodes_by_id()
+        has_row = pd.Index(node_ids).isin(nodes_by_id.index)
+        rows = nodes_by_id.reindex(node_ids)
+
+        node_features, is_local = self._node_features(rows, has_row)
+
+        node_types = np.where(has_row & is_local, 1, 0).tolist()
+        raw_dates = rows['date'].tolist() if 'date' in rows else [None] * num_nodes
+        node_dates = [raw_dates[i] if has_row[i] else None for i in range(num_nodes)]
+
+        # Parse every node date once (not once per edge endpoint). Years come from the
+        # pre-parsed start_year column when the nodes CSV has one.
+        node_ts_ns, node_has_ts = self._parse_node_timestamps(node_dates, has_row)
+        node_years = year_columns(rows)[0]
+        node_years[~has_row] = np.nan
+
         # Create edge indices and attributes
-        edge_indices = []
-        edge_attrs = []
-        edge_metadata = []
-        
-        for _, edge_row in self.edges_df.iterrows():
-            source_idx = self.node_to_idx[edge_row['source_node_id']]
-            target_idx = self.node_to_idx[edge_row['target_node_id']]
-            
-            # Get dates for temporal calculation
-            source_date = None
-            target_date = None
-            
-            source_node_data = self.nodes_df[self.nodes_df['node_id'] == edge_row['source_node_id']]
-            target_node_data = self.nodes_df[self.nodes_df['node_id'] == edge_row['target_node_id']]
-            
-            if len(source_node_data) > 0:
-                source_date = source_node_data.iloc[0]['date']
-            if len(target_node_data) > 0:
-                target_date = target_node_data.iloc[0]['date']
-            
-            # Calculate temporal gap
-            temporal_gap = 0.0
-            if len(source_node_data) > 0 and len(target_node_data) > 0:
-                temporal_gap = self.calculate_temporal_gap_flexible(source_node_data.iloc[0]['date'], target_node_data.iloc[0]['date'])
-            
-            edge_indices.append([source_idx, target_idx])
-            
-            # Edge attributes: [directness, source_count, max_sources, temporal_gap]
-            # Safely convert to float, handling any string values
-            try:
-                directness = float(edge_row.get('directness_score', 0.5))
-            except (ValueError, TypeError):
-                directness = 0.5
-            
-            try:
-                source_count = float(edge_row.get('source_count', 0))
-            except (ValueError, TypeError):
-                source_count = 0.0
-            
-            try:
-                max_sources = float(edge_row.get('max_sources_required', 5))
-            except (ValueError, TypeError):
-                max_sources = 5.0
-            
-            edge_attr = [
-                directness,
-                source_count,
-                max_sources,
-                temporal_gap,
-            ]
-            edge_attrs.append(edge_attr)
-            
-            # Store metadata
-            edge_metadata.append({
-                'edge_id': edge_row['edge_id'],
-                'causal_description': edge_row.get('causal_description', ''),
-                'source_node_id': edge_row['source_node_id'],
-                'target_node_id': edge_row['target_node_id'],
-            })
-        
+        edges_df = self.edges_df
+        source_idx = edges_df['source_node_id'].map(self.node_to_idx).to_numpy(dtype=np.int64)
+        target_idx = edges_df['target_node_id'].map(self.node_to_idx).to_numpy(dtype=np.int64)
+
+        # Temporal gap in days: exact dates when both parse, else BCE/century-aware years, else 0.
+        # Only computed when both endpoints are described in nodes_df.
+        both_known = has_row[source_idx] & has_row[target_idx]
+        use_dates = both_known & node_has_ts[source_idx] & node_has_ts[target_idx]
+        use_years = (
+            both_known & ~use_dates &
+            ~np.isnan(node_years[source_idx]) & ~np.isnan(node_years[target_idx])
+        )
+        temporal_gap = np.zeros(len(edges_df), dtype=np.float64)
+        delta_days = np.floor_divide(node_ts_ns[target_idx] - node_ts_ns[source_idx], 86_400 * 10**9)
+        temporal_gap[use_dates] = np.abs(delta_days[use_dates])
+        temporal_gap[use_years] = np.abs(node_years[target_idx] - node_years[source_idx])[use_years] * 365.25
+
+        # Edge attributes: [directness, source_count, max_sources, temporal_gap]
+        # Unparseable values fall back to the defaults.
+        edge_attrs = np.stack([
+            self._float_column(edges_df, 'directness_score', 0.5),
+            self._float_column(edges_df, 'source_count', 0.0),
+            self._float_column(edges_df, 'max_sources_required', 5.0),
+            temporal_gap,
+        ], axis=1).astype(np.float32) if len(edges_df) else np.zeros((0, 4), dtype=np.float32)
+
+        # Store metadata
+        descriptions = (
+            edges_df['causal_description'].tolist() if 'causal_description' in edges_df
+            else [''] * len(edges_df)
+        )
+        edge_metadata = [
+            {
+                'edge_id': edge_id,
+                'causal_description': description,
+                'source_node_id': source_id,
+                'target_node_id': target_id,
+            }
+            for edge_id, description, source_id, target_id in zip(
+                edges_df['edge_id'].tolist(),
+                descriptions,
+                edges_df['source_node_id'].tolist(),
+                edges_df['target_node_id'].tolist(),
+            )
+        ]
+
         # Convert to tensors
-        node_features_tensor = torch.tensor(node_features, dtype=torch.float)
-        edge_index = torch.tensor(edge_indices, dtype=torch.long).t().contiguous()
-        edge_attr_tensor = torch.tensor(edge_attrs, dtype=torch.float)
+        node_features_tensor = torch.from_numpy(node_features)
+        edge_index = torch.from_numpy(np.stack([source_idx, target_idx])).contiguous()
+        edge_attr_tensor = torch.from_numpy(edge_attrs)
         
         # Create PyTorch Geometric Data object
         data = Data(
@@ -215,16 +195,142 @@ class HistoricalDataLoader:
         
         return data
     
+    def load_graph(self) -> Data:
+        """
+        Same graph as build_graph(), served from the binary snapshot when its CSV hash
+        matches (see graph_snapshot.py). A missing or stale snapshot is rebuilt here.
+        """
+        if not graph_snapshot.snapshots_enabled():
+            return self.build_graph()
+
+        digest = graph_snapshot.source_hash(self.nodes_file, self.edges_file)
+        path = graph_snapshot.snapshot_path(self.nodes_file, self.edges_file)
+        payload = graph_snapshot.load_snapshot(path, digest)
+        if payload is not None:
+            self.nodes_df = payload['nodes_df']
+            self.edges_df = payload['edges_df']
+            self._nodes_by_id_df = None
+            node_ids = payload['node_ids']
+            self.node_to_idx = dict(zip(node_ids, range(len(node_ids))))
+            self.idx_to_node = dict(enumerate(node_ids))
+            return graph_snapshot.graph_from_snapshot(payload, self.node_to_idx, self.idx_to_node)
+
+        data = self.build_graph()
+        try:
+            node_ids = [self.idx_to_node[i] for i in range(len(self.idx_to_node))]
+            graph_snapshot.save_snapshot(path, digest, data, node_ids, self.nodes_df, self.edges_df)
+        except OSError as e:
+            print(f"Warning: Could not write graph snapshot {path}: {e}")
+        return data
+
+    def append_node(self, data: Data, row: Dict) -> int:
+        """
+        Add one node without edges to the loaded tables and to `data` (built by build_graph).
+
+        The node gets the next index, so existing indices, edge_index and edge attributes are
+        unchanged. A node with edges changes degrees and temporal gaps; reload for those.
+
+        Args:
+            data: Graph returned by build_graph() of this loader
+            row: Nodes CSV row (node_id, node_type, date, source_count, ...)
+
+        Returns:
+            Index of the new node
+        """
+        node_id = row['node_id']
+        if node_id in self.node_to_idx:
+            raise ValueError(f"node {node_id} is already in the graph")
+
+        new_row = pd.DataFrame([row]).reindex(columns=self.nodes_df.columns)
+        self.nodes_df = pd.concat([self.nodes_df, new_row], ignore_index=True)
+        self._nodes_by_id_df = None
+
+        idx = len(self.node_to_idx)
+        self.node_to_idx[node_id] = idx
+        self.idx_to_node[idx] = node_id
+
+        features, is_local = self._node_features(new_row, np.ones(1, dtype=bool))
+        data.x = torch.cat([data.x, torch.from_numpy(features)])
+        data.node_types.append(1 if is_local[0] else 0)
+        data.node_dates.append(new_row['date'].iloc[0] if 'date' in new_row else None)
+        data.nodes_df = self.nodes_df
+        return idx
+
+    def _node_features(self, rows: pd.DataFrame, has_row: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Node feature matrix for `rows` (one per node index) and the is-local mask.
+
+        Feature vector: [local_indicator, source_count, max_sources, source_ratio, 0 x 6]
+        Global nodes not in nodes_df keep an all-zero feature vector.
+        """
+        num_nodes = len(rows)
+        is_local = (rows['node_type'] == 'local').to_numpy() if 'node_type' in rows else np.zeros(num_nodes, dtype=bool)
+        node_source_count = self._float_column(rows, 'source_count', 0.0, coerce_invalid=False)
+        node_max_sources = self._float_column(rows, 'max_sources_required', 5.0, coerce_invalid=False)
+
+        node_features = np.zeros((num_nodes, 10), dtype=np.float32)
+        node_features[has_row, 0] = is_local[has_row].astype(np.float32)
+        node_features[has_row, 1] = node_source_count[has_row]
+        node_features[has_row, 2] = node_max_sources[has_row]
+        node_features[has_row, 3] = node_source_count[has_row] / np.maximum(node_max_sources[has_row], 1.0)
+        return node_features, is_local
+
+    def _nodes_by_id(self) -> pd.DataFrame:
+        """nodes_df indexed by node_id (first row wins for duplicated ids)."""
+        if self._nodes_by_id_df is None:
+            self._nodes_by_id_df = (
+                self.nodes_df.drop_duplicates(subset='node_id', keep='first').set_index('node_id', drop=False)
+            )
+        return self._nodes_by_id_df
+
+    @staticmethod
+    def _float_column(df: pd.DataFrame, column: str, default: float, coerce_invalid: bool = True) -> np.ndarray:
+        """
+        Column as float64. Missing column -> default everywhere.
+        With coerce_invalid, values that are present but not numeric also become the default;
+        genuinely empty cells stay NaN (matching float() on a NaN cell).
+        """
+        if column not in df:
+            return np.full(len(df), default, dtype=np.float64)
+        values = pd.to_numeric(df[column], errors='coerce')
+        if coerce_invalid:
+            values = values.mask(values.isna() & df[column].notna(), default)
+        return values.to_numpy(dtype=np.float64)
+
+    @staticmethod
+    def _parse_node_timestamps(node_dates: List, has_row: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Parse node dates once for temporal gaps.
+
+        Returns (timestamp_ns, has_timestamp) arrays. Timestamps come from pd.to_datetime on
+        each value (as calculate_temporal_gap_flexible does); the year fallback comes from
+        date_utils.year_columns.
+        """
+        n = len(node_dates)
+        ts_ns = np.zeros(n, dtype=np.int64)
+        has_ts = np.zeros(n, dtype=bool)
+        for i, raw in enumerate(node_dates):
+            if not has_row[i]:
+                continue
+            try:
+                ts = pd.to_datetime(raw, errors="coerce")
+                if pd.notna(ts):
+                    ts_ns[i] = ts.value
+                    has_ts[i] = True
+            except Exception:
+                pass
+        return ts_ns, has_ts
+    
     def get_node_info(self, node_id: str) -> Optional[Dict]:
         """Get information about a specific node."""
         if self.nodes_df is None:
             self.load_data()
         
-        node_data = self.nodes_df[self.nodes_df['node_id'] == node_id]
-        if len(node_data) == 0:
+        nodes_by_id = self._nodes_by_id()
+        if node_id not in nodes_by_id.index:
             return None
         
-        row = node_data.iloc[0]
+        row = nodes_by_id.loc[node_id]
         return {
             'node_id': row['node_id'],
             'node_type': row['node_type'],
@@ -9,15 +9,47 @@ We keep this intentionally heuristic-based because your history data includes:
   - "1869–1880s"
   - "993–1070 CE"
 etc.
+
+The same few hundred date strings are parsed over and over (Layer 0/2/5, graph
+building, training), so parsing is memoized in a bounded LRU cache keyed by the
+normalized string (size: DATE_PARSE_CACHE_SIZE, default 4096). parse_year_ranges()
+parses a whole column at once into start/end arrays; nodes CSVs written by
+build_nodes_from_history.py also carry pre-parsed start_year/end_year columns, which
+year_columns() prefers over re-parsing.
 """
 
 from __future__ import annotations
 
+import os
 import re
-from typing import Optional, Tuple
+from functools import lru_cache
+from typing import Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
 
 
 _DASHES = ["–", "—", "-"]
+_DASH_TRANS = str.maketrans({d: "-" for d in _DASHES})
+
+# Every rule below needs a digit; strings without one are rejected before the cascade.
+_HAS_DIGIT_RE = re.compile(r"\d")
+_ISO_DATE_RE = re.compile(r"(\d{4})-\d{1,2}-\d{1,2}\b")
+_YEAR_RANGE_RE = re.compile(r"(?P<a>\d{3,4})\s*-\s*(?P<b>\d{2,4})")
+_YEAR_RE = re.compile(r"\b(\d{4})\b")
+_BCE_YEAR_RE = re.compile(r"\b(\d{1,4})\s*bce\b")
+_CE_YEAR_RE = re.compile(r"\b(\d{1,4})\s*ce\b")
+_CENTURY_RANGE_RE = re.compile(r"(\d{1,2})(st|nd|rd|th)\s*century\s*([a-z ]*)-\s*(\d{1,2})(st|nd|rd|th)\s*century")
+_CENTURY_RE = re.compile(r"(\d{1,2})(st|nd|rd|th)\s*century")
+_FUZZY_CENTURY_RANGE_RE = re.compile(
+    r"(early|late)?\s*(\d{1,2})(st|nd|rd|th)\s*century\s*-\s*(early|late)?\s*(\d{1,2})(st|nd|rd|th)\s*century"
+)
+_DECADE_RANGE_RE = re.compile(r"(\d{4})\s*-\s*(\d{3,4})s")
+
+try:
+    DATE_PARSE_CACHE_SIZE = max(0, int(os.getenv("DATE_PARSE_CACHE_SIZE", "4096")))
+except ValueError:
+    DATE_PARSE_CACHE_SIZE = 4096
 
 
 def parse_year_range(date_str: str) -> Tuple[Optional[int], Optional[int]]:
@@ -33,13 +65,32 @@ def parse_year_range(date_str: str) -> Tuple[Optional[int], Optional[int]]:
         return None, None
 
     # Normalize dashes
-    for d in _DASHES:
-        s = s.replace(d, "-")
+    s_clean = s.translate(_DASH_TRANS).lower()
+    if not _HAS_DIGIT_RE.search(s_clean):
+        return None, None
+    return _parse_clean(s_clean)
+
+
+def _century_to_start(cent: int, is_bce: bool) -> int:
+    """Century N CE -> start year (N-1)*100, BCE -> -N*100."""
+    if is_bce:
+        return -(cent * 100)
+    return (cent - 1) * 100
+
 
-    s_clean = s.lower()
+@lru_cache(maxsize=DATE_PARSE_CACHE_SIZE)
+def _parse_clean(s_clean: str) -> Tuple[Optional[int], Optional[int]]:
+    """Rule cascade on a stripped, lowercased, dash-normalized string (memoized)."""
+    # ISO dates like "1867-01-01" (nodes CSVs) are one year, not the range 1867-1801
+    m = _ISO_DATE_RE.match(s_clean)
+    if m:
+        y = int(m.group(1))
+        if "bce" in s_clean:
+            return -y, -y
+        return y, y
 
     # Explicit year ranges like "1944-1948" or "993-1070 ce"
-    m = re.search(r"(?P<a>\d{3,4})\s*-\s*(?P<b>\d{2,4})", s_clean)
+    m = _YEAR_RANGE_RE.search(s_clean)
     if m:
         a = int(m.group("a"))
         b_raw = m.group("b")
@@ -54,7 +105,7 @@ def parse_year_range(date_str: str) -> Tuple[Optional[int], Optional[int]]:
         return a, b
 
     # Single explicit year (4 digits) anywhere
-    m = re.search(r"\b(\d{4})\b", s_clean)
+    m = _YEAR_RE.search(s_clean)
     if m and "century" not in s_clean:
         y = int(m.group(1))
         if "bce" in s_clean:
@@ -62,46 +113,40 @@ def parse_year_range(date_str: str) -> Tuple[Optional[int], Optional[int]]:
         return y, y
 
     # BCE single year like "247 bce" or "543 bce"
-    m = re.search(r"\b(\d{1,4})\s*bce\b", s_clean)
+    m = _BCE_YEAR_RE.search(s_clean)
     if m:
         y = int(m.group(1))
         return -y, -y
 
     # CE single year like "1505" already covered; handle "1505 ce"
-    m = re.search(r"\b(\d{1,4})\s*ce\b", s_clean)
+    m = _CE_YEAR_RE.search(s_clean)
     if m:
         y = int(m.group(1))
         return y, y
 
     # Century patterns: "3rd century bce", "1st century ce", "13th–15th century"
-    # We map century N CE -> start year (N-1)*100, BCE -> -N*100
-    def century_to_start(cent: int, is_bce: bool) -> int:
-        if is_bce:
-            return -(cent * 100)
-        return (cent - 1) * 100
-
     # Range of centuries like "13th-15th century ce" or "17th-18th century"
-    m = re.search(r"(\d{1,2})(st|nd|rd|th)\s*century\s*([a-z ]*)-\s*(\d{1,2})(st|nd|rd|th)\s*century", s_clean)
+    m = _CENTURY_RANGE_RE.search(s_clean)
     if m:
         c1 = int(m.group(1))
         c2 = int(m.group(4))
         is_bce = "bce" in s_clean
         # if it mentions CE explicitly, use CE; if BCE present, BCE dominates
-        start = century_to_start(c1, is_bce)
-        end = century_to_start(c2, is_bce) + (99 if not is_bce else 0)  # rough
+        start = _century_to_start(c1, is_bce)
+        end = _century_to_start(c2, is_bce) + (99 if not is_bce else 0)  # rough
         return start, end
 
     # Single century like "4th century ce" or "3rd century bce"
-    m = re.search(r"(\d{1,2})(st|nd|rd|th)\s*century", s_clean)
+    m = _CENTURY_RE.search(s_clean)
     if m:
         c = int(m.group(1))
         is_bce = "bce" in s_clean
-        start = century_to_start(c, is_bce)
+        start = _century_to_start(c, is_bce)
         end = start + (99 if not is_bce else 0)
         return start, end
 
     # Fuzzy phrases like "19th–early 20th century", "late 19th–early 20th century"
-    m = re.search(r"(early|late)?\s*(\d{1,2})(st|nd|rd|th)\s*century\s*-\s*(early|late)?\s*(\d{1,2})(st|nd|rd|th)\s*century", s_clean)
+    m = _FUZZY_CENTURY_RANGE_RE.search(s_clean)
     if m:
         c1 = int(m.group(2))
         c2 = int(m.group(5))
@@ -110,7 +155,7 @@ def parse_year_range(date_str: str) -> Tuple[Optional[int], Optional[int]]:
         return start, end
 
     # "1869-1880s"
-    m = re.search(r"(\d{4})\s*-\s*(\d{3,4})s", s_clean)
+    m = _DECADE_RANGE_RE.search(s_clean)
     if m:
         a = int(m.group(1))
         b = int(m.group(2))
@@ -120,11 +165,51 @@ def parse_year_range(date_str: str) -> Tuple[Optional[int], Optional[int]]:
     return None, None
 
 
+def parse_year_ranges(values: Iterable) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Parse a column of date strings (list / array / pandas Series).
+
+    Each distinct value is parsed once. Returns float64 (start_years, end_years) arrays
+    aligned with `values`, with NaN where a date cannot be parsed (integer arrays have no
+    missing value; every parsed year is a whole number).
+    """
+    series = values if isinstance(values, pd.Series) else pd.Series(list(values), dtype=object)
+    codes, uniques = pd.factorize(series.astype(object))
+    parsed = np.array(
+        [[np.nan if v is None else v for v in parse_year_range(u)] for u in uniques],
+        dtype=np.float64,
+    ).reshape(-1, 2)
+    starts = np.full(len(codes), np.nan)
+    ends = np.full(len(codes), np.nan)
+    known = codes >= 0
+    starts[known] = parsed[codes[known], 0]
+    ends[known] = parsed[codes[known], 1]
+    return starts, ends
+
+
+def year_columns(df: pd.DataFrame, date_column: str = "date") -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (start_years, end_years) for every row of a nodes table.
+
+    Uses the pre-parsed start_year/end_year columns when the CSV has them (rows left
+    empty there are parsed from `date_column`), otherwise parses `date_column`.
+    """
+    if date_column not in df:
+        return np.full(len(df), np.nan), np.full(len(df), np.nan)
+    if "start_year" not in df or "end_year" not in df:
+        return parse_year_ranges(df[date_column])
+
+    starts = pd.to_numeric(df["start_year"], errors="coerce").to_numpy(dtype=np.float64, copy=True)
+    ends = pd.to_numeric(df["end_year"], errors="coerce").to_numpy(dtype=np.float64, copy=True)
+    missing = np.isnan(starts)
+    if missing.any():
+        starts[missing], ends[missing] = parse_year_ranges(df[date_column][missing])
+    return starts, ends
+
+
 def year_for_ordering(date_str: str) -> Optional[int]:
     """
     Convenience: return a single year (start year) used for comparisons.
     """
     start, _ = parse_year_range(date_str)
     return start
-
-
@@ -8,9 +8,12 @@ import torch.nn as nn
 import torch.nn.functional as F
 from torch_geometric.nn import GCNConv, global_mean_pool
 from torch_geometric.data import Data
-from typing import List, Tuple, Dict, Optional
+from typing import Iterable, List, Tuple, Dict, Optional
+from collections import deque
 import numpy as np
 
+from graph_snapshot import build_csr
+
 
 class CausalGNN(nn.Module):
     """Graph Neural Network for discovering causal links between global and local events."""
@@ -99,6 +102,23 @@ class CausalGNN(nn.Module):
         return torch.mean(path_embeddings, dim=0)
 
 
+class LinkPredictor(nn.Module):
+    """Simple MLP link predictor over concatenated node embeddings (trained by train_gnn.py)."""
+
+    def __init__(self, emb_dim: int, hidden_dim: int = 64, dropout: float = 0.2):
+        super().__init__()
+        self.net = nn.Sequential(
+            nn.Linear(emb_dim * 2, hidden_dim),
+            nn.ReLU(),
+            nn.Dropout(dropout),
+            nn.Linear(hidden_dim, 1),
+        )
+
+    def forward(self, src_emb: torch.Tensor, dst_emb: torch.Tensor) -> torch.Tensor:
+        x = torch.cat([src_emb, dst_emb], dim=-1)
+        return self.net(x).squeeze(-1)
+
+
 class PathFinder:
     """Finds causal paths between global and local events using graph traversal."""
     
@@ -114,100 +134,153 @@ class PathFinder:
         self.model = model
         self.num_nodes = data.x.shape[0]
         
-        # Build adjacency list for efficient traversal
+        # (source_idx, target_idx) -> column in edge_index, filled alongside the adjacency list
+        self.edge_positions: Dict[Tuple[int, int], int] = {}
+        
+        # Build adjacency list for efficient traversal (and its reverse, for find_paths_to)
+        self.rev_adj_list: Dict[int, List[int]] = {}
         self.adj_list = self._build_adjacency_list()
     
     def _build_adjacency_list(self) -> Dict[int, List[int]]:
-        """Build adjacency list from edge_index."""
-        adj_list = {i: [] for i in range(self.num_nodes)}
-        
-        edge_index = self.data.edge_index.cpu().numpy()
-        for i in range(edge_index.shape[1]):
-            source = int(edge_index[0, i])
-            target = int(edge_index[1, i])
-            adj_list[source].append(target)
+        """
+        Build adjacency list (and the edge position map) from the CSR adjacency.
+
+        Graphs loaded from a snapshot carry `data.csr_adjacency`; otherwise it is computed here.
+        """
+        csr = getattr(self.data, 'csr_adjacency', None)
+        if csr is None:
+            csr = build_csr(self.data.edge_index, self.num_nodes)
+        rowptr, col, perm = (t.tolist() for t in csr)
+
+        num_rows = len(rowptr) - 1
+        adj_list = {i: col[rowptr[i]:rowptr[i + 1]] for i in range(num_rows)}
+        for i in range(num_rows, self.num_nodes):
+            adj_list[i] = []
+
+        # Keep the first column for duplicate edges, as the old linear scan did: rows are
+        # stably sorted, so filling the dict back to front leaves the first column.
+        sources = np.repeat(np.arange(num_rows), np.diff(rowptr)).tolist()
+        self.edge_positions = dict(zip(zip(reversed(sources), reversed(col)), reversed(perm)))
+
+        # In-neighbors in source order
+        self.rev_adj_list = {i: [] for i in range(self.num_nodes)}
+        for source, target in zip(sources, col):
+            self.rev_adj_list[target].append(source)
         
         return adj_list
+
+    def add_node(self, idx: int) -> None:
+        """Register a node appended to `data` without edges (see HistoricalDataLoader.append_node)."""
+        self.adj_list.setdefault(idx, [])
+        self.rev_adj_list.setdefault(idx, [])
+        self.num_nodes = self.data.x.shape[0]
     
-    def find_paths(
+    def find_paths_to(
         self,
-        source_node_id: str,
         target_node_id: str,
+        source_node_ids: Iterable[str],
         max_depth: int = 3,
-        max_paths: int = 10
-    ) -> List[Dict]:
+        paths_per_source: int = 1,
+        max_visited: int = 200000
+    ) -> Dict[str, List[Dict]]:
         """
-        Find all paths from source to target node.
-        
+        Shortest paths from many sources to one target with a single traversal.
+
+        One reverse BFS from the target over the in-edges gives every node's hop distance
+        to it (up to max_depth); each source's paths are then read off by walking forward
+        along edges that get one hop closer. Per source, paths come in BFS order (the
+        first neighbor in adjacency order wins), so the first one is the shortest path a
+        plain forward BFS from the source would find first.
+
         Args:
-            source_node_id: ID of source (global) node
             target_node_id: ID of target (local) node
+            source_node_ids: IDs of source (global) nodes
             max_depth: Maximum path length
-            max_paths: Maximum number of paths to return
-        
+            paths_per_source: Maximum number of (shortest) paths per source
+            max_visited: Nodes the reverse BFS may reach before it stops expanding
+
         Returns:
-            List of path dictionaries with node IDs and metadata
+            {source_id: [path dict, ...]} for the sources that reach the target
         """
-        if source_node_id not in self.data.node_to_idx:
-            return []
-        if target_node_id not in self.data.node_to_idx:
-            return []
-        
-        source_idx = self.data.node_to_idx[source_node_id]
-        target_idx = self.data.node_to_idx[target_node_id]
-        
-        # BFS to find all paths
-        paths = []
-        queue = [(source_idx, [source_idx])]
-        visited_paths = set()
-        
-        while queue and len(paths) < max_paths:
-            current_idx, path = queue.pop(0)
-            
-            if current_idx == target_idx and len(path) > 1:
-                # Found a path
-                path_node_ids = [self.data.idx_to_node[idx] for idx in path]
-                paths.append({
-                    'path': path,
-                    'path_node_ids': path_node_ids,
-                    'length': len(path) - 1
-                })
+        target_idx = self.data.node_to_idx.get(target_node_id)
+        if target_idx is None:
+            return {}
+
+        dist = self._distances_to(target_idx, max_depth, max_visited)
+        results = {}
+        for source_id in source_node_ids:
+            source_idx = self.data.node_to_idx.get(source_id)
+            if source_idx is None or source_idx == target_idx or source_idx not in dist:
                 continue
-            
-            if len(path) >= max_depth + 1:
+            results[source_id] = [
+                self._path_dict(path)
+                for path in self._shortest_paths(source_idx, dist, max(1, paths_per_source))
+            ]
+        return results
+
+    def _distances_to(self, target_idx: int, max_depth: int, max_visited: int) -> Dict[int, int]:
+        """Hop distance to target_idx for nodes within max_depth (reverse BFS, bounded)."""
+        dist = {target_idx: 0}
+        queue = deque([target_idx])
+        while queue and len(dist) < max_visited:
+            current = queue.popleft()
+            depth = dist[current] + 1
+            if depth > max_depth:
                 continue
-            
-            # Explore neighbors
-            for neighbor_idx in self.adj_list.get(current_idx, []):
-                if neighbor_idx not in path:  # Avoid cycles
-                    new_path = path + [neighbor_idx]
-                    path_tuple = tuple(new_path)
-                    
-                    if path_tuple not in visited_paths:
-                        visited_paths.add(path_tuple)
-                        queue.append((neighbor_idx, new_path))
-        
+            for source in self.rev_adj_list.get(current, []):
+                if source not in dist:
+                    dist[source] = depth
+                    queue.append(source)
+        return dist
+
+    def _shortest_paths(self, source_idx: int, dist: Dict[int, int], limit: int) -> List[Tuple[int, ...]]:
+        """Up to `limit` shortest paths source -> target, in adjacency (BFS) order."""
+        if limit == 1:
+            # Greedy walk: the first neighbor one hop closer is always on a shortest path
+            path = [source_idx]
+            while dist[path[-1]]:
+                closer = dist[path[-1]] - 1
+                path.append(next(n for n in self.adj_list.get(path[-1], []) if dist.get(n) == closer))
+            return [tuple(path)]
+
+        paths: List[Tuple[int, ...]] = []
+        stack = [(source_idx,)]
+        while stack and len(paths) < limit:
+            path = stack.pop()
+            if not dist[path[-1]]:
+                paths.append(path)
+                continue
+            closer = dist[path[-1]] - 1
+            # Reversed so the first neighbor is popped first; duplicate edges give one path
+            steps = list(dict.fromkeys(n for n in self.adj_list.get(path[-1], []) if dist.get(n) == closer))
+            stack.extend(path + (n,) for n in reversed(steps))
         return paths
+
+    def _path_dict(self, path: Tuple[int, ...]) -> Dict:
+        return {
+            'path': list(path),
+            'path_node_ids': [self.data.idx_to_node[idx] for idx in path],
+            'length': len(path) - 1
+        }
     
     def get_edge_info(self, source_idx: int, target_idx: int) -> Optional[Dict]:
         """Get edge information between two nodes."""
-        edge_index = self.data.edge_index.cpu().numpy()
-        
-        for i in range(edge_index.shape[1]):
-            if int(edge_index[0, i]) == source_idx and int(edge_index[1, i]) == target_idx:
-                # Found the edge
-                if hasattr(self.data, 'edge_metadata') and i < len(self.data.edge_metadata):
-                    edge_info = self.data.edge_metadata[i].copy()
-                    
-                    # Add edge attributes
-                    if hasattr(self.data, 'edge_attr') and i < self.data.edge_attr.shape[0]:
-                        edge_attr = self.data.edge_attr[i].cpu().numpy()
-                        edge_info['directness_score'] = float(edge_attr[0])
-                        edge_info['source_count'] = int(edge_attr[1])
-                        edge_info['max_sources_required'] = int(edge_attr[2])
-                        edge_info['temporal_gap_days'] = float(edge_attr[3])
-                    
-                    return edge_info
+        i = self.edge_positions.get((int(source_idx), int(target_idx)))
+        if i is None:
+            return None
+        
+        if hasattr(self.data, 'edge_metadata') and i < len(self.data.edge_metadata):
+            edge_info = self.data.edge_metadata[i].copy()
+            
+            # Add edge attributes
+            if hasattr(self.data, 'edge_attr') and i < self.data.edge_attr.shape[0]:
+                edge_attr = self.data.edge_attr[i].cpu().numpy()
+                edge_info['directness_score'] = float(edge_attr[0])
+                edge_info['source_count'] = int(edge_attr[1])
+                edge_info['max_sources_required'] = int(edge_attr[2])
+                edge_info['temporal_gap_days'] = float(edge_attr[3])
+            
+            return edge_info
         
         return None
 
@@ -0,0 +1,135 @@
+"""
+Binary snapshot of the base graph for fast pipeline startup.
+
+Building the base graph means parsing nodes_from_history.csv and edges_template.csv with
+pandas, computing node features and temporal gaps, and (in PathFinder) turning edge_index
+into an adjacency list. Layers 3 and 4 both did that on every start. The snapshot stores
+the finished graph in one torch zip file:
+
+- x, edge_index, edge_attr tensors (loaded with mmap=True, so pages are read on demand)
+- node id order, node types/dates and edge metadata
+- CSR adjacency (rowptr, col, edge position) for PathFinder
+- the nodes/edges tables the loader keeps for later lookups
+
+The file records a SHA-256 of both CSV sources and a format version; a mismatch on
+either rebuilds it from the CSVs.
+
+Environment:
+  GRAPH_SNAPSHOT=off          always build from the CSVs
+  GRAPH_SNAPSHOT_DIR=...      snapshot directory (default: cache/)
+"""
+
+import hashlib
+import os
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import torch
+from torch_geometric.data import Data
+
+
+SNAPSHOT_VERSION = 1
+
+
+def snapshots_enabled() -> bool:
+    """False when GRAPH_SNAPSHOT is set to off/0/false/no."""
+    return str(os.getenv('GRAPH_SNAPSHOT', 'on')).strip().lower() not in ('off', '0', 'false', 'no')
+
+
+def snapshot_path(nodes_file: str, edges_file: str) -> Path:
+    """Snapshot file for a nodes/edges pair (one file per pair of source paths)."""
+    key = f"{Path(nodes_file).resolve()}|{Path(edges_file).resolve()}"
+    name = f"graph_{hashlib.sha256(key.encode('utf-8')).hexdigest()[:12]}.pt"
+    return Path(os.getenv('GRAPH_SNAPSHOT_DIR') or 'cache') / name
+
+
+def source_hash(nodes_file: str, edges_file: str) -> str:
+    """SHA-256 over the contents of both CSV files."""
+    digest = hashlib.sha256()
+    for path in (nodes_file, edges_file):
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def build_csr(edge_index: torch.Tensor, num_nodes: int) -> Tuple[torch.Tensor, torch.Tensor, torch.Tensor]:
+    """
+    CSR adjacency for edge_index.
+
+    Returns (rowptr, col, perm): the targets of node i are col[rowptr[i]:rowptr[i+1]] and
+    perm holds their edge_index columns. Each row keeps edge order (stable sort).
+    """
+    source = edge_index[0].cpu().numpy()
+    perm = np.argsort(source, kind='stable')
+    counts = np.bincount(source, minlength=num_nodes) if len(source) else np.zeros(num_nodes, dtype=np.int64)
+    rowptr = np.zeros(num_nodes + 1, dtype=np.int64)
+    np.cumsum(counts, out=rowptr[1:])
+    col = edge_index[1].cpu().numpy()[perm]
+    return (
+        torch.from_numpy(rowptr),
+        torch.from_numpy(np.ascontiguousarray(col, dtype=np.int64)),
+        torch.from_numpy(perm.astype(np.int64)),
+    )
+
+
+def save_snapshot(path: Path, digest: str, data: Data, node_ids, nodes_df, edges_df) -> None:
+    """Write `data` (built by HistoricalDataLoader.build_graph) atomically to `path`."""
+    if getattr(data, 'csr_adjacency', None) is None:
+        data.csr_adjacency = build_csr(data.edge_index, data.x.shape[0])
+    rowptr, col, perm = data.csr_adjacency
+    payload = {
+        'version': SNAPSHOT_VERSION,
+        'source_hash': digest,
+        'x': data.x.contiguous(),
+        'edge_index': data.edge_index.contiguous(),
+        'edge_attr': data.edge_attr.contiguous(),
+        'csr_rowptr': rowptr,
+        'csr_col': col,
+        'csr_perm': perm,
+        'node_ids': list(node_ids),
+        'node_types': list(data.node_types),
+        'node_dates': list(data.node_dates),
+        'edge_metadata': data.edge_metadata,
+        'nodes_df': nodes_df,
+        'edges_df': edges_df,
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    torch.save(payload, tmp)
+    os.replace(tmp, path)
+
+
+def load_snapshot(path: Path, digest: str) -> Optional[Dict]:
+    """Snapshot payload, or None if missing, unreadable, stale or of another version."""
+    if not path.exists():
+        return None
+    try:
+        try:
+            payload = torch.load(path, map_location='cpu', mmap=True, weights_only=False)
+        except TypeError:
+            # torch < 2.1 has no mmap/weights_only arguments
+            payload = torch.load(path, map_location='cpu')
+    except Exception:
+        return None
+    if not isinstance(payload, dict):
+        return None
+    if payload.get('version') != SNAPSHOT_VERSION or payload.get('source_hash') != digest:
+        return None
+    return payload
+
+
+def graph_from_snapshot(payload: Dict, node_to_idx: Dict, idx_to_node: Dict) -> Data:
+    """Rebuild the Data object build_graph() would return from a snapshot payload."""
+    data = Data(x=payload['x'], edge_index=payload['edge_index'], edge_attr=payload['edge_attr'])
+    data.node_to_idx = node_to_idx
+    data.idx_to_node = idx_to_node
+    data.node_types = payload['node_types']
+    data.node_dates = payload['node_dates']
+    data.edge_metadata = payload['edge_metadata']
+    data.nodes_df = payload['nodes_df']
+    data.edges_df = payload['edges_df']
+    data.csr_adjacency = (payload['csr_rowptr'], payload['csr_col'], payload['csr_perm'])
+    return data
@@ -0,0 +1,139 @@
+"""
+Shared base graph for the pipeline and its graph layers.
+
+GraphConstructor (Layer 3), GNNReasoner (Layer 4) and CausalLogicPipeline each used to
+own a HistoricalDataLoader / nodes table and load the same CSVs. A GraphStore holds one
+loaded graph per nodes/edges pair; `GraphStore.acquire` hands out the same instance to
+every consumer and counts references, `release` drops it when the last one is done.
+
+Refresh semantics:
+- `refresh()` reloads from disk and swaps graph, loader and nodes table in one step
+- `add_local_node()` appends one edgeless node in place (see HistoricalDataLoader.append_node)
+- both bump `version`; consumers that derive state from the graph (Layer 4's PathFinder and
+  embeddings) compare versions and ask `added_since()` whether they can catch up incrementally
+"""
+
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+from torch_geometric.data import Data
+
+from data_loader import HistoricalDataLoader
+
+
+class GraphStore:
+    """One loaded base graph (Data + loader + nodes table) shared by reference."""
+
+    _shared: Dict[Tuple[str, str], 'GraphStore'] = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, nodes_file: str, edges_file: str):
+        """
+        Load the graph. Prefer GraphStore.acquire(), which shares instances.
+
+        Args:
+            nodes_file: Path to nodes CSV
+            edges_file: Path to edges CSV
+        """
+        self.nodes_file = nodes_file
+        self.edges_file = edges_file
+        self.data_loader: Optional[HistoricalDataLoader] = None
+        self.data: Optional[Data] = None
+        self.nodes_df: Optional[pd.DataFrame] = None
+        self.version = 0
+        self.refs = 0
+        # Version of the last full load; nodes appended after it, in order.
+        self._base_version = 0
+        self._added: List[int] = []
+        self._lock = threading.RLock()
+        self.refresh()
+
+    @classmethod
+    def acquire(cls, nodes_file: str, edges_file: str) -> 'GraphStore':
+        """Shared store for a nodes/edges pair (loaded on first use); pair with release()."""
+        key = (str(nodes_file), str(edges_file))
+        with cls._shared_lock:
+            store = cls._shared.get(key)
+            if store is None:
+                store = cls(nodes_file, edges_file)
+                cls._shared[key] = store
+            store.refs += 1
+            return store
+
+    def release(self) -> None:
+        """Drop one reference; the last one removes the store from the shared registry."""
+        with GraphStore._shared_lock:
+            self.refs = max(0, self.refs - 1)
+            if self.refs:
+                return
+            key = (str(self.nodes_file), str(self.edges_file))
+            if GraphStore._shared.get(key) is self:
+                del GraphStore._shared[key]
+            self.data = None
+            self.nodes_df = None
+            self.data_loader = None
+
+    def refresh(self) -> None:
+        """Reload graph and nodes table from the CSVs and publish them as a new version."""
+        loader = None
+        data = None
+        nodes_df = None
+        if self.nodes_file:
+            loader = HistoricalDataLoader(self.nodes_file, self.edges_file)
+            try:
+                data = loader.load_graph()
+                nodes_df = loader.nodes_df
+            except Exception as e:
+                print(f"Warning: Could not load graph data: {e}")
+                data = None
+                try:
+                    nodes_df = pd.read_csv(self.nodes_file)
+                except Exception:
+                    nodes_df = None
+
+        with self._lock:
+            self.data_loader = loader
+            self.data = data
+            self.nodes_df = nodes_df
+            self.version += 1
+            self._base_version = self.version
+            self._added = []
+
+    def current(self) -> Tuple[Optional[Data], int]:
+        """Graph and its version, read together."""
+        with self._lock:
+            return self.data, self.version
+
+    def add_local_node(self, row: Dict) -> Optional[int]:
+        """
+        Append a new edgeless node to the graph and nodes table in place.
+
+        Args:
+            row: Nodes CSV row (node_id, node_type, date, source_count, ...)
+
+        Returns:
+            Index of the new node, or None when no graph is loaded or the id already exists
+            (refresh() instead)
+        """
+        with self._lock:
+            if self.data is None or self.data_loader is None:
+                return None
+            try:
+                idx = self.data_loader.append_node(self.data, row)
+            except ValueError:
+                return None
+            self.nodes_df = self.data_loader.nodes_df
+            self.version += 1
+            self._added.append(idx)
+            return idx
+
+    def added_since(self, version: int) -> Optional[List[int]]:
+        """
+        Node indices appended after `version`, or None if a full refresh happened since
+        (rebuild everything derived from the graph).
+        """
+        with self._lock:
+            if version < self._base_version:
+                return None
+            return self._added[version - self._base_version:]
@@ -0,0 +1,194 @@
+"""
+Persistent HTTP response cache for Layer 1 (Knowledge Collection).
+
+The in-memory `KnowledgeCollector.cache` dies with the process, and the Node bridge
+used to start a fresh process per analyze call, so repeat analyses of the same exhibit
+re-ran dozens of sequential Wikipedia round trips. This module keeps raw responses
+in a single SQLite file keyed by endpoint + params, with:
+
+- a TTL per source kind (summary, search, extract, content, category, UNESCO, Seshat)
+- size-bounded eviction (least recently used first)
+- a strict offline mode that only replays recorded responses (deterministic runs)
+
+Environment:
+  KNOWLEDGE_CACHE=off          disable the on-disk cache
+  KNOWLEDGE_CACHE_PATH=...     SQLite file (default: cache/knowledge_cache.sqlite)
+  KNOWLEDGE_CACHE_MAX_MB=200   size bound before eviction
+  KNOWLEDGE_OFFLINE=1          never touch the network; cache misses return nothing
+"""
+
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+from urllib.parse import urlencode
+
+from sqlite_lru import LruStore, env_flag, env_number
+
+
+DAY = 24 * 60 * 60
+
+# Page text changes slowly; search rankings and category listings drift faster.
+DEFAULT_TTLS: Dict[str, int] = {
+    'summary': 30 * DAY,
+    'extract': 30 * DAY,
+    'content': 30 * DAY,
+    'search': 7 * DAY,
+    'category': 7 * DAY,
+    'unesco': 1 * DAY,
+    'seshat': 7 * DAY,
+    'other': 1 * DAY,
+}
+
+# Only responses that are a stable answer are worth replaying (404 = page does not exist).
+CACHEABLE_STATUS = (200, 404)
+
+
+class CachedResponse:
+    """Minimal stand-in for `requests.Response` (status_code / text / json())."""
+
+    from_cache = True
+
+    def __init__(self, status_code: int, text: str):
+        self.status_code = status_code
+        self.text = text
+
+    def json(self):
+        return json.loads(self.text)
+
+
+class HttpResponseCache:
+    """SQLite-backed response cache shared by every KnowledgeCollector in a process."""
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        max_bytes: Optional[int] = None,
+        ttls: Optional[Dict[str, int]] = None,
+        offline: Optional[bool] = None,
+    ):
+        """
+        Args:
+            path: SQLite file (default: $KNOWLEDGE_CACHE_PATH or cache/knowledge_cache.sqlite)
+            max_bytes: Size bound for stored bodies (default: $KNOWLEDGE_CACHE_MAX_MB, 200 MB)
+            ttls: Per-kind TTL overrides in seconds
+            offline: Default for get(offline=None) (default: $KNOWLEDGE_OFFLINE)
+        """
+        self.path = Path(path or os.getenv('KNOWLEDGE_CACHE_PATH') or Path('cache') / 'knowledge_cache.sqlite')
+        if max_bytes is None:
+            max_bytes = int(env_number('KNOWLEDGE_CACHE_MAX_MB', 200) * 1024 * 1024)
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.offline = env_flag('KNOWLEDGE_OFFLINE') if offline is None else bool(offline)
+        self.store = LruStore(
+            self.path,
+            'responses',
+            columns=('kind TEXT NOT NULL', 'status INTEGER NOT NULL'),
+            max_bytes=max_bytes,
+        )
+
+    @property
+    def max_bytes(self) -> int:
+        return self.store.max_bytes
+
+    @staticmethod
+    def make_key(url: str, params: Optional[Dict] = None) -> str:
+        """Endpoint + params with a stable parameter order."""
+        if not params:
+            return url
+        items = sorted((str(k), str(v)) for k, v in params.items())
+        return f"{url}?{urlencode(items)}"
+
+    @staticmethod
+    def classify(url: str, params: Optional[Dict] = None) -> str:
+        """Map a Layer 1 request to its TTL bucket."""
+        params = params or {}
+        if '/page/summary/' in url:
+            return 'summary'
+        if 'unesco' in url:
+            return 'unesco'
+        if 'seshat' in url:
+            return 'seshat'
+        if params.get('list') == 'search':
+            return 'search'
+        if params.get('list') == 'categorymembers':
+            return 'category'
+        if params.get('prop') == 'extracts':
+            return 'extract'
+        if params.get('prop') == 'revisions':
+            return 'content'
+        return 'other'
+
+    def get(self, url: str, params: Optional[Dict] = None, offline: Optional[bool] = None) -> Optional[CachedResponse]:
+        """
+        Return the stored response if it is still fresh.
+
+        In offline mode (the caller's, since collectors sharing this cache may differ;
+        None = this cache's default) expired entries are replayed too; a recorded answer
+        is better than none when the network is off limits.
+        """
+        replay = self.offline if offline is None else offline
+
+        def is_fresh(values, age: float) -> bool:
+            return replay or age <= self.ttls.get(values[0], self.ttls['other'])
+
+        row = self.store.get(self.make_key(url, params), is_fresh)
+        if row is None:
+            return None
+        _, status, body = row
+        return CachedResponse(status, body)
+
+    def put(self, url: str, params: Optional[Dict], response) -> None:
+        """Store a live response (ignored unless its status is worth replaying)."""
+        status = getattr(response, 'status_code', None)
+        if status not in CACHEABLE_STATUS:
+            return
+        try:
+            body = response.text
+        except Exception:
+            return
+        self.store.put(self.make_key(url, params), body, (self.classify(url, params), int(status)))
+
+    def purge_expired(self) -> int:
+        """Delete entries past their TTL. Returns the number of rows removed."""
+        return sum(self.store.delete_expired(ttl, 'kind = ?', (kind,)) for kind, ttl in self.ttls.items())
+
+    def clear(self) -> None:
+        """Remove every stored response."""
+        self.store.clear()
+
+    def stats(self) -> Dict:
+        """Entry count, stored bytes and hit/miss counters for this process."""
+        return {**self.store.stats(), 'offline': self.offline}
+
+
+_shared_caches: Dict[str, HttpResponseCache] = {}
+_shared_lock = threading.Lock()
+
+
+def get_shared_cache(path: Optional[str] = None, offline: Optional[bool] = None) -> Optional[HttpResponseCache]:
+    """
+    One cache object per file per process, or None when KNOWLEDGE_CACHE=off.
+
+    Offline mode (`offline`, default $KNOWLEDGE_OFFLINE) needs the cache to replay from,
+    so it cannot be switched off then. Entries past their TTL are purged when a file is
+    first opened by an online caller (offline runs replay expired entries).
+    """
+    offline = env_flag('KNOWLEDGE_OFFLINE') if offline is None else bool(offline)
+    disabled = str(os.getenv('KNOWLEDGE_CACHE', '')).strip().lower() in ('0', 'off', 'false', 'no')
+    if disabled and not offline:
+        return None
+
+    resolved = str(Path(path or os.getenv('KNOWLEDGE_CACHE_PATH') or Path('cache') / 'knowledge_cache.sqlite'))
+    with _shared_lock:
+        cache = _shared_caches.get(resolved)
+        if cache is None:
+            try:
+                cache = HttpResponseCache(resolved)
+                if not offline:
+                    cache.purge_expired()
+            except Exception as e:
+                print(f"[Layer 1] Warning: on-disk cache unavailable ({e}); continuing without it")
+                return None
+            _shared_caches[resolved] = cache
+        return cache
@@ -5,11 +5,78 @@ Based on the methodology PDF and Postman collection patterns.
 """
 
 import requests
+import threading
 import time
 import re
+from concurrent.futures import Future
 from typing import Dict, List, Optional, Tuple
 import json
-from urllib.parse import quote, urlencode
+from urllib.parse import quote, urlencode, urlparse
+from requests.adapters import HTTPAdapter
+
+from http_cache import HttpResponseCache, get_shared_cache, env_flag
+from pipeline_timing import ContextThreadPoolExecutor, record_http
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: `rate` requests per second on average, with up to
+    `capacity` requests allowed back-to-back. Shared by all Layer 1 worker threads,
+    so fanning out does not raise the request rate the APIs see.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        self.rate = float(rate)
+        self.capacity = max(1.0, float(capacity))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Block until a token is available, then take it."""
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return
+                wait = (1.0 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+# Process-wide limiters, so every KnowledgeCollector (pipeline_server, batch threads)
+# draws from the same budget: one bucket per (rate, burst) setting, one semaphore per host.
+_shared_buckets: Dict[Tuple[float, int], TokenBucket] = {}
+_shared_host_slots: Dict[str, threading.BoundedSemaphore] = {}
+_shared_limits_lock = threading.Lock()
+
+
+def get_shared_rate_limiter(rate: float, burst: int) -> TokenBucket:
+    """The process-wide TokenBucket for `rate` requests/second with `burst` capacity."""
+    key = (float(rate), max(1, int(burst)))
+    with _shared_limits_lock:
+        bucket = _shared_buckets.get(key)
+        if bucket is None:
+            bucket = TokenBucket(key[0], capacity=key[1])
+            _shared_buckets[key] = bucket
+        return bucket
+
+
+def get_shared_host_slot(host: str, limit: int) -> threading.BoundedSemaphore:
+    """
+    The process-wide semaphore capping concurrent requests to `host`.
+    The first caller's `limit` sizes it.
+    """
+    with _shared_limits_lock:
+        slot = _shared_host_slots.get(host)
+        if slot is None:
+            slot = threading.BoundedSemaphore(max(1, int(limit)))
+            _shared_host_slots[host] = slot
+        return slot
 
 
 class KnowledgeCollector:
@@ -21,13 +88,30 @@ class KnowledgeCollector:
     - Seshat DB API
     """
     
-    def __init__(self, rate_limit: float = 0.2, timeout: int = 10):
+    def __init__(
+        self,
+        rate_limit: float = 0.2,
+        timeout: int = 10,
+        cache_path: Optional[str] = None,
+        offline: Optional[bool] = None,
+        max_workers: int = 8,
+        burst: int = 4,
+        host_concurrency: Optional[Dict[str, int]] = None,
+        default_host_concurrency: int = 2
+    ):
         """
         Initialize the knowledge collector.
         
         Args:
             rate_limit: Seconds to wait between API calls
             timeout: Request timeout in seconds
+            cache_path: On-disk response cache file (see http_cache.py; default from env)
+            offline: Replay cached responses only, never hit the network
+                     (default: KNOWLEDGE_OFFLINE env var)
+            max_workers: Threads used to fan out the lookups in collect()
+            burst: Requests the rate limiter lets through back-to-back
+            host_concurrency: Max in-flight requests per host (e.g. {'en.wikipedia.org': 4})
+            default_host_concurrency: Cap for hosts not listed in host_concurrency
         """
         # Wikipedia REST API (for summaries)
         self.wikipedia_rest_base = "https://en.wikipedia.org/api/rest_v1/page/summary/"
@@ -43,6 +127,11 @@ class KnowledgeCollector:
         
         # Session with proper headers
         self.session = requests.Session()
+        self.max_workers = max(1, int(max_workers))
+        # Connection pool large enough for the worker threads (default pool is 10 per host)
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max(10, self.max_workers))
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
         self.session.headers.update({
             'User-Agent': 'CausalLogicEngine/1.0 (Educational Research; contact@example.com)'
         })
@@ -50,9 +139,19 @@ class KnowledgeCollector:
         # Configuration
         self.rate_limit = rate_limit
         self.timeout = timeout
-        self.cache = {}
         self.request_count = 0
-        self.max_requests_per_minute = 60
+
+        # Global rate limit (one token per `rate_limit` seconds) + per-host concurrency caps,
+        # both shared by all collectors in this process
+        self.rate_limiter = get_shared_rate_limiter(1.0 / rate_limit if rate_limit > 0 else 0, burst)
+        self.host_concurrency = {'en.wikipedia.org': 4, **(host_concurrency or {})}
+        self.default_host_concurrency = max(1, int(default_host_concurrency))
+        self._state_lock = threading.Lock()
+
+        # Persistent response cache shared across requests/processes (None if disabled).
+        # Offline is this collector's mode and is passed to every lookup; the cache is shared.
+        self.offline = env_flag('KNOWLEDGE_OFFLINE') if offline is None else bool(offline)
+        self.http_cache = get_shared_cache(cache_path, offline=self.offline)
     
     def collect(self, query: Dict) -> Dict:
         """
@@ -82,89 +181,105 @@ class KnowledgeCollector:
             'raw_text_evidence': []
         }
         
-        # 1. Search Wikipedia for local event (using both REST and MediaWiki APIs)
+        # Every lookup below is independent except extracts/full content, which need the
+        # local-event search results. All of them are submitted to a thread pool up front;
+        # _make_request applies the shared rate limit and per-host caps. Results are
+        # gathered in the original order so the evidence lists come out unchanged.
         local_event_text = query.get('local_event_text', '')
-        if local_event_text:
-            # Try REST API first (faster, better summaries)
-            wiki_summary = self._get_wikipedia_summary(local_event_text)
-            if wiki_summary:
-                evidence['wikipedia_snippets'].append(wiki_summary)
-            
-            # Also use MediaWiki search for broader results
-            search_results = self._search_wikipedia_mediawiki(local_event_text, limit=8)
-            evidence['wikipedia_search_results'].extend(search_results)
-            
-            # Get plaintext extracts for top search results in batches of B=2 (matches methodology PDF).
-            # This prevents truncated/garbled descriptions and gives Layer 2 cleaner text to work with.
-            if search_results:
-                titles = [r.get("title") for r in search_results if r.get("title")]
-                titles = [t for t in titles if isinstance(t, str) and t.strip()]
-                titles = titles[:8]  # methodology: srlimit=8 then process results in batches of 2
-                for i in range(0, len(titles), 2):
-                    batch = titles[i:i+2]
-                    for doc in self._get_wikipedia_extracts_plaintext_batch(batch):
-                        if doc:
-                            evidence["wikipedia_extracts"].append(doc)
-
-            # Try to get full content for top result
-            if search_results:
-                top_result = search_results[0]
-                page_id = top_result.get('pageid')
-                if page_id:
-                    full_content = self._get_wikipedia_full_content(page_id)
-                    if full_content:
-                        evidence['wikipedia_full_content'].append(full_content)
-        
-        # 2. Search for entities
-        for entity in query.get('entities', []):
-            entity_summary = self._get_wikipedia_summary(entity)
-            if entity_summary:
-                evidence['entity_mentions'].append(entity_summary)
-            
-            entity_search = self._search_wikipedia_mediawiki(entity, limit=3)
-            evidence['entity_mentions'].extend(entity_search)
-        
-        # 3. Search for commodities
         commodities = self._extract_commodities(local_event_text)
-        for commodity in commodities:
-            commodity_summary = self._get_wikipedia_summary(commodity)
-            if commodity_summary:
-                evidence['related_commodities'].append(commodity_summary)
-            
-            commodity_search = self._search_wikipedia_mediawiki(commodity, limit=3)
-            evidence['related_commodities'].extend(commodity_search)
-        
-        # 4. Search for context keywords
-        for keyword in query.get('keywords', [])[:5]:  # Top 5 keywords
-            keyword_summary = self._get_wikipedia_summary(keyword)
-            if keyword_summary:
-                evidence['context_keywords'].append(keyword_summary)
-        
-        # 5. Category-based discovery (for time periods, locations)
         date_range = query.get('date_range', {})
-        if date_range:
-            year = date_range.get('year')
-            if year:
-                # Try to find category for the time period
-                category_results = self._get_category_members(
-                    f"Category:{year}s_in_Sri_Lanka",
-                    limit=20
-                )
-                if not category_results:
-                    # Try alternative category names
-                    category_results = self._get_category_members(
-                        f"Category:{year}s_in_Ceylon",
-                        limit=20
-                    )
-                evidence['wikipedia_category_results'].extend(category_results)
-        
-        # 6. UNESCO API search
-        unesco_results = self._search_unesco(local_event_text)
-        evidence['unesco_data'].extend(unesco_results)
-        
-        # 7. Seshat DB search (for religions, historical data)
-        seshat_results = self._search_seshat(local_event_text)
-        evidence['seshat_data'].extend(seshat_results)
+        year = date_range.get('year') if date_range else None
+
+        # ContextThreadPoolExecutor: HTTP timings land on the request that submitted them
+        with ContextThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='layer1') as pool:
+            # 1. Local event: REST summary + MediaWiki search (search feeds extracts/content)
+            if local_event_text:
+                local_summary_f = pool.submit(self._get_wikipedia_summary, local_event_text)
+                local_search_f = pool.submit(self._search_wikipedia_mediawiki, local_event_text, 8)
+
+            # 2. Entities
+            entity_fs = [
+                (pool.submit(self._get_wikipedia_summary, entity),
+                 pool.submit(self._search_wikipedia_mediawiki, entity, 3))
+                for entity in query.get('entities', [])
+            ]
+
+            # 3. Commodities
+            commodity_fs = [
+                (pool.submit(self._get_wikipedia_summary, commodity),
+                 pool.submit(self._search_wikipedia_mediawiki, commodity, 3))
+                for commodity in commodities
+            ]
+
+            # 4. Context keywords (top 5)
+            keyword_fs = [
+                pool.submit(self._get_wikipedia_summary, keyword)
+                for keyword in query.get('keywords', [])[:5]
+            ]
+
+            # 5. Category-based discovery (for time periods, locations)
+            category_f = pool.submit(self._get_period_category_members, year) if year else None
+
+            # 6./7. UNESCO + Seshat DB
+            unesco_f = pool.submit(self._search_unesco, local_event_text)
+            seshat_f = pool.submit(self._search_seshat, local_event_text)
+
+            if local_event_text:
+                wiki_summary = self._future_result(local_summary_f, None)
+                if wiki_summary:
+                    evidence['wikipedia_snippets'].append(wiki_summary)
+
+                search_results = self._future_result(local_search_f, [])
+                evidence['wikipedia_search_results'].extend(search_results)
+
+                # Plaintext extracts for the top search results (methodology: srlimit=8, batches of 2).
+                # The per-title requests run concurrently now; the order of the extracts is kept.
+                # This prevents truncated/garbled descriptions and gives Layer 2 cleaner text to work with.
+                extract_fs: List[Future] = []
+                content_f = None
+                if search_results:
+                    titles = [r.get("title") for r in search_results if r.get("title")]
+                    titles = [t.strip() for t in titles if isinstance(t, str) and t.strip()]
+                    titles = titles[:8]
+                    extract_fs = [pool.submit(self._get_wikipedia_extract_plaintext, t) for t in titles]
+
+                    # Full content for top result
+                    page_id = search_results[0].get('pageid')
+                    if page_id:
+                        content_f = pool.submit(self._get_wikipedia_full_content, page_id)
+
+                for f in extract_fs:
+                    doc = self._future_result(f, None)
+                    if doc:
+                        evidence["wikipedia_extracts"].append(doc)
+
+                if content_f is not None:
+                    full_content = self._future_result(content_f, None)
+                    if full_content:
+                        evidence['wikipedia_full_content'].append(full_content)
+
+            for summary_f, search_f in entity_fs:
+                entity_summary = self._future_result(summary_f, None)
+                if entity_summary:
+                    evidence['entity_mentions'].append(entity_summary)
+                evidence['entity_mentions'].extend(self._future_result(search_f, []))
+
+            for summary_f, search_f in commodity_fs:
+                commodity_summary = self._future_result(summary_f, None)
+                if commodity_summary:
+                    evidence['related_commodities'].append(commodity_summary)
+                evidence['related_commodities'].extend(self._future_result(search_f, []))
+
+            for f in keyword_fs:
+                keyword_summary = self._future_result(f, None)
+                if keyword_summary:
+                    evidence['context_keywords'].append(keyword_summary)
+
+            if category_f is not None:
+                evidence['wikipedia_category_results'].extend(self._future_result(category_f, []))
+
+            evidence['unesco_data'].extend(self._future_result(unesco_f, []))
+            evidence['seshat_data'].extend(self._future_result(seshat_f, []))
         
         # 8. Combine all raw text evidence
         all_snippets = (
@@ -182,35 +297,34 @@ class KnowledgeCollector:
         
         return evidence
 
-    def _get_wikipedia_extracts_plaintext_batch(self, titles: List[str]) -> List[Dict]:
-        """
-        "Batch" helper that follows the methodology PDF's B=2 processing,
-        but performs *per-title* requests.
+    @staticmethod
+    def _future_result(future: Future, default):
+        """Result of a collection task, or `default` if it raised."""
+        try:
+            result = future.result()
+        except Exception as e:
+            print(f"[Layer 1] Warning: lookup failed: {e}")
+            return default
+        return default if result is None else result
 
-        Note: MediaWiki's `prop=extracts` behavior is inconsistent when requesting
-        multiple titles in one call (some pages may return no `extract` field).
-        Per-title calls are more reliable and still respect the batch-of-2 control flow.
-        """
-        if not titles:
-            return []
-
-        # Normalize and keep order
-        clean_titles: List[str] = []
-        for t in titles:
-            if not isinstance(t, str):
-                continue
-            tt = t.strip()
-            if tt:
-                clean_titles.append(tt)
-        if not clean_titles:
-            return []
-
-        out: List[Dict] = []
-        for t in clean_titles:
-            doc = self._get_wikipedia_extract_plaintext(t)
-            if doc:
-                out.append(doc)
-        return out
+    def _get_period_category_members(self, year) -> List[Dict]:
+        """Category members for the decade, trying the Sri Lanka name then the Ceylon one."""
+        category_results = self._get_category_members(
+            f"Category:{year}s_in_Sri_Lanka",
+            limit=20
+        )
+        if not category_results:
+            # Try alternative category names
+            category_results = self._get_category_members(
+                f"Category:{year}s_in_Ceylon",
+                limit=20
+            )
+        return category_results
+
+    def _host_slot(self, url: str) -> threading.BoundedSemaphore:
+        """Shared semaphore capping concurrent requests to the URL's host."""
+        host = urlparse(url).netloc
+        return get_shared_host_slot(host, self.host_concurrency.get(host, self.default_host_concurrency))
 
     def _get_wikipedia_extract_plaintext(self, title: str) -> Optional[Dict]:
         """
@@ -224,10 +338,6 @@ class KnowledgeCollector:
         Returns:
             Dict with title, extract, pageid, url, source
         """
-        cache_key = f"extract:{title}"
-        if cache_key in self.cache:
-            return self.cache[cache_key]
-
         try:
             params = {
                 'action': 'query',
@@ -262,7 +372,6 @@ class KnowledgeCollector:
                     'url': f"https://en.wikipedia.org/wiki/{quote(page_title.replace(' ', '_'))}",
                     'source': 'wikipedia_extracts_plaintext'
                 }
-                self.cache[cache_key] = result
                 return result
         except Exception as e:
             print(f"Error fetching Wikipedia plaintext extract for '{title}': {e}")
@@ -280,10 +389,6 @@ class KnowledgeCollector:
         Returns:
             Dictionary with title, extract, url, source
         """
-        cache_key = f"summary:{page_title}"
-        if cache_key in self.cache:
-            return self.cache[cache_key]
-        
         try:
             # Normalize page title
             normalized_title = page_title.replace(' ', '_')
@@ -299,7 +404,6 @@ class KnowledgeCollector:
                     'source': 'wikipedia_rest',
                     'pageid': data.get('pageid')
                 }
-                self.cache[cache_key] = result
                 return result
         except Exception as e:
             print(f"Error fetching Wikipedia summary for '{page_title}': {e}")
@@ -322,10 +426,6 @@ class KnowledgeCollector:
         Returns:
             List of search result dictionaries
         """
-        cache_key = f"search:{search_query}:{limit}"
-        if cache_key in self.cache:
-            return self.cache[cache_key]
-        
         results = []
         
         try:
@@ -352,8 +452,6 @@ class KnowledgeCollector:
                         'size': item.get('size', 0),
                         'wordcount': item.get('wordcount', 0)
                     })
-                
-                self.cache[cache_key] = results
         except Exception as e:
             print(f"Error searching Wikipedia for '{search_query}': {e}")
         
@@ -375,10 +473,6 @@ class KnowledgeCollector:
         Returns:
             List of category member dictionaries
         """
-        cache_key = f"category:{category_title}:{limit}"
-        if cache_key in self.cache:
-            return self.cache[cache_key]
-        
         results = []
         
         try:
@@ -403,8 +497,6 @@ class KnowledgeCollector:
                         'source': 'wikipedia_category',
                         'ns': member.get('ns', 0)
                     })
-                
-                self.cache[cache_key] = results
         except Exception as e:
             print(f"Error fetching category members for '{category_title}': {e}")
         
@@ -421,10 +513,6 @@ class KnowledgeCollector:
         Returns:
             Dictionary with full page content
         """
-        cache_key = f"content:{page_id}"
-        if cache_key in self.cache:
-            return self.cache[cache_key]
-        
         try:
             params = {
                 'action': 'query',
@@ -458,7 +546,6 @@ class KnowledgeCollector:
                             'content_length': len(content)
                         }
                         
-                        self.cache[cache_key] = result
                         return result
         except Exception as e:
             print(f"Error fetching full content for page ID {page_id}: {e}")
@@ -480,10 +567,6 @@ class KnowledgeCollector:
         # The actual endpoint structure depends on the specific UNESCO API version
         # For now, we'll implement a basic search pattern
         
-        cache_key = f"unesco:{query}"
-        if cache_key in self.cache:
-            return self.cache[cache_key]
-        
         results = []
         
         try:
@@ -493,8 +576,7 @@ class KnowledgeCollector:
             
             # For now, return empty results but structure is ready
             # TODO: Implement actual UNESCO API calls when API documentation is available
-            
-            self.cache[cache_key] = results
+            pass
         except Exception as e:
             print(f"Error searching UNESCO for '{query}': {e}")
         
@@ -511,10 +593,6 @@ class KnowledgeCollector:
         Returns:
             List of Seshat DB results
         """
-        cache_key = f"seshat:{query}"
-        if cache_key in self.cache:
-            return self.cache[cache_key]
-        
         results = []
         
         try:
@@ -539,8 +617,6 @@ class KnowledgeCollector:
                         'source': 'seshat_db',
                         'query': query
                     })
-                
-                self.cache[cache_key] = results
         except Exception as e:
             print(f"Error searching Seshat DB for '{query}': {e}")
         
@@ -606,6 +682,7 @@ class KnowledgeCollector:
     ) -> Optional[requests.Response]:
         """
         Make HTTP request with rate limiting and error handling.
+        GET responses go through the on-disk cache; cache hits skip the rate-limit sleep.
         
         Args:
             url: Request URL
@@ -613,27 +690,47 @@ class KnowledgeCollector:
             method: HTTP method
         
         Returns:
-            Response object or None if error
+            Response object (or cached replay) or None if error
         """
-        # Rate limiting
-        time.sleep(self.rate_limit)
-        self.request_count += 1
-        
-        # Reset counter every minute (approximate)
-        if self.request_count > self.max_requests_per_minute:
-            time.sleep(1)
-            self.request_count = 0
-        
+        started = time.perf_counter()
+        source = HttpResponseCache.classify(url, params)
+        if method.upper() == 'GET' and self.http_cache is not None:
+            cached = self.http_cache.get(url, params, offline=self.offline)
+            if cached is not None:
+                record_http(source, time.perf_counter() - started, cached=True)
+                return cached
+
+        if self.offline:
+            # Strict replay: a miss is treated like a failed request
+            return None
+
+        if method.upper() != 'GET':
+            return None
+
+        # Per-host concurrency cap, then the global rate limit
+        with self._host_slot(url):
+            self.rate_limiter.acquire()
+            with self._state_lock:
+                self.request_count += 1
+            response = self._send_get(url, params)
+        # Latency includes waiting for the host slot and rate limit
+        record_http(source, time.perf_counter() - started)
+        return response
+
+    def _send_get(self, url: str, params: Optional[Dict]) -> Optional[requests.Response]:
+        """Issue the GET and record it in the response cache."""
         try:
-            if method.upper() == 'GET':
-                response = self.session.get(
-                    url,
-                    params=params,
-                    timeout=self.timeout
-                )
-                return response
-            else:
-                return None
+            response = self.session.get(
+                url,
+                params=params,
+                timeout=self.timeout
+            )
+            if self.http_cache is not None:
+                try:
+                    self.http_cache.put(url, params, response)
+                except Exception as e:
+                    print(f"[Layer 1] Warning: could not store response in cache: {e}")
+            return response
         except requests.exceptions.Timeout:
             print(f"Request timeout for {url}")
             return None
@@ -641,13 +738,18 @@ class KnowledgeCollector:
             print(f"Request error for {url}: {e}")
             return None
     
-    def clear_cache(self):
-        """Clear the cache."""
-        self.cache = {}
+    def clear_cache(self, persistent: bool = False):
+        """
+        Clear the on-disk response cache if persistent=True. Responses are not memoized in
+        memory, so repeat lookups always go through http_cache and its per-source TTLs.
+        """
+        if persistent and self.http_cache is not None:
+            self.http_cache.clear()
     
     def get_cache_stats(self) -> Dict:
         """Get cache statistics."""
         return {
-            'cache_size': len(self.cache),
-            'request_count': self.request_count
+            'request_count': self.request_count,
+            'offline': self.offline,
+            'http_cache': self.http_cache.stats() if self.http_cache is not None else None
         }
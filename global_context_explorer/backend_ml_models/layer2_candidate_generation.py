@@ -3,29 +3,318 @@ Layer 2: Candidate Generation
 Generates candidate global events using BM25 + semantic retrieval.
 """
 
+import atexit
+import hashlib
+import json
+import math
+import os
 import re
+import threading
+import time
+from functools import lru_cache
+from pathlib import Path
 from typing import Dict, List, Tuple, Optional
 from collections import Counter
 import numpy as np
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
 
-from date_utils import year_for_ordering
+from date_utils import parse_year_ranges, year_for_ordering
+
+
+# --- Methodology-inspired scoring helpers (anchors + global cues) ---
+GLOBAL_CUES = {
+    # 1) Colonial & imperial control
+    "colonial": ["british", "colonial", "empire", "imperial", "ceylon", "crown", "governor"],
+    # 2) Trade, markets, and global commerce
+    "trade": ["export", "market", "trade", "shipping", "route", "harbour", "commerce", "foreign exchange", "commodity"],
+    # 3) Shocks: wars, collapses, crises
+    "shock": ["war", "collapse", "crisis", "devastation", "rebellion", "annexation", "conflict", "bombing", "raid"],
+    # 4) Policy, treaties, governance transitions
+    "policy": ["treaty", "convention", "agreement", "ordinance", "parliament", "proclamation", "signed", "annex", "ceding", "administration", "commission", "constitution"],
+    # 5) Technology & infrastructure transfer
+    "tech": ["railway", "canal", "steam", "infrastructure", "industrial", "irrigation", "reservoir", "dam", "tank", "weir", "sluice", "water management", "hydraulic", "drainage", "airport", "airfield"],
+    # 6) Religious & cultural diffusion
+    "religion_culture": ["buddhism", "missionary", "monk", "sangha", "mahayana", "theravada", "ashoka", "religious", "cultural exchange", "pilgrimage", "doctrine"],
+    # 7) Transnational labor & migration systems
+    "migration_labor": ["migration", "migrant", "labour", "labor", "indentured", "coolie", "recruitment", "imported", "recruited", "estate", "plantation", "workers", "south india", "tamil", "wages", "contract", "demographic"],
+}
+
+
+class GlobalCueMatcher:
+    """
+    Counts GLOBAL_CUES occurrences in lower-cased text (substring counts, summed over
+    every cue term, same as the nested loops it replaces).
+
+    Built once at import. A single regex alternation was tried and was slower than
+    C-level `str.count` per term, and it counts overlapping terms ("annex"/"annexation")
+    differently, so the matcher keeps one flat tuple of terms.
+    """
+
+    def __init__(self, cues: Dict[str, List[str]]):
+        self.terms = tuple(kw for kws in cues.values() for kw in kws if kw)
+
+    def count(self, text_lower: str) -> int:
+        return sum(map(text_lower.count, self.terms))
+
+
+GLOBAL_CUE_MATCHER = GlobalCueMatcher(GLOBAL_CUES)
+
+# Same tokenization as TfidfVectorizer(stop_words='english') (lowercase, \b\w\w+\b, stop words)
+_analyze = TfidfVectorizer(stop_words='english').build_analyzer()
+
+_TAG_RE = re.compile(r"<[^>]+>")
+_WS_RE = re.compile(r"\s+")
+_BCE_RE = re.compile(r"\b(\d{1,4})\s*(bce)\b")
+_YEAR_RE = re.compile(r"\b(\d{4})\b")
+_WORD_RE = re.compile(r"[a-z]{3,}")
+_PARA_RE = re.compile(r"\n\s*\n")
+
+_KEYWORD_STOP = {
+    "the", "and", "for", "with", "from", "that", "this", "into", "over", "under",
+    "was", "were", "are", "has", "had", "have", "also", "not", "but", "their",
+    "his", "her", "its", "they", "them", "who", "when", "where", "which",
+    "may", "can", "would", "could", "should", "during", "after", "before",
+    "between", "including", "such", "other", "most", "many", "some",
+}
+
+# Wikipedia pages repeat across requests (same exhibit, related exhibits), so the
+# per-page text work below is memoized on the page text itself.
+_PAGE_CACHE_SIZE = 512
+
+
+@lru_cache(maxsize=_PAGE_CACHE_SIZE * 4)
+def _clean_text_cached(s: str) -> str:
+    s = _TAG_RE.sub(" ", s)  # strip HTML tags (snippets)
+    # strip common wiki-markup remnants / template noise
+    s = s.replace("{{", " ").replace("}}", " ").replace("|", " ").replace("=", " ")
+    return _WS_RE.sub(" ", s).strip()
+
+
+def _split_paragraphs(text: str) -> List[str]:
+    t = str(text or "").strip()
+    if not t:
+        return []
+    # Normalize newlines; MediaWiki extracts are usually paragraph-ish already.
+    t = t.replace("\r\n", "\n").replace("\r", "\n")
+    parts = [p.strip() for p in _PARA_RE.split(t) if p.strip()]
+    if len(parts) <= 1:
+        # Fallback split on single newlines
+        parts = [p.strip() for p in t.split("\n") if p.strip()]
+    # Drop very short fragments
+    return [p for p in parts if len(p) >= 80]
+
+
+@lru_cache(maxsize=_PAGE_CACHE_SIZE)
+def _paragraph_profile(text: str) -> Tuple[Tuple[str, str, int], ...]:
+    """(paragraph, lower-cased paragraph, global cue hits) for the first 30 paragraphs."""
+    out = []
+    for p in _split_paragraphs(text)[:30]:
+        pl = p.lower()
+        out.append((p, pl, GLOBAL_CUE_MATCHER.count(pl)))
+    return tuple(out)
+
+
+@lru_cache(maxsize=_PAGE_CACHE_SIZE)
+def _text_year_facts(text: str) -> Tuple[bool, Optional[int], Tuple[int, ...]]:
+    """(has text, first BCE year, plausible 4-digit years) used by the date heuristic."""
+    t = _clean_text_cached(str(text or "")).lower()
+    if not t:
+        return False, None, ()
+    m = _BCE_RE.search(t)
+    bce = int(m.group(1)) if m else None
+    years = tuple(y for y in (int(m.group(1)) for m in _YEAR_RE.finditer(t)) if 1000 <= y <= 2100)
+    return True, bce, years
+
+
+@lru_cache(maxsize=_PAGE_CACHE_SIZE)
+def _keywords_cached(text: str) -> Tuple[str, ...]:
+    t = _clean_text_cached(text).lower()
+    tokens = [w for w in _WORD_RE.findall(t) if w not in _KEYWORD_STOP]
+    return tuple(w for (w, _) in Counter(tokens).most_common(12))
+
+
+@lru_cache(maxsize=_PAGE_CACHE_SIZE * 4)
+def _term_counts(text: str) -> Counter:
+    """TF-IDF term counts for a text (shared; callers must not mutate the result)."""
+    return Counter(_analyze(text))
+
+
+class IncrementalTfidf:
+    """
+    TF-IDF over the accumulated corpus of Wikipedia-derived events seen so far.
+
+    Document frequencies are updated as new pages show up and persisted to a small
+    JSON file, so a request only needs term counts (memoized per text) and sparse dot
+    products instead of fitting a fresh TfidfVectorizer. Weights follow sklearn's
+    defaults: raw tf, smooth idf = ln((1 + n) / (1 + df)) + 1, l2-normalized rows.
+
+    The corpus is bounded: once it holds more than max_docs documents, the document count
+    and every frequency are halved (terms left below 1 are dropped) and the older half of
+    the seen-document keys is forgotten, so old pages fade out instead of the file growing
+    forever. Keys are stored as short SHA-1 digests rather than the raw ids.
+    """
+
+    VERSION = 2
+
+    def __init__(self, path: Optional[str] = None, save_interval: float = 30.0,
+                 max_docs: Optional[int] = None):
+        """
+        Args:
+            path: JSON file for the document-frequency table (None = in-memory only)
+            save_interval: Minimum seconds between writes (a final write happens at exit)
+            max_docs: Documents kept before decaying (default: $CANDIDATE_IDF_MAX_DOCS or
+                      20000; 0 = unbounded)
+        """
+        self.path = Path(path) if path else None
+        self.save_interval = save_interval
+        if max_docs is None:
+            try:
+                max_docs = int(os.getenv("CANDIDATE_IDF_MAX_DOCS", 20000))
+            except ValueError:
+                max_docs = 20000
+        self.max_docs = max(0, int(max_docs))
+        # Frozen corpora ignore add_documents (batch workers score against the parent's snapshot)
+        self.frozen = False
+        self.n_docs = 0
+        self.df: Counter = Counter()
+        # Hashed doc key -> None, oldest first (a dict keeps insertion order)
+        self.doc_keys: Dict[str, None] = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._last_save = 0.0
+        self._load()
+        if self.path is not None:
+            atexit.register(self.save)
+
+    def _load(self) -> None:
+        if self.path is None or not self.path.exists():
+            return
+        try:
+            payload = json.loads(self.path.read_text(encoding="utf-8"))
+            self.n_docs = int(payload.get("n_docs", 0))
+            self.df = Counter(payload.get("df", {}))
+            keys = payload.get("doc_keys", [])
+            if payload.get("version") != self.VERSION:
+                # Files written before keys were hashed hold the raw node ids
+                keys = [self._hash_key(key) for key in keys]
+                self._dirty = True
+            self.doc_keys = dict.fromkeys(keys)
+            if self.max_docs and self.n_docs > self.max_docs:
+                self._decay_locked()
+        except Exception as e:
+            print(f"[Layer 2] Warning: ignoring unreadable TF-IDF corpus {self.path}: {e}")
+            self.n_docs, self.df, self.doc_keys = 0, Counter(), {}
+
+    @staticmethod
+    def _hash_key(key: str) -> str:
+        return hashlib.sha1(str(key).encode("utf-8")).hexdigest()[:16]
+
+    def _decay_locked(self) -> None:
+        """Halve the corpus (see class docstring); caller holds the lock."""
+        while self.max_docs and self.n_docs > self.max_docs:
+            self.n_docs //= 2
+            self.df = Counter({term: df // 2 for term, df in self.df.items() if df >= 2})
+            keys = list(self.doc_keys)
+            self.doc_keys = dict.fromkeys(keys[len(keys) // 2:])
+        self._dirty = True
+
+    def save(self, force: bool = True) -> None:
+        """Write the table if it changed (atomic replace)."""
+        if self.path is None:
+            return
+        with self._lock:
+            if not self._dirty or (not force and time.time() - self._last_save < self.save_interval):
+                return
+            payload = {
+                "version": self.VERSION,
+                "n_docs": self.n_docs,
+                "df": dict(self.df),
+                "doc_keys": list(self.doc_keys),
+            }
+            self._dirty = False
+            self._last_save = time.time()
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+            tmp.write_text(json.dumps(payload, separators=(",", ":")), encoding="utf-8")
+            os.replace(tmp, self.path)
+        except Exception as e:
+            print(f"[Layer 2] Warning: could not save TF-IDF corpus: {e}")
+
+    def snapshot(self) -> Dict:
+        """Document count and frequencies (what scoring needs) for another process."""
+        with self._lock:
+            return {"n_docs": self.n_docs, "df": dict(self.df)}
+
+    def freeze(self, snapshot: Optional[Dict] = None) -> None:
+        """Stop adding documents and writing the file, optionally scoring against `snapshot`."""
+        with self._lock:
+            if snapshot is not None:
+                self.n_docs = int(snapshot.get("n_docs", 0))
+                self.df = Counter(snapshot.get("df", {}))
+            self.path = None
+            self.frozen = True
+
+    def add_documents(self, docs: List[Tuple[str, Counter]]) -> None:
+        """Count each (doc_key, term_counts) once; already-seen keys are skipped."""
+        if self.frozen:
+            return
+        with self._lock:
+            for key, counts in docs:
+                key = self._hash_key(key)
+                if key in self.doc_keys:
+                    continue
+                self.doc_keys[key] = None
+                self.n_docs += 1
+                self.df.update(counts.keys())
+                self._dirty = True
+            if self.max_docs and self.n_docs > self.max_docs:
+                self._decay_locked()
+        self.save(force=False)
+
+    def _vector(self, counts: Counter) -> Dict[str, float]:
+        n = self.n_docs
+        vec = {}
+        for term, tf in counts.items():
+            df = self.df.get(term, 0)
+            if df:
+                vec[term] = tf * (math.log((1 + n) / (1 + df)) + 1.0)
+        norm = math.sqrt(sum(v * v for v in vec.values()))
+        if norm > 0:
+            for term in vec:
+                vec[term] /= norm
+        return vec
+
+    def similarities(self, query_counts: Counter, doc_counts: List[Counter]) -> np.ndarray:
+        """Cosine similarity between the query and each document."""
+        with self._lock:
+            query_vec = self._vector(query_counts)
+            doc_vecs = [self._vector(c) for c in doc_counts]
+        sims = np.zeros(len(doc_vecs))
+        for i, doc_vec in enumerate(doc_vecs):
+            sims[i] = sum(w * query_vec.get(term, 0.0) for term, w in doc_vec.items())
+        return sims
 
 
 class CandidateGenerator:
     """Generates candidate global events from knowledge base."""
     
-    def __init__(self, global_events_db: List[Dict] = None):
+    def __init__(self, global_events_db: List[Dict] = None, idf_path: Optional[str] = None):
         """
         Initialize candidate generator.
         
         Args:
             global_events_db: Database of known global events (can be loaded from CSV)
+            idf_path: Where the accumulated TF-IDF corpus is kept
+                      (default: $CANDIDATE_IDF_PATH or cache/tfidf_corpus.json; "off" = memory only)
         """
         self.global_events_db = global_events_db or self._load_default_global_events()
         self.vectorizer = TfidfVectorizer(max_features=1000, stop_words='english')
         self._build_index()
+
+        if idf_path is None:
+            idf_path = os.getenv("CANDIDATE_IDF_PATH") or str(Path("cache") / "tfidf_corpus.json")
+        self.idf_model = IncrementalTfidf(None if idf_path.strip().lower() == "off" else idf_path)
     
     def _build_wikipedia_global_events(
         self,
@@ -55,37 +344,6 @@ class CandidateGenerator:
                 if isinstance(name, str) and name.strip():
                     local_names_set.add(name.strip().lower())
 
-        # --- Methodology-inspired scoring helpers (anchors + global cues) ---
-        GLOBAL_CUES = {
-            # 1) Colonial & imperial control
-            "colonial": ["british", "colonial", "empire", "imperial", "ceylon", "crown", "governor"],
-            # 2) Trade, markets, and global commerce
-            "trade": ["export", "market", "trade", "shipping", "route", "harbour", "commerce", "foreign exchange", "commodity"],
-            # 3) Shocks: wars, collapses, crises
-            "shock": ["war", "collapse", "crisis", "devastation", "rebellion", "annexation", "conflict", "bombing", "raid"],
-            # 4) Policy, treaties, governance transitions
-            "policy": ["treaty", "convention", "agreement", "ordinance", "parliament", "proclamation", "signed", "annex", "ceding", "administration", "commission", "constitution"],
-            # 5) Technology & infrastructure transfer
-            "tech": ["railway", "canal", "steam", "infrastructure", "industrial", "irrigation", "reservoir", "dam", "tank", "weir", "sluice", "water management", "hydraulic", "drainage", "airport", "airfield"],
-            # 6) Religious & cultural diffusion
-            "religion_culture": ["buddhism", "missionary", "monk", "sangha", "mahayana", "theravada", "ashoka", "religious", "cultural exchange", "pilgrimage", "doctrine"],
-            # 7) Transnational labor & migration systems
-            "migration_labor": ["migration", "migrant", "labour", "labor", "indentured", "coolie", "recruitment", "imported", "recruited", "estate", "plantation", "workers", "south india", "tamil", "wages", "contract", "demographic"],
-        }
-
-        def _split_paragraphs(text: str) -> List[str]:
-            t = str(text or "").strip()
-            if not t:
-                return []
-            # Normalize newlines; MediaWiki extracts are usually paragraph-ish already.
-            t = t.replace("\r\n", "\n").replace("\r", "\n")
-            parts = [p.strip() for p in re.split(r"\n\s*\n", t) if p.strip()]
-            if len(parts) <= 1:
-                # Fallback split on single newlines
-                parts = [p.strip() for p in t.split("\n") if p.strip()]
-            # Drop very short fragments
-            return [p for p in parts if len(p) >= 80]
-
         def _anchors_from_query(q: Optional[Dict]) -> List[str]:
             if not q:
                 return []
@@ -116,8 +374,7 @@ class CandidateGenerator:
         anchors_set = set(anchors)
         religion_query = any(a in anchors_set for a in ["buddhism", "mahinda", "theravada", "ashoka", "sangha", "monk"])
 
-        def _score_paragraph(p: str) -> Dict[str, int]:
-            pl = p.lower()
+        def _score_paragraph(pl: str, global_hits: int) -> Dict[str, int]:
             node_hits = 0
             unique_anchor_hits = 0
             for a in anchors:
@@ -127,12 +384,6 @@ class CandidateGenerator:
                 node_hits += c
                 if c > 0:
                     unique_anchor_hits += 1
-            global_hits = 0
-            for _, kws in GLOBAL_CUES.items():
-                for kw in kws:
-                    if not kw:
-                        continue
-                    global_hits += pl.count(kw)
             return {
                 "node_hits": node_hits,
                 "global_hits": global_hits,
@@ -140,14 +391,15 @@ class CandidateGenerator:
             }
 
         def _best_paragraph(text: str) -> Tuple[str, Dict[str, int]]:
-            ps = _split_paragraphs(text)
+            # Paragraph split, lower-casing and global cue hits are memoized per page text
+            ps = _paragraph_profile(text)
             if not ps:
                 return "", {"node_hits": 0, "global_hits": 0}
             best = None
             best_score = (-1, -1, -1)
             best_meta = {"node_hits": 0, "global_hits": 0}
-            for p in ps[:30]:
-                m = _score_paragraph(p)
+            for p, pl, global_hits in ps:
+                m = _score_paragraph(pl, global_hits)
                 # Rank primarily by local-node relevance, then global cues.
                 # This avoids picking unrelated "high global cue" paragraphs (e.g., modern wars)
                 # when the local event is specific (e.g., Mahinda mission / Buddhism transfer).
@@ -156,7 +408,7 @@ class CandidateGenerator:
                     best_score = score
                     best = p
                     best_meta = m
-            return (best or ps[0]), best_meta
+            return (best or ps[0][0]), best_meta
 
         # Prefer the sources you print in the console after Layer 1.
         # Prefer plaintext extracts first (clean text), then search/snippets.
@@ -316,11 +568,7 @@ class CandidateGenerator:
                     continue
 
                 # If the whole description has almost no global cues, also drop.
-                total_hits = 0
-                tl = cleaned_text.lower()
-                for _, kws in GLOBAL_CUES.items():
-                    for kw in kws:
-                        total_hits += tl.count(kw)
+                total_hits = GLOBAL_CUE_MATCHER.count(cleaned_text.lower())
                 if total_hits < 2 and len(cleaned_text) < 500:
                     continue
 
@@ -360,12 +608,7 @@ class CandidateGenerator:
         return f"WIKI_{slug[:60]}"
 
     def _clean_text(self, s: str) -> str:
-        s = str(s or "")
-        s = re.sub(r"<[^>]+>", " ", s)  # strip HTML tags (snippets)
-        # strip common wiki-markup remnants / template noise
-        s = s.replace("{{", " ").replace("}}", " ").replace("|", " ").replace("=", " ")
-        s = re.sub(r"\s+", " ", s).strip()
-        return s
+        return _clean_text_cached(str(s or ""))
 
     def _guess_date_from_text(self, text: str, query_year: Optional[int] = None) -> str:
         """
@@ -373,26 +616,17 @@ class CandidateGenerator:
         - If it finds "247 BCE" -> returns "247 BCE"
         - If it finds 4-digit year -> returns "YYYY-01-01"
         """
-        t = self._clean_text(text).lower()
-        if not t:
+        has_text, bce_year, plausible_years = _text_year_facts(str(text or ""))
+        if not has_text:
             return ""
 
-        m = re.search(r"\b(\d{1,4})\s*(bce)\b", t)
-        if m:
-            return f"{int(m.group(1))} BCE"
+        if bce_year is not None:
+            return f"{bce_year} BCE"
 
         # Prefer a plausible 4-digit year in text.
         # If we know the local event year, prefer years near/before it (prevents spurious years like 1011).
-        years = []
-        for m in re.finditer(r"\b(\d{4})\b", t):
-            try:
-                years.append(int(m.group(1)))
-            except Exception:
-                continue
+        years = list(plausible_years)
         if years:
-            years = [y for y in years if 1000 <= y <= 2100]
-            if not years:
-                return ""
 
             if query_year is not None:
                 try:
@@ -418,18 +652,7 @@ class CandidateGenerator:
         Lightweight keyword extractor for Wikipedia-derived candidates.
         Keeps this dependency-free and fast.
         """
-        t = self._clean_text(text).lower()
-        tokens = re.findall(r"[a-z]{3,}", t)
-        stop = {
-            "the", "and", "for", "with", "from", "that", "this", "into", "over", "under",
-            "was", "were", "are", "has", "had", "have", "also", "not", "but", "their",
-            "his", "her", "its", "they", "them", "who", "when", "where", "which",
-            "may", "can", "would", "could", "should", "during", "after", "before",
-            "between", "including", "such", "other", "most", "many", "some",
-        }
-        tokens = [w for w in tokens if w not in stop]
-        counts = Counter(tokens)
-        return [w for (w, _) in counts.most_common(12)]
+        return list(_keywords_cached(str(text or "")))
 
     def _load_default_global_events(self) -> List[Dict]:
         """Load default global events database."""
@@ -488,6 +711,67 @@ class CandidateGenerator:
         else:
             self.tfidf_matrix = None
     
+    def _default_db_similarities(self, query_counts: Counter) -> np.ndarray:
+        """Cosine similarity of query term counts against the fitted default-DB index."""
+        vocabulary = self.vectorizer.vocabulary_
+        idf = self.vectorizer.idf_
+        query_vector = np.zeros(len(idf))
+        for term, tf in query_counts.items():
+            col = vocabulary.get(term)
+            if col is not None:
+                query_vector[col] = tf * idf[col]
+        norm = np.linalg.norm(query_vector)
+        if norm > 0:
+            query_vector /= norm
+        return np.asarray(self.tfidf_matrix @ query_vector).ravel()
+
+    def _wikipedia_documents(
+        self,
+        query: Dict,
+        evidence: Dict,
+        top_k: int,
+        local_event_names: Optional[List[str]],
+    ) -> Tuple[List[Dict], List[Counter]]:
+        """Wikipedia-derived global events for a request and their term counts."""
+        query_year = None
+        try:
+            query_year = int(query.get("date_range", {}).get("year")) if query.get("date_range") else None
+        except Exception:
+            query_year = None
+
+        wiki_events = self._build_wikipedia_global_events(
+            evidence,
+            query=query,
+            max_pages=max(20, min(60, top_k)),
+            query_year=query_year,
+            local_event_names=local_event_names,
+        )
+        event_texts = [
+            f"{ev.get('event_name','')} {ev.get('description','')} {' '.join(ev.get('keywords', []) or [])}"
+            for ev in wiki_events
+        ]
+        return wiki_events, [_term_counts(t) for t in event_texts]
+
+    def index_documents(
+        self,
+        query: Dict,
+        evidence: Dict,
+        top_k: int = 50,
+        local_event_names: Optional[List[str]] = None,
+    ) -> int:
+        """
+        Add the documents generate_candidates() would add for this request to the TF-IDF
+        corpus without scoring anything (process_batch indexes a whole batch up front).
+
+        Returns:
+            Number of documents offered to the corpus
+        """
+        wiki_events, event_counts = self._wikipedia_documents(query, evidence, top_k, local_event_names)
+        self.idf_model.add_documents(
+            [(str(ev.get('node_id', '')), c) for ev, c in zip(wiki_events, event_counts)]
+        )
+        return len(wiki_events)
+
     def generate_candidates(
         self,
         query: Dict,
@@ -511,63 +795,49 @@ class CandidateGenerator:
 
         # NEW: Build global-event candidates from Wikipedia pages found in Layer 1.
         # If Wikipedia yields nothing (offline/no results), fall back to the small default DB.
-        query_year = None
-        try:
-            query_year = int(query.get("date_range", {}).get("year")) if query.get("date_range") else None
-        except Exception:
-            query_year = None
-
-        wiki_events = self._build_wikipedia_global_events(
-            evidence,
-            query=query,
-            max_pages=max(20, min(60, top_k)),
-            query_year=query_year,
-            local_event_names=local_event_names,
-        )
+        wiki_events, wiki_counts = self._wikipedia_documents(query, evidence, top_k, local_event_names)
         using_default_db = not bool(wiki_events)
         active_db = self.global_events_db if using_default_db else wiki_events
         
         # Combine query text and evidence
         search_text = f"{query['local_event_text']} {' '.join(query.get('keywords', []))}"
         
-        # Extract text from evidence
-        evidence_texts = []
+        # Query term counts = query text + every evidence extract. Counts are additive over
+        # the space-joined text, so each extract is tokenized once (memoized) instead of
+        # re-tokenizing one giant concatenated string per request.
+        query_counts = Counter(_term_counts(search_text))
+        # Candidates reference the top evidence snippets by index into raw_text_evidence
+        # instead of each carrying its own copy of them.
+        top_snippet_ids = list(range(min(3, len(evidence.get('raw_text_evidence', [])))))
         for snippet in evidence.get('raw_text_evidence', []):
-            evidence_texts.append(snippet.get('extract', ''))
-        
-        combined_text = search_text + ' ' + ' '.join(evidence_texts)
+            extract = snippet.get('extract', '')
+            if extract:
+                query_counts.update(_term_counts(extract))
         
         # TF-IDF similarity over the active DB
         if active_db:
-            if using_default_db and self.tfidf_matrix is not None and len(self.event_texts) > 0:
-                vectorizer = self.vectorizer
-                tfidf_matrix = self.tfidf_matrix
-                event_texts = self.event_texts
+            if using_default_db:
+                if self.tfidf_matrix is None or not self.event_texts:
+                    return []
+                similarities = self._default_db_similarities(query_counts)
             else:
-                vectorizer = TfidfVectorizer(max_features=1000, stop_words='english')
-                event_texts = [
-                    f"{ev.get('event_name','')} {ev.get('description','')} {' '.join(ev.get('keywords', []) or [])}"
-                    for ev in active_db
-                ]
-                tfidf_matrix = vectorizer.fit_transform(event_texts) if event_texts else None
-
-            if tfidf_matrix is None or not event_texts:
-                return []
-
-            query_vector = vectorizer.transform([combined_text])
-            similarities = cosine_similarity(query_vector, tfidf_matrix)[0]
+                # Wikipedia-derived events: score against the accumulated corpus IDF
+                self.idf_model.add_documents(
+                    [(str(ev.get('node_id', '')), c) for ev, c in zip(active_db, wiki_counts)]
+                )
+                similarities = self.idf_model.similarities(query_counts, wiki_counts)
             
             # Get top candidates
             top_indices = np.argsort(similarities)[::-1][:top_k]
+            temporal_scores = self._temporal_relevance_scores(query, [active_db[i] for i in top_indices])
             
-            for idx in top_indices:
+            for idx, temporal_relevance in zip(top_indices, temporal_scores):
                 event = active_db[idx]
                 similarity_score = similarities[idx]
                 
                 # Calculate additional relevance features
                 keyword_match = self._calculate_keyword_match(query, event)
                 entity_match = self._calculate_entity_match(query, event)
-                temporal_relevance = self._calculate_temporal_relevance(query, event)
                 
                 # Combined relevance score with better weighting
                 # Boost scores for better matching
@@ -625,7 +895,7 @@ class CandidateGenerator:
                     'metadata': {
                         'date': event.get('date', ''),
                         'location': event.get('location', ''),
-                        'snippets': evidence.get('raw_text_evidence', [])[:3]  # Top 3 snippets
+                        'snippet_ids': top_snippet_ids  # Top 3 snippets (evidence['raw_text_evidence'] indexes)
                     }
                 })
         
@@ -657,33 +927,23 @@ class CandidateGenerator:
         matches = sum(1 for entity in query_entities if entity in event_text)
         return min(1.0, matches / max(1, len(query_entities)))
     
-    def _calculate_temporal_relevance(self, query: Dict, event: Dict) -> float:
-        """Calculate temporal relevance (events before local event are more relevant)."""
-        if not query.get('date_range') or not event.get('date'):
-            return 0.5  # Neutral if dates unknown
-        
-        try:
-            query_year = query['date_range'].get('year')
-            event_year = year_for_ordering(str(event.get('date', '') or ''))
-            
-            if query_year and event_year:
-                # Prefer events that happened before or during the local event
-                if event_year <= query_year:
-                    # Closer in time = more relevant
-                    gap = query_year - event_year
-                    if gap <= 10:
-                        return 1.0
-                    elif gap <= 50:
-                        return 0.8
-                    elif gap <= 100:
-                        return 0.6
-                    else:
-                        return 0.4
-                else:
-                    # Future events are less relevant
-                    return 0.2
-        except:
-            return 0.5
-        
-        return 0.5
-
+    def _temporal_relevance_scores(self, query: Dict, events: List[Dict]) -> np.ndarray:
+        """
+        Temporal relevance of each event (events before the local event are more relevant),
+        for many events at once: dates are bulk-parsed and the gap bands are array math.
+        """
+        scores = np.full(len(events), 0.5)  # Neutral if dates unknown
+        query_year = (query.get('date_range') or {}).get('year') if query.get('date_range') else None
+        if not events or not query_year or not isinstance(query_year, (int, float, np.number)):
+            return scores
+
+        dates = [event.get('date') for event in events]
+        event_years = parse_year_ranges([str(d or '') for d in dates])[0]
+        known = np.array([bool(d) for d in dates]) & ~np.isnan(event_years) & (event_years != 0)
+        before = known & (event_years <= query_year)
+        gap = query_year - event_years
+        # Prefer events that happened before or during the local event; closer = more relevant
+        scores[before] = np.select([gap <= 10, gap <= 50, gap <= 100], [1.0, 0.8, 0.6], 0.4)[before]
+        # Future events are less relevant
+        scores[known & ~before] = 0.2
+        return scores
@@ -5,7 +5,83 @@ Converts candidates into graph structure with nodes and edges.
 
 from typing import Dict, List, Optional
 import pandas as pd
-from data_loader import HistoricalDataLoader
+from graph_store import GraphStore
+
+
+class GraphIndex:
+    """
+    Hash lookups over a Layer 3 subgraph.
+
+    Layers 4-6 used to find nodes and edges with `next(... for e in graph['edges'])`
+    scans per prediction, per path and per hop. The index is built once per subgraph
+    and keeps the first match for every key, same as those scans did.
+    """
+
+    def __init__(self, nodes: List[Dict], edges: List[Dict]):
+        self.nodes_by_id: Dict[str, Dict] = {}
+        self.edges_by_pair: Dict[tuple, Dict] = {}
+        self.out_edges: Dict[str, List[Dict]] = {}
+        self.in_edges: Dict[str, List[Dict]] = {}
+        # (target, max_depth) -> hop distances, shared by every path search on this subgraph
+        self._distances: Dict[tuple, Dict[str, int]] = {}
+
+        for node in nodes:
+            self.nodes_by_id.setdefault(node.get('id'), node)
+
+        for edge in edges:
+            source = edge.get('source', edge.get('source_node_id'))
+            target = edge.get('target', edge.get('target_node_id'))
+            self.edges_by_pair.setdefault((source, target), edge)
+            self.out_edges.setdefault(source, []).append(edge)
+            self.in_edges.setdefault(target, []).append(edge)
+
+    def node(self, node_id: str) -> Optional[Dict]:
+        """Node dict for an id, or None."""
+        return self.nodes_by_id.get(node_id)
+
+    def edge(self, source_id: str, target_id: str) -> Optional[Dict]:
+        """First edge from source_id to target_id, or None."""
+        return self.edges_by_pair.get((source_id, target_id))
+
+    def successors(self, node_id: str) -> List[str]:
+        """Targets of outgoing edges, in edge order."""
+        return [e.get('target', e.get('target_node_id')) for e in self.out_edges.get(node_id, [])]
+
+    def edges_into(self, node_id: str) -> List[Dict]:
+        """Incoming edges, in edge order."""
+        return self.in_edges.get(node_id, [])
+
+    def distances_to(self, node_id: str, max_depth: int) -> Dict[str, int]:
+        """Hop distance to node_id from every node that reaches it in <= max_depth edges (cached)."""
+        key = (node_id, max_depth)
+        dist = self._distances.get(key)
+        if dist is not None:
+            return dist
+
+        dist = {node_id: 0}
+        frontier = [node_id]
+        for depth in range(1, max_depth + 1):
+            next_frontier = []
+            for current in frontier:
+                for edge in self.in_edges.get(current, []):
+                    source = edge.get('source', edge.get('source_node_id'))
+                    if source not in dist:
+                        dist[source] = depth
+                        next_frontier.append(source)
+            if not next_frontier:
+                break
+            frontier = next_frontier
+        self._distances[key] = dist
+        return dist
+
+
+def get_graph_index(graph: Dict) -> GraphIndex:
+    """Return the subgraph's GraphIndex, building it if the graph was assembled elsewhere."""
+    index = graph.get('index')
+    if not isinstance(index, GraphIndex):
+        index = GraphIndex(graph.get('nodes', []), graph.get('edges', []))
+        graph['index'] = index
+    return index
 
 
 class GraphConstructor:
@@ -19,17 +95,17 @@ class GraphConstructor:
             nodes_file: Path to nodes CSV
             edges_file: Path to edges CSV
         """
-        self.data_loader = HistoricalDataLoader(nodes_file, edges_file)
-        self.graph_data = None
-        self._load_base_graph()
-    
-    def _load_base_graph(self):
-        """Load base graph from CSV files."""
-        try:
-            self.graph_data = self.data_loader.build_graph()
-        except:
-            # If files don't exist, create empty structure
-            self.graph_data = None
+        # Same store (and graph version) as Layer 4 and the pipeline for these files
+        self.graph_store = GraphStore.acquire(nodes_file, edges_file)
+
+    @property
+    def graph_data(self):
+        """Current base graph of the shared store (None if the CSVs could not be loaded)."""
+        return self.graph_store.data
+
+    def close(self) -> None:
+        """Release the shared graph store."""
+        self.graph_store.release()
     
     def construct_subgraph(
         self,
@@ -97,8 +173,10 @@ class GraphConstructor:
         
         # Add intermediate nodes (commodities, entities)
         intermediate_nodes = self._extract_intermediate_nodes(candidates, evidence, local_text=local_text)
+        inter_count = 0
         for inter_node in intermediate_nodes:
-            inter_id = f"INTER_{inter_node['type']}_{len([n for n in graph['nodes'] if n['type'] == 'intermediate'])}"
+            inter_id = f"INTER_{inter_node['type']}_{inter_count}"
+            inter_count += 1
             
             graph['nodes'].append({
                 'id': inter_id,
@@ -113,6 +191,9 @@ class GraphConstructor:
         # Add preliminary edges
         edges = self._create_preliminary_edges(local_event_id, candidates, graph)
         graph['edges'] = edges
+
+        # Downstream layers look nodes/edges up through this instead of scanning lists
+        graph['index'] = GraphIndex(graph['nodes'], edges)
         
         return graph
     
@@ -1,15 +1,24 @@
 """
 Layer 4: GNN Reasoning / Link Prediction
 Uses GNN to predict causal links and mechanism types.
+
+Candidates that exist in the base CSV graph are scored by the trained LinkPredictor head
+(sigmoid of head(global_emb, local_emb)), all of them in one batched call. Checkpoints
+without a head, or GNN_LINK_SCORING=path_mean, use the older mean-of-path-embeddings
+score. Candidates that only exist in the Layer 3 subgraph are scored from their edge.
 """
 
+import os
 import torch
 import torch.nn as nn
 import torch.nn.functional as F
 from typing import Dict, List, Tuple, Optional
 from pathlib import Path
-from gnn_model import CausalGNN, PathFinder
-from data_loader import HistoricalDataLoader
+from gnn_model import CausalGNN, LinkPredictor, PathFinder
+from torch_geometric.utils import k_hop_subgraph
+from graph_store import GraphStore
+from pipeline_timing import timed
+from layer3_graph_construction import get_graph_index
 
 
 class GNNReasoner:
@@ -23,16 +32,27 @@ class GNNReasoner:
             nodes_file: Path to nodes CSV
             edges_file: Path to edges CSV
         """
-        self.data_loader = HistoricalDataLoader(nodes_file, edges_file)
+        # Same store (and graph version) as Layer 3 and the pipeline for these files
+        self.graph_store = GraphStore.acquire(nodes_file, edges_file)
         self.model = None
+        self.link_head: Optional[LinkPredictor] = None
+        self.scoring = os.getenv("GNN_LINK_SCORING", "head").strip().lower()
         self.path_finder = None
+        self.graph_data = None
+        # Store version that graph_data, path_finder and node_embeddings were built from
+        self.graph_version: Optional[int] = None
+        # Base-graph node embeddings. The base graph and weights do not change between
+        # requests, so one forward pass serves every candidate of every query.
+        self.node_embeddings: Optional[torch.Tensor] = None
         self.model_path = Path("models") / "causal_gnn.pt"
         self._initialize_model()
     
     def _initialize_model(self):
         """Initialize GNN model."""
+        graph_data, self.graph_version = self.graph_store.current()
         try:
-            graph_data = self.data_loader.build_graph()
+            if graph_data is None:
+                raise ValueError("no base graph loaded")
             
             self.model = CausalGNN(
                 input_dim=graph_data.x.shape[1],
@@ -45,10 +65,84 @@ class GNNReasoner:
             
             self.path_finder = PathFinder(graph_data, self.model)
             self.graph_data = graph_data
+            self._compute_node_embeddings()
         except Exception as e:
             print(f"Warning: Could not load graph data: {e}")
             self.model = None
+            self.link_head = None
             self.path_finder = None
+            self.graph_data = None
+            self.node_embeddings = None
+
+    def sync_graph(self) -> None:
+        """
+        Catch up with the shared graph store: nodes appended since our version are added
+        to the PathFinder and their embeddings refreshed; after a full refresh the model,
+        PathFinder and embeddings are rebuilt.
+        """
+        if self.graph_version == self.graph_store.version:
+            return
+        added = None
+        if self.graph_version is not None and self.path_finder is not None:
+            added = self.graph_store.added_since(self.graph_version)
+        if added is None:
+            self._initialize_model()
+            return
+        for idx in added:
+            self.path_finder.add_node(idx)
+        if added:
+            self.refresh_embeddings(added)
+        self.graph_version = self.graph_version + len(added)
+
+    def close(self) -> None:
+        """Release the shared graph store."""
+        self.graph_store.release()
+
+    def _compute_node_embeddings(self) -> None:
+        """Run the GNN forward pass over the base graph once and cache the result."""
+        if self.model is None or self.graph_data is None:
+            self.node_embeddings = None
+            return
+        with torch.no_grad(), timed("gnn_forward"):
+            self.node_embeddings = self.model(
+                self.graph_data.x,
+                self.graph_data.edge_index,
+                self.graph_data.edge_attr
+            )
+
+    def refresh_embeddings(self, changed: List[int]) -> None:
+        """
+        Update cached embeddings after nodes `changed` were added or edited.
+
+        A GCN layer mixes in-neighbours and their degrees, so a change reaches at most
+        num_layers + 1 hops downstream; those nodes are recomputed on their own
+        (num_layers + 1)-hop upstream subgraph, which gives the same values as a
+        full forward pass. Every other cached row is kept.
+        """
+        if self.node_embeddings is None or self.model is None or self.graph_data is None:
+            return
+        data = self.graph_data
+        hops = self.model.num_layers + 1
+        changed_idx = torch.tensor(sorted(set(changed)), dtype=torch.long)
+        affected, _, _, _ = k_hop_subgraph(
+            changed_idx, hops, data.edge_index, num_nodes=data.x.shape[0], flow="target_to_source"
+        )
+        subset, sub_edge_index, mapping, edge_mask = k_hop_subgraph(
+            affected, hops, data.edge_index, relabel_nodes=True, num_nodes=data.x.shape[0]
+        )
+        with torch.no_grad(), timed("gnn_forward_subgraph"):
+            sub_embeddings = self.model(
+                data.x[subset],
+                sub_edge_index,
+                data.edge_attr[edge_mask] if data.edge_attr is not None else None,
+            )
+
+        missing = data.x.shape[0] - self.node_embeddings.shape[0]
+        if missing > 0:
+            self.node_embeddings = torch.cat(
+                [self.node_embeddings, self.node_embeddings.new_zeros((missing, self.node_embeddings.shape[1]))]
+            )
+        self.node_embeddings[affected] = sub_embeddings[mapping]
 
     def _try_load_trained_weights(self) -> None:
         """Load trained model weights if available (created by train_gnn.py)."""
@@ -62,8 +156,46 @@ class GNNReasoner:
             if isinstance(payload, dict) and "gnn_state_dict" in payload:
                 self.model.load_state_dict(payload["gnn_state_dict"])
                 print(f"[Layer 4] Loaded trained GNN weights from: {self.model_path}")
+                self._try_load_link_head(payload.get("link_head_state_dict"))
         except Exception as e:
             print(f"[Layer 4] Warning: failed to load trained model weights: {e}")
+
+    def _try_load_link_head(self, state_dict: Optional[Dict]) -> None:
+        """Load the LinkPredictor head saved next to the GNN weights (shape read from the weights)."""
+        self.link_head = None
+        if not state_dict:
+            return
+        try:
+            first = state_dict["net.0.weight"]
+            head = LinkPredictor(emb_dim=first.shape[1] // 2, hidden_dim=first.shape[0])
+            head.load_state_dict(state_dict)
+            head.eval()
+            self.link_head = head
+            print("[Layer 4] Loaded trained link predictor head")
+        except Exception as e:
+            print(f"[Layer 4] Warning: failed to load link predictor head: {e}")
+
+    def score_pairs(self, global_ids: List[str], local_event_id: str) -> Dict[str, float]:
+        """
+        Link probabilities from the trained head for base-graph (global, local) pairs.
+
+        Args:
+            global_ids: Global node ids present in the base graph
+            local_event_id: Local node id present in the base graph
+
+        Returns:
+            global_id -> probability in [0, 1]
+        """
+        if not global_ids:
+            return {}
+        if self.node_embeddings is None:
+            self._compute_node_embeddings()
+        node_to_idx = self.graph_data.node_to_idx
+        src = torch.tensor([node_to_idx[g] for g in global_ids], dtype=torch.long)
+        dst = torch.full_like(src, node_to_idx[local_event_id])
+        with torch.no_grad(), timed("link_head"):
+            probs = torch.sigmoid(self.link_head(self.node_embeddings[src], self.node_embeddings[dst]))
+        return dict(zip(global_ids, probs.tolist()))
     
     def predict_links(
         self,
@@ -82,7 +214,9 @@ class GNNReasoner:
         Returns:
             List of predicted links with scores
         """
+        self.sync_graph()
         predictions = []
+        index = get_graph_index(graph)
         
         # Get global event candidates from graph
         global_nodes = [n for n in graph['nodes'] if n['type'] == 'global']
@@ -99,36 +233,75 @@ class GNNReasoner:
             hasattr(self.graph_data, 'node_to_idx') and
             local_event_id in self.graph_data.node_to_idx
         )
+
+        # Trained head: score every base-graph candidate in one batch (no per-candidate BFS).
+        use_head = can_use_gnn_for_some and self.link_head is not None and self.scoring != 'path_mean'
+        head_scores: Dict[str, float] = {}
+        if use_head:
+            try:
+                head_scores = self.score_pairs(
+                    [n['id'] for n in global_nodes if n['id'] in self.graph_data.node_to_idx],
+                    local_event_id
+                )
+            except Exception as e:
+                print(f"[Layer 4] Warning: link head scoring failed, using path scores: {e}")
+                use_head = False
+
+        # Path scoring: one reverse search from the local event serves every candidate.
+        shared_paths: Dict[str, List[Dict]] = {}
+        if not use_head and can_use_gnn_for_some:
+            try:
+                with timed("path_search"):
+                    shared_paths = self.path_finder.find_paths_to(
+                        local_event_id,
+                        [n['id'] for n in global_nodes if n['id'] in self.graph_data.node_to_idx],
+                        max_depth=3
+                    )
+            except Exception as e:
+                print(f"[Layer 4] Warning: path search failed, using graph structure: {e}")
         
         for global_node in global_nodes:
             global_id = global_node['id']
+
+            if global_id in head_scores:
+                causal_score = head_scores[global_id]
+                source_idx = self.graph_data.node_to_idx[global_id]
+                target_idx = self.graph_data.node_to_idx[local_event_id]
+                # Base-graph edges run global -> local, so a direct edge is the only explanation path.
+                edge_info = self.path_finder.get_edge_info(source_idx, target_idx)
+                path = None
+                if edge_info is not None:
+                    path = {
+                        'path': [source_idx, target_idx],
+                        'path_node_ids': [global_id, local_event_id],
+                        'length': 1
+                    }
+                predictions.append({
+                    'global_event_id': global_id,
+                    'local_event_id': local_event_id,
+                    'causal_strength_score': float(causal_score),
+                    'path': path,
+                    'mechanism_probs': self._predict_mechanism(global_node['data'], graph, causal_score),
+                    'edge_info': edge_info,
+                    'metadata': global_node['data']
+                })
+                continue
             
             # Try GNN path finding if nodes exist in base graph
-            if can_use_gnn_for_some and global_id in self.graph_data.node_to_idx:
+            if global_id in shared_paths:
                 try:
-                    paths = self.path_finder.find_paths(
-                        source_node_id=global_id,
-                        target_node_id=local_event_id,
-                        max_depth=3,
-                        max_paths=5
-                    )
+                    paths = shared_paths[global_id]
                     
                     if paths:
                         # Use GNN to get path embeddings
                         best_path = paths[0]
                         path_indices = best_path['path']
                         
-                        # Get node embeddings
-                        with torch.no_grad():
-                            embeddings = self.model(
-                                self.graph_data.x,
-                                self.graph_data.edge_index,
-                                self.graph_data.edge_attr
-                            )
-                            
-                            # Calculate path score
-                            path_embeddings = embeddings[path_indices]
-                            path_score = torch.mean(path_embeddings).item()
+                        # Calculate path score as a gather over the cached embeddings
+                        if self.node_embeddings is None:
+                            self._compute_node_embeddings()
+                        path_embeddings = self.node_embeddings[path_indices]
+                        path_score = torch.mean(path_embeddings).item()
                         
                         # Get edge info
                         if len(path_indices) >= 2:
@@ -162,9 +335,9 @@ class GNNReasoner:
             
             # Fallback: use graph structure directly (for candidate nodes not in base graph)
             # This handles the case where Layer 3 created new candidate nodes
-            local_edges = [e for e in graph['edges'] if e['target'] == local_event_id and e['source'] == global_id]
+            edge = index.edge(global_id, local_event_id)
             
-            for edge in local_edges:
+            if edge is not None:
                 # Use edge weight as causal strength, but boost it if it's a strong connection
                 base_score = edge.get('weight', 0.5)
                 
@@ -198,7 +371,6 @@ class GNNReasoner:
                     'edge_info': edge,
                     'metadata': global_node['data']
                 })
-                break  # Found the edge, move to next global node
         
         # Sort by causal strength
         predictions.sort(key=lambda x: x['causal_strength_score'], reverse=True)
@@ -217,20 +389,17 @@ class GNNReasoner:
         if not graph or 'edges' not in graph or 'nodes' not in graph:
             return []
         
-        # Get edges connected to local event
-        local_edges = [e for e in graph['edges'] if e.get('target') == local_event_id]
-        
-        if not local_edges:
-            # Try alternative edge structure
-            local_edges = [e for e in graph['edges'] if e.get('target_node_id') == local_event_id]
+        index = get_graph_index(graph)
         
+        # Get edges connected to local event (the index also covers source_node_id/target_node_id edges)
+        local_edges = index.edges_into(local_event_id)
         
         for edge in local_edges:
             source_id = edge.get('source') or edge.get('source_node_id')
             if not source_id:
                 continue
                 
-            source_node = next((n for n in graph['nodes'] if n.get('id') == source_id), None)
+            source_node = index.node(source_id)
             
             if source_node and source_node.get('type') == 'global':
                 # Use edge weight as causal strength, with boosting
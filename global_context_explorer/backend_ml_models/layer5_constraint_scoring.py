@@ -3,11 +3,96 @@ Layer 5: Constraint + Evidence Scoring
 Applies constraints and calculates reliability scores.
 """
 
-from typing import Dict, List
+from typing import Dict, FrozenSet, Iterator, List, Optional, Set
 from datetime import datetime
 import pandas as pd
 from reliability_calculator import ReliabilityCalculator
 from date_utils import parse_year_range, year_for_ordering
+from layer3_graph_construction import get_graph_index
+
+
+def _source_type(source: str) -> str:
+    """Evidence source bucket (archive > book > wikipedia > other)."""
+    if 'archive' in source or 'record' in source:
+        return 'archive'
+    if 'book' in source or 'publication' in source:
+        return 'book'
+    if 'wikipedia' in source:
+        return 'wikipedia'
+    return 'other'
+
+
+def _text_values(value) -> Iterator[str]:
+    """Lower-cased string values of a (nested) dict/list, without its keys."""
+    if isinstance(value, dict):
+        for item in value.values():
+            yield from _text_values(item)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            yield from _text_values(item)
+    elif value is not None:
+        yield str(value).lower()
+
+
+class EvidenceIndex:
+    """
+    Layer 1 `raw_text_evidence` of one request, tokenized once.
+
+    Every snippet is lower-cased and split into terms a single time (term -> {snippet id:
+    count}). A keyword matches the snippets that contain it as a term or, when it is longer
+    than 4 characters, inside a term -- keywords have no whitespace, so that is exactly the
+    substring test the per-prediction scan did. Substring lookups go through a trigram ->
+    terms map, and results are memoized, so predictions sharing keywords share the work.
+    """
+
+    def __init__(self, snippets: List[Dict]):
+        self.size = 0
+        self.source_types: List[str] = []
+        self.postings: Dict[str, Dict[int, int]] = {}
+        self._trigrams: Optional[Dict[str, Set[str]]] = None
+        self._matches: Dict[str, FrozenSet[int]] = {}
+
+        for snippet_id, snippet in enumerate(snippets or []):
+            text = str(snippet.get('extract', '') or '').lower()
+            self.source_types.append(_source_type(str(snippet.get('source', '') or '').lower()))
+            for term in text.split():
+                counts = self.postings.setdefault(term, {})
+                counts[snippet_id] = counts.get(snippet_id, 0) + 1
+            self.size += 1
+
+    def matches(self, keyword: str) -> FrozenSet[int]:
+        """Ids of snippets that mention `keyword` (see class docstring)."""
+        found = self._matches.get(keyword)
+        if found is not None:
+            return found
+
+        ids = set(self.postings.get(keyword, ()))
+        if len(keyword) > 4:
+            for term in self._terms_containing(keyword):
+                ids.update(self.postings[term])
+        found = frozenset(ids)
+        self._matches[keyword] = found
+        return found
+
+    def _terms_containing(self, keyword: str) -> Iterator[str]:
+        if self._trigrams is None:
+            self._trigrams = {}
+            for term in self.postings:
+                for i in range(len(term) - 2):
+                    self._trigrams.setdefault(term[i:i + 3], set()).add(term)
+
+        candidates = None
+        for gram in sorted({keyword[i:i + 3] for i in range(len(keyword) - 2)},
+                           key=lambda g: len(self._trigrams.get(g, ()))):
+            terms = self._trigrams.get(gram)
+            if not terms:
+                return
+            candidates = set(terms) if candidates is None else candidates & terms
+            if not candidates:
+                return
+        for term in candidates or ():
+            if keyword in term:
+                yield term
 
 
 class ConstraintScorer:
@@ -34,6 +119,8 @@ class ConstraintScorer:
             Scored predictions with reliability scores
         """
         scored_predictions = []
+        # Tokenize the evidence once; every prediction's mention count is then index lookups
+        evidence_index = EvidenceIndex(evidence.get('raw_text_evidence', []))
         
         for prediction in predictions:
             # Apply constraints
@@ -54,7 +141,8 @@ class ConstraintScorer:
             evidence_strength = self._calculate_evidence_strength(
                 prediction,
                 evidence,
-                graph
+                graph,
+                evidence_index=evidence_index
             )
             
             # Get edge data for reliability calculation
@@ -120,10 +208,7 @@ class ConstraintScorer:
         }
         
         global_event = prediction.get('metadata', {})
-        local_node = next(
-            (n for n in graph['nodes'] if n['id'] == prediction['local_event_id']),
-            None
-        )
+        local_node = get_graph_index(graph).node(prediction['local_event_id'])
         
         if not local_node:
             return constraints
@@ -181,14 +266,18 @@ class ConstraintScorer:
         local_location = str(local_node['data'].get('location', '') or '').lower()
         
         # Check for colonial ties, trade routes, etc.
-        if 'british' in global_location or 'colonial' in str(global_event).lower():
+        if 'british' in global_location or any('colonial' in v for v in _text_values(global_event)):
             constraints['geographic_plausibility'] = True
         elif 'sri lanka' in local_location or 'ceylon' in local_location:
             # Global events affecting Sri Lanka are plausible
             constraints['geographic_plausibility'] = True
         else:
-            # Check for trade-related connections
-            if any(kw in str(prediction).lower() for kw in ['trade', 'export', 'commodity']):
+            # Check for trade-related connections: mechanism names, event and edge fields
+            fields = [str(m).lower() for m in (prediction.get('mechanism_probs') or {})]
+            fields.append(str(prediction.get('global_event_id', '')).lower())
+            fields.extend(_text_values(global_event))
+            fields.extend(_text_values(prediction.get('edge_info')))
+            if any(kw in field for field in fields for kw in ['trade', 'export', 'commodity']):
                 constraints['geographic_plausibility'] = True
         
         # Constraint 3: Source consistency
@@ -219,9 +308,10 @@ class ConstraintScorer:
         self,
         prediction: Dict,
         evidence: Dict,
-        graph: Dict
+        graph: Dict,
+        evidence_index: Optional[EvidenceIndex] = None
     ) -> Dict:
-        """Calculate evidence strength from collected sources."""
+        """Calculate evidence strength from collected sources (index built here if not given)."""
         global_event = prediction.get('metadata', {})
         event_name = str(global_event.get('event_name', '') or '').lower()
         description = str(global_event.get('description', '') or '').lower()
@@ -246,7 +336,6 @@ class ConstraintScorer:
             event_keywords.update(['colonial', 'british', 'empire', 'expansion'])
         
         # Count evidence mentions
-        mention_count = 0
         source_types = {
             'archive': 0,
             'book': 0,
@@ -254,30 +343,19 @@ class ConstraintScorer:
             'other': 0
         }
         
-        for snippet in evidence.get('raw_text_evidence', []):
-            text = snippet.get('extract', '').lower()
-            source = snippet.get('source', '').lower()
-            
-            # Check if event is mentioned using keywords
-            text_words = set(text.split())
-            keyword_matches = len(event_keywords & text_words)
-            
-            # Also check for partial matches
-            if keyword_matches > 0 or any(keyword in text for keyword in event_keywords if len(keyword) > 4):
-                mention_count += 1
-                
-                # Categorize source
-                if 'archive' in source or 'record' in source:
-                    source_types['archive'] += 1
-                elif 'book' in source or 'publication' in source:
-                    source_types['book'] += 1
-                elif 'wikipedia' in source:
-                    source_types['wikipedia'] += 1
-                else:
-                    source_types['other'] += 1
+        if evidence_index is None:
+            evidence_index = EvidenceIndex(evidence.get('raw_text_evidence', []))
+        
+        # Snippets mentioning the event (any keyword as a word, or inside one if longer than 4 chars)
+        mentioned: Set[int] = set()
+        for keyword in event_keywords:
+            mentioned |= evidence_index.matches(keyword)
+        for snippet_id in mentioned:
+            source_types[evidence_index.source_types[snippet_id]] += 1
+        mention_count = len(mentioned)
         
         # If no mentions found, check if we have any evidence at all
-        if mention_count == 0 and len(evidence.get('raw_text_evidence', [])) > 0:
+        if mention_count == 0 and evidence_index.size > 0:
             # Give partial credit for having evidence, even if not explicitly mentioning event
             mention_count = 1
             source_types['wikipedia'] = 1  # Default to wikipedia if unknown
@@ -341,10 +419,7 @@ class ConstraintScorer:
                 # Calculate temporal gap - ALWAYS calculate from event dates
                 temporal_gap = 0
                 global_event = prediction.get('metadata', {})
-                local_node = next(
-                    (n for n in graph['nodes'] if n['id'] == prediction['local_event_id']),
-                    None
-                )
+                local_node = get_graph_index(graph).node(prediction['local_event_id'])
                 if global_event and local_node:
                     # Get dates - handle various formats
                     global_date_raw = global_event.get('date', '')
@@ -423,19 +498,15 @@ class ConstraintScorer:
         global_id = prediction.get('global_event_id')
         
         if local_id and global_id and graph and 'edges' in graph:
-            edge = next(
-                (e for e in graph['edges'] 
-                 if (e.get('source') == global_id or e.get('source_node_id') == global_id) and 
-                    (e.get('target') == local_id or e.get('target_node_id') == local_id)),
-                None
-            )
+            index = get_graph_index(graph)
+            edge = index.edge(global_id, local_id)
             
             if edge:
                 # Calculate temporal gap - ALWAYS calculate from event dates
                 temporal_gap = 0
                 try:
                     global_event = prediction.get('metadata', {})
-                    local_node = next((n for n in graph.get('nodes', []) if n.get('id') == local_id), None)
+                    local_node = index.node(local_id)
                     
                     if global_event and local_node:
                         # Get dates - handle various formats
@@ -5,13 +5,19 @@ Finds best explanatory paths in the graph.
 
 from typing import Dict, List, Optional
 from collections import deque
+from layer3_graph_construction import get_graph_index
 
 
 class PathConstructor:
     """Constructs explanation paths for causal links."""
     
-    def __init__(self):
-        pass
+    def __init__(self, max_expansions: int = 20000):
+        """
+        Args:
+            max_expansions: Partial paths a single path search may expand before it
+                gives up (bounds latency on dense subgraphs)
+        """
+        self.max_expansions = max(1, int(max_expansions))
     
     def construct_paths(
         self,
@@ -33,12 +39,12 @@ class PathConstructor:
         global_id = prediction['global_event_id']
         local_id = prediction['local_event_id']
         
-        # Find all paths from global to local
-        all_paths = self._find_all_paths(graph, global_id, local_id, max_depth=4)
+        # Shortest paths from global to local (a few more than needed, ranked below)
+        all_paths = self._find_all_paths(graph, global_id, local_id, max_depth=4, limit=max_paths * 2)
         
         # Score and rank paths
         scored_paths = []
-        for path in all_paths[:max_paths * 2]:  # Get more candidates
+        for path in all_paths:
             score = self._score_path(path, graph, prediction)
             scored_paths.append({
                 'path': path,
@@ -57,50 +63,58 @@ class PathConstructor:
         graph: Dict,
         source_id: str,
         target_id: str,
-        max_depth: int = 4
+        max_depth: int = 4,
+        limit: Optional[int] = None
     ) -> List[List[str]]:
-        """Find all paths from source to target using BFS."""
+        """
+        Simple paths from source to target with at most max_depth edges, shortest first.
+
+        BFS over partial paths that only extends through nodes which can still reach the
+        target within the remaining depth (GraphIndex.distances_to, computed once per
+        target and shared by every prediction on the subgraph), so dead-end branches are
+        never queued. Stops after `limit` paths or self.max_expansions expansions.
+        """
         if source_id not in graph['node_to_idx'] or target_id not in graph['node_to_idx']:
             return []
-        
+
+        index = get_graph_index(graph)
+        dist = index.distances_to(target_id, max_depth)
+        if source_id not in dist:
+            return []
+
         paths = []
-        queue = deque([(source_id, [source_id])])
-        visited_paths = set()
-        
+        queue = deque([(source_id, (source_id,))])
+        expansions = 0
+
         while queue:
             current_id, path = queue.popleft()
-            
+
             if current_id == target_id and len(path) > 1:
-                paths.append(path)
+                paths.append(list(path))
+                if limit is not None and len(paths) >= limit:
+                    break
                 continue
-            
+
             if len(path) >= max_depth + 1:
                 continue
-            
-            # Get neighbors
-            neighbors = self._get_neighbors(graph, current_id)
-            
-            for neighbor_id in neighbors:
-                if neighbor_id not in path:  # Avoid cycles
-                    new_path = path + [neighbor_id]
-                    path_key = tuple(new_path)
-                    
-                    if path_key not in visited_paths:
-                        visited_paths.add(path_key)
-                        queue.append((neighbor_id, new_path))
-        
+
+            expansions += 1
+            if expansions > self.max_expansions:
+                break
+
+            # Hops left after stepping to the neighbor
+            remaining = max_depth - len(path)
+            for neighbor_id in self._get_neighbors(graph, current_id):
+                if dist.get(neighbor_id, max_depth + 1) <= remaining and neighbor_id not in path:  # Avoid cycles
+                    queue.append((neighbor_id, path + (neighbor_id,)))
+
         return paths
     
     def _get_neighbors(self, graph: Dict, node_id: str) -> List[str]:
-        """Get neighbor nodes of a given node."""
-        neighbors = []
-        
-        # Find edges where this node is source
-        for edge in graph['edges']:
-            if edge['source'] == node_id:
-                neighbors.append(edge['target'])
-        
-        return neighbors
+        """Get neighbor nodes of a given node (each once, in edge order)."""
+        # Targets of edges where this node is source; parallel edges would otherwise
+        # yield the same path several times and use up `limit`
+        return list(dict.fromkeys(get_graph_index(graph).successors(node_id)))
     
     def _score_path(
         self,
@@ -113,17 +127,14 @@ class PathConstructor:
             return 0.0
         
         # Calculate path score from edge weights
+        index = get_graph_index(graph)
         edge_scores = []
         for i in range(len(path) - 1):
             source = path[i]
             target = path[i + 1]
             
             # Find edge
-            edge = next(
-                (e for e in graph['edges'] 
-                 if e['source'] == source and e['target'] == target),
-                None
-            )
+            edge = index.edge(source, target)
             
             if edge:
                 edge_scores.append(edge.get('weight', 0.5))
@@ -157,13 +168,14 @@ class PathConstructor:
             return "Direct connection"
         
         explanation_parts = []
+        index = get_graph_index(graph)
         
         for i in range(len(path) - 1):
             source_id = path[i]
             target_id = path[i + 1]
             
-            source_node = next((n for n in graph['nodes'] if n['id'] == source_id), None)
-            target_node = next((n for n in graph['nodes'] if n['id'] == target_id), None)
+            source_node = index.node(source_id)
+            target_node = index.node(target_id)
             
             if source_node and target_node:
                 # Get source name
@@ -178,11 +190,7 @@ class PathConstructor:
                     inter_type = None
                 
                 # Get edge description
-                edge = next(
-                    (e for e in graph['edges'] 
-                     if e['source'] == source_id and e['target'] == target_id),
-                    None
-                )
+                edge = index.edge(source_id, target_id)
                 
                 if edge and edge.get('type') == 'causal_candidate':
                     explanation_parts.append(
@@ -3,16 +3,41 @@ Layer 7: Curator-Friendly Result Packaging
 Formats results for curator review.
 """
 
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
+import math
 import re
+import threading
+import uuid
 from llm_influence_enricher import InfluenceEnricher
 
 
+def _json_safe(value):
+    """
+    Scalar as plain Python for JSON: numpy scalars unwrapped, NaN/inf -> None (pandas
+    marks empty CSV cells as NaN). Packaged results are JSON-safe, so the transport
+    does not need a recursive cleaning pass (see result_transport.py).
+    """
+    if hasattr(value, 'item') and not isinstance(value, (str, bytes, dict, list)):
+        try:
+            value = value.item()
+        except (TypeError, ValueError):
+            return value
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+def _json_safe_dict(values: Optional[Dict]) -> Dict:
+    return {k: _json_safe(v) for k, v in (values or {}).items()}
+
+
 class ResultPackager:
     """Packages results in curator-friendly format."""
     
     def __init__(self):
-        pass
+        # Deferred enrichment jobs by token (see package_results(defer_enrichment=True))
+        self._pending: Dict[str, Tuple[InfluenceEnricher, List[Tuple[Dict, Dict]]]] = {}
+        self._pending_lock = threading.Lock()
     
     def package_results(
         self,
@@ -20,7 +45,8 @@ class ResultPackager:
         local_event_data: Dict,
         scored_predictions: List[Dict],
         paths: Dict[str, List[Dict]],
-        evidence: Dict
+        evidence: Dict,
+        defer_enrichment: bool = False
     ) -> Dict:
         """
         Package all results for curator.
@@ -31,6 +57,8 @@ class ResultPackager:
             scored_predictions: Scored predictions from Layer 5
             paths: Dictionary mapping prediction IDs to paths
             evidence: Evidence from Layer 1
+            defer_enrichment: Return without waiting for LLM enrichment; results then carry
+                {"enrichment": {"status": "pending", "token"}} and finish_enrichment() applies it
         
         Returns:
             Packaged results dictionary
@@ -51,7 +79,7 @@ class ResultPackager:
         }
 
         # Keep both full and short local descriptions for frontend/UX.
-        local_data = dict(local_event_data or {})
+        local_data = _json_safe_dict(local_event_data)
         local_desc_full = str(local_data.get('description', '') or '')
         local_data['description_full'] = local_desc_full
         local_data['description_short'] = self._shorten_text(local_desc_full, max_chars=260, max_sentences=2)
@@ -59,7 +87,17 @@ class ResultPackager:
 
         enricher = InfluenceEnricher()
         max_enrich = enricher.max_enrich() if enricher.is_enabled() else 0
-        enriched_count = 0
+        # (influence, enrich_description kwargs) for the influences sent to the LLM
+        jobs: List[Tuple[Dict, Dict]] = []
+        # Provide a small evidence sample (titles/extracts are already summarized upstream),
+        # shared by every enrichment job
+        ev_snips = []
+        if max_enrich > 0:
+            for sn in (evidence.get("raw_text_evidence", []) or [])[:5]:
+                if isinstance(sn, dict):
+                    txt = sn.get("extract") or sn.get("snippet") or sn.get("plain_text") or ""
+                    if txt:
+                        ev_snips.append(str(txt))
         
         # Package top influences
         for prediction in scored_predictions[:10]:  # Top 10
@@ -68,86 +106,110 @@ class ResultPackager:
 
             influence_type = "direct" if float(prediction.get("final_score", 0.0)) >= 0.60 else "indirect"
             mechanism = self._get_top_mechanism(prediction.get('mechanism_probs', {}))
+            metadata = prediction['metadata']
             
             influence = {
                 'global_event': {
                     'id': pred_id,
-                    'name': prediction['metadata'].get('event_name', ''),
-                    'date': prediction['metadata'].get('date', ''),
-                    'location': prediction['metadata'].get('location', ''),
-                    'description': prediction['metadata'].get('description', ''),
-                    'description_full': prediction['metadata'].get('description', ''),
+                    'name': _json_safe(metadata.get('event_name', '')),
+                    'date': _json_safe(metadata.get('date', '')),
+                    'location': _json_safe(metadata.get('location', '')),
+                    'description': _json_safe(metadata.get('description', '')),
+                    'description_full': _json_safe(metadata.get('description', '')),
                 },
-                'causal_strength': prediction['causal_strength_score'],
-                'reliability_score': prediction['reliability']['reliability_percent'],
-                'final_score': prediction['final_score'],
+                'causal_strength': _json_safe(prediction['causal_strength_score']),
+                'reliability_score': _json_safe(prediction['reliability']['reliability_percent']),
+                'final_score': _json_safe(prediction['final_score']),
                 'mechanism': mechanism,
                 'influence_type': influence_type,
-                'mechanism_probs': prediction['mechanism_probs'],
-                'constraints': prediction['constraint_results'],
-                'evidence_strength': prediction['evidence_strength']['evidence_strength'],
-                'explanation_paths': explanation_paths,
+                'mechanism_probs': _json_safe_dict(prediction['mechanism_probs']),
+                'constraints': _json_safe_dict(prediction['constraint_results']),
+                'evidence_strength': _json_safe(prediction['evidence_strength']['evidence_strength']),
+                'explanation_paths': [_json_safe_dict(path) for path in explanation_paths],
                 'reliability_components': {
-                    'directness': prediction['reliability']['directness'],
-                    'source_consistency': prediction['reliability']['source_consistency'],
-                    'temporal_proximity': prediction['reliability']['temporal_proximity']
+                    'directness': _json_safe(prediction['reliability']['directness']),
+                    'source_consistency': _json_safe(prediction['reliability']['source_consistency']),
+                    'temporal_proximity': _json_safe(prediction['reliability']['temporal_proximity'])
                 }
             }
 
             # Fix Issue 2: LLM enrichment step (API-key gated) - always use when available.
             # This ensures descriptions are curator-friendly and readable.
             original_desc = influence["global_event"]["description"]
-            if enricher.is_enabled() and enriched_count < max_enrich:
-                # Provide a small evidence sample (titles/extracts are already summarized upstream)
-                ev_snips = []
-                for sn in (evidence.get("raw_text_evidence", []) or [])[:5]:
-                    if isinstance(sn, dict):
-                        txt = sn.get("extract") or sn.get("snippet") or sn.get("plain_text") or ""
-                        if txt:
-                            ev_snips.append(str(txt))
-                
-                enriched = enricher.enrich_description(
-                    local_event=local_event_data or {},
-                    global_event={
+            if enricher.is_enabled() and len(jobs) < max_enrich:
+                jobs.append((influence, {
+                    "local_event": local_event_data or {},
+                    "global_event": {
+                        "id": pred_id,
                         "name": influence["global_event"]["name"],
                         "date": influence["global_event"]["date"],
                         "location": influence["global_event"]["location"],
                         "description": original_desc,  # Use original description
-                        "source_url": prediction.get("metadata", {}).get("source_url", ""),
+                        "source_url": metadata.get("source_url", ""),
                     },
-                    mechanism=mechanism,
-                    influence_type=influence_type,
-                    evidence_snippets=ev_snips,
-                )
-                if enriched:
-                    # Store original for reference, replace with enriched version
-                    influence["global_event"]["original_description"] = original_desc
-                    influence["global_event"]["description_full"] = enriched
-                    influence["global_event"]["description"] = enriched
-                    enriched_count += 1
-                else:
-                    # If enrichment failed but API key is set, try to clean up the description
-                    # Remove wiki markup remnants that might make it unreadable
-                    cleaned_desc = self._clean_wiki_markup(original_desc)
-                    if cleaned_desc != original_desc:
-                        influence["global_event"]["description_full"] = cleaned_desc
-                        influence["global_event"]["description"] = cleaned_desc
-            else:
-                # Even without API key, clean up wiki markup for readability
-                cleaned_desc = self._clean_wiki_markup(original_desc)
-                if cleaned_desc != original_desc:
-                    influence["global_event"]["description_full"] = cleaned_desc
-                    influence["global_event"]["description"] = cleaned_desc
+                    "mechanism": mechanism,
+                    "influence_type": influence_type,
+                    "evidence_snippets": ev_snips,
+                }))
 
-            # Always expose a short, reader-friendly description for UI/terminal output.
-            desc_full = str(influence["global_event"].get("description_full", "") or "")
-            influence["global_event"]["description_short"] = self._shorten_text(desc_full, max_chars=420, max_sentences=3)
-            # Keep existing `description` concise for display, while `description_full` keeps full details.
-            influence["global_event"]["description"] = influence["global_event"]["description_short"]
+            # Enrichment failed, pending or off: clean up wiki markup for readability
+            self._set_description(influence, self._clean_wiki_markup(original_desc))
             
             results['top_influences'].append(influence)
+
+        if jobs and defer_enrichment:
+            token = uuid.uuid4().hex
+            with self._pending_lock:
+                self._pending[token] = (enricher, jobs)
+            results['enrichment'] = {'status': 'pending', 'count': len(jobs), 'token': token}
+        elif jobs:
+            self._apply_enrichment(enricher, jobs)
         
         return results
+
+    def finish_enrichment(self, results: Dict) -> List[Dict]:
+        """
+        Run the enrichment deferred by package_results(defer_enrichment=True) and apply it
+        to `results` in place.
+
+        Returns:
+            One update per enriched influence: {"global_event_id", "description",
+            "description_full", "description_short", "original_description"}
+        """
+        status = results.get('enrichment') or {}
+        with self._pending_lock:
+            pending = self._pending.pop(status.get('token', ''), None)
+        if pending is None:
+            return []
+        updates = self._apply_enrichment(*pending)
+        results['enrichment'] = {'status': 'done', 'count': len(updates)}
+        return updates
+
+    def _apply_enrichment(self, enricher: InfluenceEnricher, jobs: List[Tuple[Dict, Dict]]) -> List[Dict]:
+        """Enrich the jobs' influences concurrently; returns the updates that succeeded."""
+        updates = []
+        texts = enricher.enrich_many([job for _, job in jobs])
+        for (influence, job), enriched in zip(jobs, texts):
+            if not enriched:
+                continue
+            # Store original for reference, replace with enriched version
+            influence["global_event"]["original_description"] = job["global_event"]["description"]
+            self._set_description(influence, enriched)
+            updates.append({
+                "global_event_id": influence["global_event"]["id"],
+                **{k: influence["global_event"][k] for k in ("description", "description_full", "description_short", "original_description")},
+            })
+        return updates
+
+    def _set_description(self, influence: Dict, description_full: Optional[str]) -> None:
+        """Set the full description and the short / display forms derived from it."""
+        if description_full:
+            influence["global_event"]["description_full"] = description_full
+        # Always expose a short, reader-friendly description for UI/terminal output.
+        desc_full = str(influence["global_event"].get("description_full", "") or "")
+        influence["global_event"]["description_short"] = self._shorten_text(desc_full, max_chars=420, max_sentences=3)
+        # Keep existing `description` concise for display, while `description_full` keeps full details.
+        influence["global_event"]["description"] = influence["global_event"]["description_short"]
     
     def format_for_display(self, results: Dict) -> str:
         """Format results as beautiful text output."""
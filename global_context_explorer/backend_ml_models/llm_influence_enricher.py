@@ -9,21 +9,146 @@ Usage:
   - `INFLUENCE_LLM_ENDPOINT` (default: OpenAI chat completions endpoint)
   - `INFLUENCE_LLM_MODEL` (default: gpt-4o-mini)
   - `INFLUENCE_LLM_MAX` (default: 5) max influences to enrich per run
+  - `INFLUENCE_LLM_WORKERS` (default: 4) enrichment calls in flight at once
+  - `INFLUENCE_LLM_CACHE=off` / `INFLUENCE_LLM_CACHE_PATH` (default: cache/llm_enrichment.sqlite)
+  - `INFLUENCE_LLM_ASYNC=1` streaming runs send the result first and the enriched
+    descriptions afterwards as an "enrichment" event (see pipeline_main.process)
+
+Paragraphs are cached on disk by (local event, global event, endpoint, model, PROMPT_VERSION)
+with no expiry, so re-analysing an event never pays for the same paragraph twice. The endpoint
+is part of the key so paragraphs from llm_stub_server.py are never served for the real API.
+Bump PROMPT_VERSION when the prompt changes.
+
+For testing without a paid API, point INFLUENCE_LLM_ENDPOINT at llm_stub_server.py.
 """
 
 from __future__ import annotations
 
+import hashlib
 import os
+import sqlite3
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 from typing import Dict, List, Optional
 
 import requests
 
+from pipeline_timing import timed
+
+
+PROMPT_VERSION = "1"
+DEFAULT_ENDPOINT = "https://api.openai.com/v1/chat/completions"
+DEFAULT_MODEL = "gpt-4o-mini"
+
+
+def async_enabled() -> bool:
+    """True when INFLUENCE_LLM_ASYNC is set to 1/true/yes/on."""
+    return os.getenv("INFLUENCE_LLM_ASYNC", "").strip().lower() in ("1", "true", "yes", "on")
+
+
+class EnrichmentCache:
+    """SQLite store of generated paragraphs (no TTL: every entry was a paid call)."""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = Path(path or os.getenv("INFLUENCE_LLM_CACHE_PATH") or Path("cache") / "llm_enrichment.sqlite")
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS enrichments (
+                key TEXT PRIMARY KEY,
+                text TEXT NOT NULL,
+                model TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(local_key: str, global_key: str, model: str, endpoint: str = "",
+                 prompt_version: str = PROMPT_VERSION) -> str:
+        body = "\0".join([local_key, global_key, endpoint, model, prompt_version])
+        return hashlib.sha256(body.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT text FROM enrichments WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return row[0]
+
+    def put(self, key: str, text: str, model: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO enrichments (key, text, model, created_at) VALUES (?, ?, ?, ?)",
+                (key, text, model, time.time()),
+            )
+            self._conn.commit()
+
+
+_shared_caches: Dict[str, EnrichmentCache] = {}
+_shared_lock = threading.Lock()
+
+
+def get_enrichment_cache(path: Optional[str] = None) -> Optional[EnrichmentCache]:
+    """One cache object per file per process, or None when INFLUENCE_LLM_CACHE=off."""
+    if os.getenv("INFLUENCE_LLM_CACHE", "").strip().lower() in ("0", "off", "false", "no"):
+        return None
+    resolved = str(Path(path or os.getenv("INFLUENCE_LLM_CACHE_PATH") or Path("cache") / "llm_enrichment.sqlite"))
+    with _shared_lock:
+        cache = _shared_caches.get(resolved)
+        if cache is None:
+            try:
+                cache = EnrichmentCache(resolved)
+            except Exception as e:
+                print(f"[LLM enrichment] Warning: cache unavailable ({e}); continuing without it")
+                return None
+            _shared_caches[resolved] = cache
+        return cache
+
 
 class InfluenceEnricher:
-    def __init__(self, timeout: int = 25, rate_limit: float = 0.2):
+    def __init__(
+        self,
+        timeout: int = 25,
+        rate_limit: float = 0.2,
+        endpoint: Optional[str] = None,
+        model: Optional[str] = None,
+        max_workers: Optional[int] = None,
+        cache_path: Optional[str] = None,
+    ):
+        """
+        Args:
+            timeout: Seconds per enrichment call
+            rate_limit: Minimum spacing in seconds between call starts (shared by all workers)
+            endpoint: Chat completions URL (default: $INFLUENCE_LLM_ENDPOINT or OpenAI)
+            model: Model name (default: $INFLUENCE_LLM_MODEL or gpt-4o-mini)
+            max_workers: Calls in flight at once (default: $INFLUENCE_LLM_WORKERS or 4)
+            cache_path: Paragraph cache file (default from env, see module docstring)
+        """
         self.timeout = timeout
         self.rate_limit = rate_limit
+        self.endpoint = endpoint or os.getenv("INFLUENCE_LLM_ENDPOINT", "").strip() or DEFAULT_ENDPOINT
+        self.model = model or os.getenv("INFLUENCE_LLM_MODEL", "").strip() or DEFAULT_MODEL
+        if max_workers is None:
+            try:
+                max_workers = int(os.getenv("INFLUENCE_LLM_WORKERS", "4").strip())
+            except Exception:
+                max_workers = 4
+        self.max_workers = max(1, int(max_workers))
+        self.cache = get_enrichment_cache(cache_path) if self.is_enabled() else None
+        self._next_call = 0.0
+        self._throttle_lock = threading.Lock()
 
     def is_enabled(self) -> bool:
         return bool(self._api_key())
@@ -34,6 +159,24 @@ class InfluenceEnricher:
         except Exception:
             return 5
 
+    def enrich_many(self, jobs: List[Dict]) -> List[Optional[str]]:
+        """
+        Run several enrich_description() calls concurrently (bounded by max_workers).
+
+        Args:
+            jobs: Keyword arguments for enrich_description, one dict per influence
+
+        Returns:
+            Paragraphs (or None on failure) in the order of `jobs`
+        """
+        if not jobs:
+            return []
+        with timed("llm_enrichment"):
+            if len(jobs) == 1:
+                return [self.enrich_description(**jobs[0])]
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(jobs))) as pool:
+                return list(pool.map(lambda job: self.enrich_description(**job), jobs))
+
     def enrich_description(
         self,
         local_event: Dict,
@@ -49,9 +192,6 @@ class InfluenceEnricher:
         if not api_key:
             return None
 
-        endpoint = os.getenv("INFLUENCE_LLM_ENDPOINT", "").strip() or "https://api.openai.com/v1/chat/completions"
-        model = os.getenv("INFLUENCE_LLM_MODEL", "").strip() or "gpt-4o-mini"
-
         le_name = str(local_event.get("event_name", "") or local_event.get("title", "") or "").strip()
         le_date = str(local_event.get("date", "") or "").strip()
         le_loc = str(local_event.get("location", "") or "").strip()
@@ -63,6 +203,15 @@ class InfluenceEnricher:
         ge_desc = str(global_event.get("description", "") or "").strip()
         ge_url = str(global_event.get("source_url", "") or global_event.get("source_url", "") or "").strip()
 
+        cache_key = None
+        if self.cache is not None:
+            local_key = str(local_event.get("node_id", "") or local_event.get("id", "") or le_name)
+            global_key = str(global_event.get("id", "") or ge_name)
+            cache_key = EnrichmentCache.make_key(local_key, global_key, self.model, self.endpoint)
+            cached = self.cache.get(cache_key)
+            if cached:
+                return cached
+
         ev = evidence_snippets or []
         ev = [str(s).strip() for s in ev if str(s).strip()]
         ev = ev[:3]
@@ -85,7 +234,7 @@ class InfluenceEnricher:
         )
 
         payload = {
-            "model": model,
+            "model": self.model,
             "messages": [
                 {"role": "system", "content": system},
                 {"role": "user", "content": user},
@@ -100,9 +249,9 @@ class InfluenceEnricher:
         }
 
         # Basic rate limiting to avoid hammering the endpoint
-        time.sleep(self.rate_limit)
+        self._throttle()
         try:
-            resp = requests.post(endpoint, headers=headers, json=payload, timeout=self.timeout)
+            resp = requests.post(self.endpoint, headers=headers, json=payload, timeout=self.timeout)
             if resp.status_code != 200:
                 return None
             data = resp.json() or {}
@@ -113,10 +262,26 @@ class InfluenceEnricher:
                 return None
             msg = choices[0].get("message", {}) or {}
             text = str(msg.get("content", "") or "").strip()
-            return text or None
         except Exception:
             return None
 
+        if text and cache_key is not None:
+            try:
+                self.cache.put(cache_key, text, self.model)
+            except Exception as e:
+                print(f"[LLM enrichment] Warning: could not cache paragraph: {e}")
+        return text or None
+
+    def _throttle(self) -> None:
+        """Space call starts at least rate_limit seconds apart across threads."""
+        if self.rate_limit <= 0:
+            return
+        with self._throttle_lock:
+            now = time.monotonic()
+            start = max(now, self._next_call)
+            self._next_call = start + self.rate_limit
+        if start > now:
+            time.sleep(start - now)
+
     def _api_key(self) -> str:
         return (os.getenv("INFLUENCE_LLM_API_KEY", "") or os.getenv("OPENAI_API_KEY", "") or "").strip()
-
@@ -0,0 +1,96 @@
+"""
+Local stand-in for an OpenAI-compatible chat completions endpoint.
+
+Lets the LLM enrichment step (llm_influence_enricher.py) run end to end without a paid API:
+answers every POST with a short canned paragraph built from the prompt's titles, after an
+optional delay to mimic model latency.
+
+Usage:
+    python llm_stub_server.py --port 8765 --delay 0.5
+    INFLUENCE_LLM_API_KEY=stub INFLUENCE_LLM_ENDPOINT=http://127.0.0.1:8765/v1/chat/completions \\
+        python pipeline_main.py --input "Tea Heritage Exhibit"
+
+GET /health reports how many completions were served.
+"""
+
+import argparse
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def make_handler(delay: float):
+    state = {"completions": 0}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def _send_json(self, status: int, body: dict):
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path.rstrip("/") == "/health":
+                self._send_json(200, {"ok": True, "completions": state["completions"]})
+                return
+            self._send_json(404, {"error": "not found"})
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            try:
+                payload = json.loads(self.rfile.read(length) or b"{}")
+            except ValueError:
+                self._send_json(400, {"error": "invalid JSON"})
+                return
+
+            prompt = "\n".join(str(m.get("content", "")) for m in payload.get("messages", []) if m.get("role") == "user")
+            titles = re.findall(r"- Title: (.*)", prompt)
+            local_title = titles[0] if titles else "the local event"
+            global_title = titles[1] if len(titles) > 1 else "the global event"
+            mechanism = (re.findall(r"mechanism='([^']*)'", prompt) or ["trade"])[0]
+
+            if delay > 0:
+                time.sleep(delay)
+            with lock:
+                state["completions"] += 1
+
+            text = (
+                f"{global_title} shaped {local_title} through {mechanism.replace('_', ' ')}. "
+                f"(Stub paragraph from llm_stub_server.py.)"
+            )
+            self._send_json(200, {
+                "id": f"stub-{state['completions']}",
+                "model": payload.get("model", "stub"),
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+            })
+
+        def log_message(self, format, *args):
+            print(f"[llm stub] {self.address_string()} - {format % args}")
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stub chat completions endpoint for LLM enrichment tests")
+    parser.add_argument("--host", type=str, default="127.0.0.1", help="Interface to bind")
+    parser.add_argument("--port", type=int, default=8765, help="Port to listen on")
+    parser.add_argument("--delay", type=float, default=0.0, help="Seconds to wait before each reply")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(args.delay))
+    print(f"[llm stub] Listening on http://{args.host}:{args.port}/v1/chat/completions")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
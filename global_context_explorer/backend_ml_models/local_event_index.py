@@ -0,0 +1,182 @@
+"""
+Local event matcher used by CausalLogicPipeline._find_local_event.
+
+Matching rules (unchanged from the original row scans):
+1) exact match of the normalized query on a normalized event name or exhibit name
+2) containment (query in "event exhibit", or either name in the query) with enough
+   high-signal query terms present; accepted only if exactly one row qualifies
+3) otherwise the unique row containing every signal term
+
+The index is built once per nodes CSV load, so a request costs a hash lookup plus one
+posting-list walk per query term instead of three `iterrows()` passes that re-normalize
+every name.
+"""
+
+import math
+import re
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+
+# Low-information tokens should not drive matching decisions.
+LOW_SPECIFIC_TERMS = frozenset({
+    "the", "and", "for", "with", "from", "into", "under", "over", "about",
+    "establishment", "introduction", "development", "expansion", "rise", "decline",
+    "formation", "construction", "opening", "arrival", "migration", "impact", "effects",
+    "transition", "growth", "reforms", "convention", "commission", "crisis",
+    "bring", "brings", "bringing", "brought", "introduced", "introducing",
+    "event", "history", "exhibit",
+    "sri", "lanka", "ceylon", "colombo", "kandy",
+})
+
+_NON_ALNUM_RE = re.compile(r"[^a-z0-9\s]+")
+_SPACES_RE = re.compile(r"\s+")
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def normalize_name(s) -> str:
+    """Lowercase, strip punctuation and collapse whitespace."""
+    s = str(s or "").lower().strip()
+    s = _NON_ALNUM_RE.sub(" ", s)
+    return _SPACES_RE.sub(" ", s).strip()
+
+
+def signal_terms(text: str) -> List[str]:
+    """High-signal terms (>= 4 chars, not generic) of an already-normalized text."""
+    return [t for t in _TOKEN_RE.findall(text) if len(t) >= 4 and t not in LOW_SPECIFIC_TERMS]
+
+
+class LocalEventIndex:
+    """Normalized names, exact-match hash and term postings for the local events in a nodes table."""
+
+    def __init__(self, nodes_df: Optional[pd.DataFrame]):
+        """
+        Args:
+            nodes_df: Nodes table (only rows with node_type == 'local' are indexed)
+        """
+        self.records: List[Dict] = []
+        self.names: List[Tuple[str, str]] = []   # (normalized event name, normalized exhibit name)
+        self.hays: List[str] = []
+        self.event_names: List[str] = []          # raw names for Layer 2's local-event filter
+        self.exact: Dict[str, int] = {}
+        self.token_rows: Dict[str, List[int]] = {}
+        self._term_rows: Dict[str, Tuple[int, ...]] = {}
+
+        if nodes_df is None or len(nodes_df) == 0 or "node_type" not in nodes_df.columns:
+            return
+
+        locals_df = nodes_df[nodes_df["node_type"] == "local"]
+        for row in locals_df.to_dict("records"):
+            self._add_row(row)
+
+    def add(self, row: Dict) -> None:
+        """Index one more local node row (appended after the existing rows, as a rebuild would)."""
+        if row.get("node_type") != "local":
+            return
+        self._add_row(row)
+        self._term_rows.clear()
+
+    def _add_row(self, row: Dict) -> None:
+        i = len(self.records)
+        ev = normalize_name(row.get("event_name", ""))
+        ex = normalize_name(row.get("exhibit_name", ""))
+        hay = f"{ev} {ex}"
+        self.records.append({
+            "node_id": row["node_id"],
+            "event_name": row["event_name"],
+            "date": str(row["date"]),
+            "location": row.get("location", ""),
+            "description": row.get("description", ""),
+            "exhibit_name": row.get("exhibit_name", ""),
+        })
+        self.names.append((ev, ex))
+        self.hays.append(hay)
+        if pd.notna(row.get("event_name")):
+            self.event_names.append(str(row["event_name"]))
+
+        # First row in file order wins, as in the original scan.
+        self.exact.setdefault(ev, i)
+        self.exact.setdefault(ex, i)
+        for tok in set(hay.split()):
+            self.token_rows.setdefault(tok, []).append(i)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def rows_containing(self, term: str) -> Tuple[int, ...]:
+        """
+        Rows whose "event exhibit" text contains `term` as a substring.
+
+        Terms are alphanumeric, so a match always lies inside one indexed token; the
+        vocabulary is scanned once per distinct term and the result memoized.
+        """
+        rows = self._term_rows.get(term)
+        if rows is None:
+            hit = set()
+            for tok, tok_rows in self.token_rows.items():
+                if term in tok:
+                    hit.update(tok_rows)
+            rows = tuple(sorted(hit))
+            if len(self._term_rows) > 4096:
+                self._term_rows.clear()
+            self._term_rows[term] = rows
+        return rows
+
+    def _result(self, i: int) -> Tuple[str, Dict]:
+        record = self.records[i]
+        return record["node_id"], dict(record)
+
+    def match(self, text: str) -> Tuple[Optional[str], Optional[Dict]]:
+        """
+        Resolve curator text to a single local event.
+
+        Returns:
+            (node_id, local_event_data) or (None, None) when there is no safe unique match
+        """
+        if not self.records:
+            return None, None
+
+        search_text = normalize_name(text)
+        if not search_text:
+            return None, None
+
+        # 1) Strict exact match on event name / exhibit name.
+        i = self.exact.get(search_text)
+        if i is not None:
+            return self._result(i)
+
+        # 2) Deterministic containment with high-signal term checks.
+        query_terms = signal_terms(search_text)
+        if not query_terms:
+            # Refuse weak/generic matching to avoid accidental wrong LOC mapping.
+            return None, None
+
+        matched = Counter()
+        for t in query_terms:
+            matched.update(self.rows_containing(t))
+
+        # Require substantial overlap, but allow single-signal matches (e.g., "buddhism ...")
+        if len(query_terms) <= 1:
+            required_terms = 1
+        else:
+            required_terms = max(2, math.ceil(0.6 * len(query_terms)))
+
+        candidates = []
+        for i, count in matched.items():
+            if count < required_terms:
+                continue
+            ev, ex = self.names[i]
+            if search_text in self.hays[i] or ev in search_text or ex in search_text:
+                candidates.append(i)
+        if len(candidates) == 1:
+            return self._result(candidates[0])
+
+        # 3) Conservative fallback: all signal terms must match exactly one local row.
+        strict = [i for i, count in matched.items() if count == len(query_terms)]
+        if len(strict) == 1:
+            return self._result(strict[0])
+
+        # No safe unique match.
+        return None, None
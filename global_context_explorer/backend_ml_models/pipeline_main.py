@@ -4,11 +4,21 @@ Complete end-to-end system for Global-Local Historical Influence Discovery
 """
 
 import argparse
+import copy
 import csv
+import json
+import multiprocessing
 import pandas as pd
-from typing import Dict, Optional
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import redirect_stdout
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
 import re
-import math
+import os
+import queue
+import sys
+import threading
+import time
 from pathlib import Path
 
 # Import all layers
@@ -17,11 +27,27 @@ from layer1_knowledge_collection import KnowledgeCollector
 from layer2_candidate_generation import CandidateGenerator
 from layer3_graph_construction import GraphConstructor
 from layer4_gnn_reasoning import GNNReasoner
+from graph_store import GraphStore
 from layer5_constraint_scoring import ConstraintScorer
 from layer6_path_construction import PathConstructor
 from layer7_result_packaging import ResultPackager
+from llm_influence_enricher import async_enabled as enrichment_async_enabled
 from date_utils import year_for_ordering
-from build_nodes_from_history import build_nodes, write_nodes_csv
+from local_event_index import LocalEventIndex
+from result_cache import DataFingerprint, ResultCache, get_result_cache
+from result_transport import dumps as dumps_json, parse_fields, prepare_event, prepare_result
+from pipeline_timing import RequestTimings, activate, layer_clock, record_layer
+from build_nodes_from_history import (
+    EXPECTED_COLUMNS as HISTORY_COLUMNS,
+    append_nodes_csv,
+    build_nodes,
+    node_from_history_row,
+    write_nodes_csv,
+)
+
+
+# Receives progress events from CausalLogicPipeline.process (see _emit).
+ProgressCallback = Callable[[Dict], None]
 
 
 class CausalLogicPipeline:
@@ -38,6 +64,9 @@ class CausalLogicPipeline:
         self.nodes_file = nodes_file
         self.edges_file = edges_file
 
+        # One loaded graph + nodes table, shared with Layers 3 and 4
+        self.graph_store = GraphStore.acquire(nodes_file, edges_file)
+
         # Initialize all layers
         self.layer0 = CuratorInputParser()
         self.layer1 = KnowledgeCollector()
@@ -48,8 +77,23 @@ class CausalLogicPipeline:
         self.layer6 = PathConstructor()
         self.layer7 = ResultPackager()
         
-        # Load nodes for lookup
-        self.nodes_df = pd.read_csv(nodes_file) if nodes_file else None
+        # Index local nodes for lookup
+        self.local_index = LocalEventIndex(self.nodes_df)
+
+        # Finished results keyed by request + data version (CSV hashes, model file)
+        self.result_cache: Optional[ResultCache] = get_result_cache()
+        self.data_fingerprint = DataFingerprint([nodes_file, edges_file], [self.layer4.model_path])
+
+    @property
+    def nodes_df(self) -> Optional[pd.DataFrame]:
+        """Nodes table of the shared graph store."""
+        return self.graph_store.nodes_df
+
+    def close(self) -> None:
+        """Release the shared graph store (held by the pipeline and Layers 3/4)."""
+        self.layer3.close()
+        self.layer4.close()
+        self.graph_store.release()
     
     def process(
         self,
@@ -61,6 +105,7 @@ class CausalLogicPipeline:
         allow_adhoc: bool = False,
         auto_add_missing_local: bool = False,
         history_file: str = "History (1).csv",
+        on_event: Optional[ProgressCallback] = None,
     ) -> Dict:
         """
         Process curator input through all 7 layers.
@@ -70,21 +115,141 @@ class CausalLogicPipeline:
             date: Optional date
             location: Optional location
             top_k: Number of top results to return
+            on_event: Optional callback receiving progress events as each layer
+                finishes ({"event": "layer", "layer": n, "name", "seconds", "data"}),
+                then {"event": "result", "result": ...}
         
         Returns:
             Complete results dictionary
         """
-        print("=" * 80)
-        print("Causal Logic Engine - Processing Request")
-        print("=" * 80)
-        print(f"\nInput: {input_text}")
-        if date:
-            print(f"Date: {date}")
-        if location:
-            print(f"Location: {location}")
-        print("\n" + "-" * 80)
+        # Layers, Layer 1 HTTP calls and GNN calls record into this (see pipeline_timing.py)
+        with activate(RequestTimings()) as timings:
+            started = time.time()
+            cache_key, fingerprint = None, None
+            if self.result_cache is not None:
+                fingerprint = self.data_fingerprint.current()
+                cache_key = self.result_cache.make_key(
+                    fingerprint,
+                    input_text,
+                    date=date,
+                    location=location,
+                    top_k=top_k,
+                    local_event_override=local_event_override,
+                    allow_adhoc=allow_adhoc,
+                    auto_add_missing_local=auto_add_missing_local,
+                    history_file=history_file,
+                )
+                cached = self.result_cache.get(cache_key)
+                if cached is not None:
+                    print(f"[result cache] hit for: {input_text}")
+                    cached["timings"] = {**timings.as_dict(), "cached": True}
+                    _emit(on_event, "start", input=input_text, date=date, location=location, top_k=top_k)
+                    _emit(on_event, "result", result=cached, seconds=round(time.time() - started, 3), cached=True)
+                    return cached
+
+            _emit(on_event, "start", input=input_text, date=date, location=location, top_k=top_k)
+            print("=" * 80)
+            print("Causal Logic Engine - Processing Request")
+            print("=" * 80)
+            print(f"\nInput: {input_text}")
+            if date:
+                print(f"Date: {date}")
+            if location:
+                print(f"Location: {location}")
+            print("\n" + "-" * 80)
+        
+            query, local_event_id, local_event_data, early_response = self._prepare_request(
+                input_text,
+                date=date,
+                location=location,
+                local_event_override=local_event_override,
+                allow_adhoc=allow_adhoc,
+                auto_add_missing_local=auto_add_missing_local,
+                history_file=history_file,
+                on_event=on_event,
+            )
+            if early_response is not None:
+                _emit(on_event, "result", result=early_response, seconds=round(time.time() - started, 3))
+                return early_response
+
+            evidence = self._collect_evidence(query, on_event=on_event)
+            # Streaming callers can get the result before the LLM paragraphs (INFLUENCE_LLM_ASYNC)
+            defer_enrichment = on_event is not None and enrichment_async_enabled()
+            results = self._run_layers_2_to_7(
+                query, local_event_id, local_event_data, evidence, top_k,
+                on_event=on_event, defer_enrichment=defer_enrichment,
+            )
+            enrichment_pending = (results.get("enrichment") or {}).get("status") == "pending"
         
+            print("\n" + "=" * 80)
+            print("Processing Complete!")
+            print("=" * 80 + "\n")
+
+            # Skip results of runs that changed the data (auto-add); their key is already stale.
+            cacheable = cache_key is not None and "error" not in results and self.data_fingerprint.current() == fingerprint
+            if cacheable and not enrichment_pending:
+                self.result_cache.put(cache_key, results)
+            results["timings"] = timings.as_dict()
+
+            if enrichment_pending:
+                # Send a snapshot: results keeps changing while the paragraphs are applied.
+                _emit(on_event, "result", result=copy.deepcopy(results), seconds=round(time.time() - started, 3))
+                updates = self.layer7.finish_enrichment(results)
+                _emit(on_event, "enrichment", influences=updates, seconds=round(time.time() - started, 3))
+                if cacheable:
+                    self.result_cache.put(cache_key, {k: v for k, v in results.items() if k != "timings"})
+                return results
+        
+            _emit(on_event, "result", result=results, seconds=round(time.time() - started, 3))
+            return results
+
+    def process_events(self, input_text: str, **kwargs) -> Iterator[Dict]:
+        """
+        Generator form of `process()`: yields the same progress events while the run
+        continues on a background thread, ending with a "result" (or "error") event.
+
+        Args:
+            input_text: Local event text
+            **kwargs: Any other `process()` argument except on_event
+        """
+        events: "queue.Queue" = queue.Queue()
+        done = object()
+
+        def run():
+            try:
+                self.process(input_text, on_event=events.put, **kwargs)
+            except Exception as e:
+                events.put({"event": "error", "error": f"Pipeline failed: {e}"})
+            finally:
+                events.put(done)
+
+        threading.Thread(target=run, name="pipeline-events", daemon=True).start()
+        while True:
+            event = events.get()
+            if event is done:
+                return
+            yield event
+
+    def _prepare_request(
+        self,
+        input_text: str,
+        date: Optional[str] = None,
+        location: Optional[str] = None,
+        local_event_override: Optional[Dict] = None,
+        allow_adhoc: bool = False,
+        auto_add_missing_local: bool = False,
+        history_file: str = "History (1).csv",
+        on_event: Optional[ProgressCallback] = None,
+    ) -> Tuple[Dict, Optional[str], Optional[Dict], Optional[Dict]]:
+        """
+        Layer 0 + local event resolution.
+
+        Returns:
+            (query, local_event_id, local_event_data, early_response). When
+            early_response is set, processing stops and it is returned as the result.
+        """
         # Layer 0: Curator Input
+        layer_started = layer_clock()
         print("\n[Layer 0] Parsing curator input...")
         query = self.layer0.parse(input_text, date, location)
         print(f"[OK] Parsed query: {query['local_event_text']}")
@@ -103,7 +268,7 @@ class CausalLogicPipeline:
                     history_file=history_file,
                 )
                 if not add_result.get("ok"):
-                    return {
+                    return query, None, None, {
                         "error": add_result.get("error", "Failed to auto-add missing local event."),
                         "suggestion": add_result.get("suggestion", "Please add event manually and rerun."),
                     }
@@ -113,7 +278,7 @@ class CausalLogicPipeline:
                 print(f"[OK] Added new local event: {local_event_id} -> {history_file}")
 
             if not local_event_id and not allow_adhoc:
-                return self._build_new_event_required_response(
+                return query, None, None, self._build_new_event_required_response(
                     input_text=input_text,
                     date=date,
                     location=location,
@@ -164,8 +329,19 @@ class CausalLogicPipeline:
             # Re-extract better keywords/entities from the actual event context
             query['keywords'] = self.layer0._extract_keywords(knowledge_text)
             query['entities'] = self.layer0._extract_entities(knowledge_text)
-        
+
+        _emit_layer(on_event, 0, "parse", layer_started, {
+            "local_event_id": local_event_id,
+            "local_event_text": query.get('local_event_text', ''),
+            "entities": query.get('entities', []),
+            "keywords": query.get('keywords', [])[:5],
+        }, counts={"entities": len(query.get('entities', [])), "keywords": len(query.get('keywords', []))})
+        return query, local_event_id, local_event_data, None
+
+    def _collect_evidence(self, query: Dict, on_event: Optional[ProgressCallback] = None) -> Dict:
+        """Layer 1: collect evidence for a prepared query."""
         # Layer 1: Knowledge Collection
+        layer_started = layer_clock()
         print("\n[Layer 1] Collecting knowledge from sources...")
         evidence = self.layer1.collect(query)
         print(f"[OK] Collected {len(evidence['raw_text_evidence'])} evidence snippets")
@@ -195,36 +371,67 @@ class CausalLogicPipeline:
                     print(f"  {i}. {t} -> {u}")
                 else:
                     print(f"  {i}. {t}")
-        
+
+        _emit_layer(on_event, 1, "knowledge", layer_started, {
+            "evidence_snippets": len(evidence['raw_text_evidence']),
+            "sources": [{"title": t, "url": u} for t, u in uniq_sources[:10]],
+        }, counts={"evidence_snippets": len(evidence['raw_text_evidence']), "sources": len(uniq_sources)})
+        return evidence
+
+    def _run_layers_2_to_7(
+        self,
+        query: Dict,
+        local_event_id: str,
+        local_event_data: Dict,
+        evidence: Dict,
+        top_k: int = 10,
+        on_event: Optional[ProgressCallback] = None,
+        defer_enrichment: bool = False,
+    ) -> Dict:
+        """
+        Layers 2-7 for a prepared query and its evidence.
+
+        With defer_enrichment, Layer 7 leaves the LLM paragraphs pending
+        (see ResultPackager.finish_enrichment).
+        """
         # Layer 2: Candidate Generation
+        layer_started = layer_clock()
         print("\n[Layer 2] Generating candidate global events...")
-        # Fix Issue 3: Collect all local event names to filter out from global candidates
-        local_event_names = []
-        if self.nodes_df is not None:
-            local_events = self.nodes_df[self.nodes_df['node_type'] == 'local']
-            local_event_names = [str(row['event_name']) for _, row in local_events.iterrows() if pd.notna(row.get('event_name'))]
-        # Also add the current local event name if available
-        if local_event_data and local_event_data.get('event_name'):
-            local_event_names.append(local_event_data['event_name'])
+        local_event_names = self._local_event_names(local_event_data)
         candidates = self.layer2.generate_candidates(query, evidence, top_k=50, local_event_names=local_event_names)
         print(f"[OK] Generated {len(candidates)} candidate global events")
+        _emit_layer(on_event, 2, "candidates", layer_started, {
+            "candidates": [_candidate_summary(c) for c in candidates[:top_k]],
+        }, counts={"candidates": len(candidates)})
         
         # Layer 3: Graph Construction
+        layer_started = layer_clock()
         print("\n[Layer 3] Constructing graph...")
         graph = self.layer3.construct_subgraph(local_event_id, candidates, evidence, local_event_data=local_event_data)
         print(f"[OK] Constructed graph with {len(graph['nodes'])} nodes and {len(graph['edges'])} edges")
+        graph_counts = {"nodes": len(graph['nodes']), "edges": len(graph['edges'])}
+        _emit_layer(on_event, 3, "graph", layer_started, graph_counts, counts=graph_counts)
         
         # Layer 4: GNN Reasoning
+        layer_started = layer_clock()
         print("\n[Layer 4] Running GNN reasoning...")
         predictions = self.layer4.predict_links(graph, local_event_id, top_k=top_k)
         print(f"[OK] Generated {len(predictions)} GNN predictions")
+        _emit_layer(on_event, 4, "gnn", layer_started, {
+            "predictions": [_prediction_summary(p, 'causal_strength_score') for p in predictions[:top_k]],
+        }, counts={"predictions": len(predictions)})
         
         # Layer 5: Constraint + Evidence Scoring
+        layer_started = layer_clock()
         print("\n[Layer 5] Applying constraints and scoring...")
         scored_predictions = self.layer5.score_links(predictions, graph, evidence)
         print(f"[OK] Scored {len(scored_predictions)} predictions")
+        _emit_layer(on_event, 5, "scoring", layer_started, {
+            "predictions": [_prediction_summary(p, 'final_score') for p in scored_predictions[:top_k]],
+        }, counts={"predictions": len(scored_predictions)})
         
         # Layer 6: Path Construction
+        layer_started = layer_clock()
         print("\n[Layer 6] Constructing explanation paths...")
         paths = {}
         for prediction in scored_predictions[:top_k]:
@@ -232,24 +439,248 @@ class CausalLogicPipeline:
             explanation_paths = self.layer6.construct_paths(prediction, graph, max_paths=2)
             paths[pred_id] = explanation_paths
         print(f"[OK] Constructed paths for {len(paths)} predictions")
+        _emit_layer(on_event, 6, "paths", layer_started, {
+            "paths": {pred_id: len(p) for pred_id, p in paths.items()},
+        }, counts={"predictions": len(paths), "paths": sum(len(p) for p in paths.values())})
         
         # Layer 7: Result Packaging
+        layer_started = layer_clock()
         print("\n[Layer 7] Packaging results...")
         results = self.layer7.package_results(
             local_event_id,
             local_event_data,
             scored_predictions,
             paths,
-            evidence
+            evidence,
+            defer_enrichment=defer_enrichment
         )
         print("[OK] Results packaged")
-        
-        print("\n" + "=" * 80)
-        print("Processing Complete!")
-        print("=" * 80 + "\n")
-        
+        _emit_layer(on_event, 7, "package", layer_started, {
+            "influences": len(results.get('top_influences', []) or []),
+        }, counts={"influences": len(results.get('top_influences', []) or [])})
+
         return results
 
+    def _local_event_names(self, local_event_data: Optional[Dict]) -> List[str]:
+        """Names Layer 2 must not return as global candidates (Fix Issue 3)."""
+        # Fix Issue 3: Collect all local event names to filter out from global candidates
+        local_event_names = list(self.local_index.event_names)
+        # Also add the current local event name if available
+        if local_event_data and local_event_data.get('event_name'):
+            local_event_names.append(local_event_data['event_name'])
+        return local_event_names
+
+    def process_batch(
+        self,
+        input_path: str,
+        output_path: str = "batch_results.jsonl",
+        workers: Optional[int] = None,
+        top_k: int = 10,
+        resume: bool = True,
+        allow_adhoc: bool = False,
+        collect_workers: int = 4,
+    ) -> Dict:
+        """
+        Run many local events through the warm pipeline and write one JSON line per event.
+
+        Layer 0 and local-event matching run here; Layer 1 is fetched once per distinct
+        evidence query (events that map to the same Wikipedia lookups share it) on a few
+        threads, and every event's Layer 2 documents are added to this pipeline's TF-IDF
+        corpus. Layers 2-7 then run on a process pool that inherits this pipeline (graph,
+        GNN weights, cached base-graph embeddings and the frozen corpus) instead of
+        rebuilding it per event.
+
+        Results are appended and flushed as they finish, so an interrupted run can be
+        restarted with the same output file: events already written with status "ok"
+        are skipped.
+
+        Args:
+            input_path: CSV (event_name/input, date, location, ...) or JSONL file
+            output_path: JSONL file to append results to
+            workers: Processes for Layers 2-7 (default: CPU count, max 4; <=1 runs in-process)
+            top_k: Default number of results per event (an item may override it)
+            resume: Skip events already completed in output_path
+            allow_adhoc: Default for events not found in nodes/history
+            collect_workers: Concurrent Layer 1 collections
+
+        Returns:
+            Summary counts for the run
+        """
+        started = time.time()
+        items = load_batch_items(input_path)
+        done = _read_completed_batch_keys(output_path) if resume else set()
+
+        pending = []
+        queued = set()
+        for item in items:
+            if item["key"] in done or item["key"] in queued:
+                continue
+            queued.add(item["key"])
+            pending.append(item)
+
+        summary = {
+            "input": str(input_path),
+            "output": str(output_path),
+            "total": len(items),
+            "skipped": len(items) - len(pending),
+            "ok": 0,
+            "error": 0,
+        }
+        print(f"[batch] {len(items)} events, {summary['skipped']} already done, {len(pending)} to run")
+        if not pending:
+            summary["seconds"] = round(time.time() - started, 3)
+            return summary
+
+        if workers is None:
+            workers = min(4, os.cpu_count() or 1)
+        console = sys.stdout
+        position = {"n": summary["skipped"]}
+
+        if resume:
+            _terminate_partial_line(output_path)
+        out = open(output_path, "a" if resume else "w", encoding="utf-8")
+        devnull = open(os.devnull, "w")
+
+        def record(item: Dict, status: str, local_event_id: Optional[str], result: Dict, seconds: float = 0.0):
+            line = {
+                "key": item["key"],
+                "input": item["input"],
+                "status": status,
+                "local_event_id": local_event_id,
+                "result": result,
+                "seconds": round(seconds, 3),
+            }
+            out.write(dumps_json(line) + "\n")
+            out.flush()
+            summary[status] += 1
+            position["n"] += 1
+            print(f"[batch] {position['n']}/{len(items)} {item['key']} {status}", file=console, flush=True)
+
+        analyzer = None
+        try:
+            # Per-event layer logging would interleave across threads; progress lines go to the console.
+            with redirect_stdout(devnull):
+                # Layer 0 + local event lookup (cheap, in this process)
+                groups: Dict[str, List[Tuple[Dict, Dict, str, Dict]]] = {}
+                for item in pending:
+                    item_started = time.time()
+                    try:
+                        query, local_event_id, local_event_data, early_response = self._prepare_request(
+                            item["input"],
+                            date=item.get("date"),
+                            location=item.get("location"),
+                            local_event_override=item.get("local_event_override"),
+                            allow_adhoc=bool(item.get("allow_adhoc", allow_adhoc)),
+                        )
+                    except Exception as e:
+                        record(item, "error", None, {"error": f"Layer 0 failed: {e}"}, time.time() - item_started)
+                        continue
+                    if early_response is not None:
+                        record(item, "error", local_event_id, early_response, time.time() - item_started)
+                        continue
+                    groups.setdefault(_evidence_key(query), []).append((item, query, local_event_id, local_event_data))
+
+                print(f"[batch] {len(groups)} distinct Layer 1 queries for {sum(len(g) for g in groups.values())} events", file=console, flush=True)
+
+                # Layer 1 for every group first. Layer 2 scores against the accumulated TF-IDF
+                # corpus, so all of the batch's documents go into this process' corpus before
+                # any analysis runs; workers then score against that frozen snapshot and the
+                # results do not depend on which worker ran which event in what order.
+                analyses: List[Tuple[Dict, Tuple]] = []
+                with ThreadPoolExecutor(max_workers=max(1, int(collect_workers)), thread_name_prefix="batch-layer1") as collector:
+                    collect_futures = {
+                        collector.submit(self._collect_evidence, members[0][1]): members
+                        for members in groups.values()
+                    }
+                    for future in collect_futures:
+                        members = collect_futures[future]
+                        try:
+                            evidence = future.result()
+                        except Exception as e:
+                            for item, _, local_event_id, _ in members:
+                                record(item, "error", local_event_id, {"error": f"Layer 1 failed: {e}"})
+                            continue
+                        for item, query, local_event_id, local_event_data in members:
+                            self.layer2.index_documents(
+                                query, evidence, top_k=50, local_event_names=self._local_event_names(local_event_data)
+                            )
+                            args = (query, local_event_id, local_event_data, evidence, int(item.get("top_k") or top_k))
+                            analyses.append((item, args))
+                self.layer2.idf_model.save()
+
+                analyzer, in_process = self._start_batch_analyzer(workers)
+                analyze_futures: Dict = {}
+
+                def submit_analysis(item: Dict, args: Tuple):
+                    if in_process:
+                        future = analyzer.submit(_run_batch_analysis, self, *args)
+                    else:
+                        future = analyzer.submit(_batch_analyze, *args)
+                    analyze_futures[future] = (item, args)
+
+                for item, args in analyses:
+                    submit_analysis(item, args)
+
+                while analyze_futures:
+                    finished, _ = wait(list(analyze_futures), return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        item, args = analyze_futures.pop(future)
+                        try:
+                            result, seconds = future.result()
+                        except BrokenProcessPool:
+                            # A worker died (e.g. out of memory): finish the rest in this process.
+                            if not in_process:
+                                print("[batch] Warning: worker pool failed; continuing in-process", file=console, flush=True)
+                                analyzer.shutdown(wait=False, cancel_futures=True)
+                                analyzer, in_process = ThreadPoolExecutor(max_workers=1), True
+                            submit_analysis(item, args)
+                            continue
+                        except Exception as e:
+                            record(item, "error", args[1], {"error": f"Pipeline failed: {e}"})
+                            continue
+                        record(item, "ok", args[1], result, seconds)
+        finally:
+            if analyzer is not None:
+                analyzer.shutdown(wait=True, cancel_futures=True)
+            devnull.close()
+            out.close()
+
+        summary["seconds"] = round(time.time() - started, 3)
+        print(f"[batch] done: {summary['ok']} ok, {summary['error']} error, {summary['skipped']} skipped in {summary['seconds']:.1f}s")
+        return summary
+
+    def _start_batch_analyzer(self, workers: int):
+        """
+        Executor for Layers 2-7: a process pool sharing this pipeline, or a single
+        in-process thread when workers <= 1 or processes cannot be started.
+
+        Returns:
+            (executor, in_process)
+        """
+        global _BATCH_PIPELINE
+        if workers <= 1:
+            return ThreadPoolExecutor(max_workers=1), True
+
+        try:
+            # fork hands the already-built pipeline to every worker; spawn builds it once per worker.
+            methods = multiprocessing.get_all_start_methods()
+            ctx = multiprocessing.get_context("fork" if "fork" in methods else "spawn")
+            forked = ctx.get_start_method() == "fork"
+            _BATCH_PIPELINE = self if forked else None
+            pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=ctx,
+                initializer=_batch_worker_init,
+                initargs=(self.nodes_file, self.edges_file, None if forked else self.layer2.idf_model.snapshot()),
+            )
+            # Start every worker now, so none forks while the analysis threads run.
+            for future in [pool.submit(_batch_noop) for _ in range(workers)]:
+                future.result()
+            return pool, False
+        except Exception as e:
+            print(f"[batch] Warning: could not start {workers} workers ({e}); running in-process")
+            return ThreadPoolExecutor(max_workers=1), True
+
     def _build_new_event_required_response(
         self,
         input_text: str,
@@ -298,13 +729,31 @@ class CausalLogicPipeline:
             },
         }
 
+    def reload_data(self):
+        """
+        Re-read the nodes/edges CSVs into the graph-dependent layers.
+        Used by long-lived workers after add_history_event.py / add_edge.py /
+        remove_history_event.py change the data on disk.
+        """
+        self._refresh_after_nodes_update()
+
     def _refresh_after_nodes_update(self):
-        """Reload nodes and graph-dependent layers after nodes CSV changes."""
-        self.nodes_df = pd.read_csv(self.nodes_file) if self.nodes_file else None
-        self.layer3 = GraphConstructor(self.nodes_file, self.edges_file)
-        self.layer4 = GNNReasoner(self.nodes_file, self.edges_file)
+        """Reload the shared graph store after nodes CSV changes and resync the layers."""
+        self.graph_store.refresh()
+        self.local_index = LocalEventIndex(self.nodes_df)
+        self.layer4.sync_graph()
 
     def _next_loc_id(self, history_path: Path) -> str:
+        # Reuse the last scan while the file is unchanged since we scanned/appended it.
+        try:
+            st = history_path.stat()
+            stamp = (str(history_path.resolve()), st.st_size, st.st_mtime_ns)
+        except OSError:
+            stamp = None
+        cached = getattr(self, "_loc_id_scan", None)
+        if stamp is not None and cached and cached[0] == stamp:
+            return f"LOC_{cached[1] + 1:03d}"
+
         max_n = 0
         if history_path.exists():
             with history_path.open("r", encoding="utf-8", newline="") as f:
@@ -318,8 +767,60 @@ class CausalLogicPipeline:
                             max_n = max(max_n, int(m.group(1)))
                         except Exception:
                             pass
+        self._loc_id_scan = (stamp, max_n) if stamp is not None else None
         return f"LOC_{max_n + 1:03d}"
 
+    def _remember_appended_loc_id(self, history_path: Path, node_id: str) -> None:
+        """After appending `node_id` to history, keep the id scan valid for the next auto-add."""
+        m = re.match(r"LOC_(\d+)", node_id)
+        try:
+            st = history_path.stat()
+            self._loc_id_scan = ((str(history_path.resolve()), st.st_size, st.st_mtime_ns), int(m.group(1)))
+        except (OSError, AttributeError):
+            self._loc_id_scan = None
+
+    def _add_local_node_incremental(self, node: Dict) -> bool:
+        """
+        Append one new local node to the nodes CSV and to the in-memory state (nodes table,
+        matcher index, Layer 3/4 graphs, cached embeddings) instead of rebuilding all nodes
+        and reloading both graph layers.
+
+        Returns:
+            False if the caller must fall back to a full rebuild + reload
+        """
+        nodes_df = self.nodes_df
+        if nodes_df is None or not self.nodes_file:
+            return False
+        node_id = node["node_id"]
+        if (nodes_df["node_id"] == node_id).any():
+            return False
+        graph_data = self.graph_store.data
+        if graph_data is None or node_id in graph_data.node_to_idx:
+            # Unknown graph state, or the edges CSV already references this id.
+            return False
+
+        if not append_nodes_csv([node], Path(self.nodes_file)):
+            return False
+
+        # Same values a re-read of the CSV would give (empty -> NaN, numeric columns stay numeric).
+        record = {}
+        for col in nodes_df.columns:
+            value = node.get(col, "")
+            if value == "" or value is None:
+                record[col] = float("nan")
+            elif pd.api.types.is_numeric_dtype(nodes_df[col]):
+                record[col] = pd.to_numeric(value, errors="coerce")
+            else:
+                record[col] = str(value)
+
+        if self.graph_store.add_local_node(record) is None:
+            # Nodes CSV is already written; a reload picks the node up.
+            self._refresh_after_nodes_update()
+            return True
+        self.local_index.add(record)
+        self.layer4.sync_graph()
+        return True
+
     def _auto_add_local_event(
         self,
         input_text: str,
@@ -329,8 +830,9 @@ class CausalLogicPipeline:
         history_file: str,
     ) -> Dict:
         """
-        Auto-add a missing local event to history, rebuild nodes, reload pipeline layers,
-        and return the newly created local event metadata.
+        Auto-add a missing local event to history, append it to the nodes CSV and the
+        in-memory graphs (full rebuild + reload only as a fallback), and return the newly
+        created local event metadata.
         """
         try:
             override = local_event_override or {}
@@ -367,10 +869,13 @@ class CausalLogicPipeline:
             with history_path.open("a", encoding="utf-8", newline="") as f:
                 writer = csv.writer(f)
                 writer.writerow(row)
+            self._remember_appended_loc_id(history_path, node_id)
 
-            nodes = build_nodes(history_path)
-            write_nodes_csv(nodes, Path(self.nodes_file))
-            self._refresh_after_nodes_update()
+            node = node_from_history_row(dict(zip(HISTORY_COLUMNS, row)))
+            if not self._add_local_node_incremental(node):
+                nodes = build_nodes(history_path)
+                write_nodes_csv(nodes, Path(self.nodes_file))
+                self._refresh_after_nodes_update()
 
             return {
                 "ok": True,
@@ -395,105 +900,189 @@ class CausalLogicPipeline:
         """Find matching local event from database."""
         if self.nodes_df is None:
             return None, None
+        return self.local_index.match(query.get("local_event_text", ""))
 
-        locals_df = self.nodes_df[self.nodes_df["node_type"] == "local"].copy()
-        if len(locals_df) == 0:
-            return None, None
 
-        def _norm(s: str) -> str:
-            s = str(s or "").lower().strip()
-            s = re.sub(r"[^a-z0-9\s]+", " ", s)
-            s = re.sub(r"\s+", " ", s).strip()
-            return s
-
-        # Low-information tokens should not drive matching decisions.
-        low_specific = {
-            "the", "and", "for", "with", "from", "into", "under", "over", "about",
-            "establishment", "introduction", "development", "expansion", "rise", "decline",
-            "formation", "construction", "opening", "arrival", "migration", "impact", "effects",
-            "transition", "growth", "reforms", "convention", "commission", "crisis",
-            "bring", "brings", "bringing", "brought", "introduced", "introducing",
-            "event", "history", "exhibit",
-            "sri", "lanka", "ceylon", "colombo", "kandy",
-        }
+def _emit(on_event: Optional[ProgressCallback], event: str, **fields) -> None:
+    """Send one progress event; a failing callback never breaks the run."""
+    if on_event is None:
+        return
+    try:
+        on_event({"event": event, **fields})
+    except Exception as e:
+        print(f"[progress] Warning: event callback failed: {e}")
 
-        def _signal_terms(text: str):
-            toks = re.findall(r"[a-z0-9]+", _norm(text))
-            return [t for t in toks if len(t) >= 4 and t not in low_specific]
 
-        search_text = _norm(query.get("local_event_text", ""))
-        if not search_text:
-            return None, None
+def _emit_layer(
+    on_event: Optional[ProgressCallback],
+    layer: int,
+    name: str,
+    started: Tuple[float, float],
+    data: Dict,
+    counts: Optional[Dict] = None,
+) -> None:
+    """Record the finished layer in the request timings and send its progress event."""
+    seconds = record_layer(layer, name, started, counts)
+    if on_event is None:
+        return
+    _emit(on_event, "layer", layer=layer, name=name, seconds=round(seconds, 4), data=data)
 
-        # 1) Strict exact match on event name / exhibit name.
-        for _, row in locals_df.iterrows():
-            ev = _norm(row.get("event_name", ""))
-            ex = _norm(row.get("exhibit_name", ""))
-            if search_text == ev or search_text == ex:
-                return row["node_id"], {
-                    "node_id": row["node_id"],
-                    "event_name": row["event_name"],
-                    "date": str(row["date"]),
-                    "location": row.get("location", ""),
-                    "description": row.get("description", ""),
-                    "exhibit_name": row.get("exhibit_name", ""),
-                }
 
-        # 2) Deterministic containment with high-signal term checks.
-        query_terms = _signal_terms(search_text)
-        if not query_terms:
-            # Refuse weak/generic matching to avoid accidental wrong LOC mapping.
-            return None, None
+def _candidate_summary(candidate: Dict) -> Dict:
+    event = candidate.get('global_event') or {}
+    return {
+        "id": event.get('node_id') or event.get('id'),
+        "name": event.get('event_name') or event.get('name') or event.get('title'),
+        "date": event.get('date', ''),
+        "relevance_score": candidate.get('relevance_score'),
+    }
 
-        candidates = []
-        for _, row in locals_df.iterrows():
-            ev = _norm(row.get("event_name", ""))
-            ex = _norm(row.get("exhibit_name", ""))
-            hay = f"{ev} {ex}"
-
-            if search_text in hay or ev in search_text or ex in search_text:
-                matched_terms = sum(1 for t in query_terms if t in hay)
-                # Require substantial overlap, but allow single-signal matches (e.g., "buddhism ...")
-                if len(query_terms) <= 1:
-                    required_terms = 1
-                else:
-                    required_terms = max(2, math.ceil(0.6 * len(query_terms)))
-                if matched_terms >= required_terms:
-                    candidates.append((row, matched_terms))
-
-        if len(candidates) == 1:
-            row = candidates[0][0]
-            return row["node_id"], {
-                "node_id": row["node_id"],
-                "event_name": row["event_name"],
-                "date": str(row["date"]),
-                "location": row.get("location", ""),
-                "description": row.get("description", ""),
-                "exhibit_name": row.get("exhibit_name", ""),
-            }
 
-        # 3) Conservative fallback: all signal terms must match exactly one local row.
-        strict = []
-        for _, row in locals_df.iterrows():
-            ev = _norm(row.get("event_name", ""))
-            ex = _norm(row.get("exhibit_name", ""))
-            hay = f"{ev} {ex}"
-            if all(t in hay for t in query_terms):
-                strict.append(row)
-
-        if len(strict) == 1:
-            row = strict[0]
-            return row["node_id"], {
-                "node_id": row["node_id"],
-                "event_name": row["event_name"],
-                "date": str(row["date"]),
-                "location": row.get("location", ""),
-                "description": row.get("description", ""),
-                "exhibit_name": row.get("exhibit_name", ""),
-            }
+def _prediction_summary(prediction: Dict, score_key: str) -> Dict:
+    meta = prediction.get('metadata') or {}
+    return {
+        "id": prediction.get('global_event_id'),
+        "name": meta.get('event_name') or meta.get('name'),
+        score_key: prediction.get(score_key),
+    }
+
+
+# Pipeline used by batch worker processes (inherited on fork, built in the initializer on spawn).
+_BATCH_PIPELINE: Optional[CausalLogicPipeline] = None
+
+
+def _batch_worker_init(nodes_file: str, edges_file: str, idf_snapshot: Optional[Dict] = None) -> None:
+    """Process-pool initializer for CausalLogicPipeline.process_batch."""
+    global _BATCH_PIPELINE
+    # Per-event logs from several processes are noise; results go to the JSONL file.
+    sys.stdout = open(os.devnull, "w")
+    try:
+        import torch
+        torch.set_num_threads(1)
+    except Exception:
+        pass
+    if _BATCH_PIPELINE is None:
+        _BATCH_PIPELINE = CausalLogicPipeline(nodes_file, edges_file)
+    # Score against the corpus the parent built for the whole batch (inherited on fork,
+    # passed in on spawn); only the parent writes the corpus.
+    idf_model = getattr(_BATCH_PIPELINE.layer2, "idf_model", None)
+    if idf_model is not None:
+        idf_model.freeze(idf_snapshot)
+
+
+def _batch_noop() -> int:
+    return os.getpid()
 
-        # No safe unique match.
-        return None, None
+
+def _run_batch_analysis(
+    pipeline: CausalLogicPipeline,
+    query: Dict,
+    local_event_id: str,
+    local_event_data: Dict,
+    evidence: Dict,
+    top_k: int,
+) -> Tuple[Dict, float]:
+    started = time.time()
+    results = pipeline._run_layers_2_to_7(query, local_event_id, local_event_data, evidence, top_k)
+    return results, time.time() - started
+
+
+def _batch_analyze(query: Dict, local_event_id: str, local_event_data: Dict, evidence: Dict, top_k: int) -> Tuple[Dict, float]:
+    return _run_batch_analysis(_BATCH_PIPELINE, query, local_event_id, local_event_data, evidence, top_k)
+
+
+def _evidence_key(query: Dict) -> str:
+    """Everything Layer 1 reads from a query; equal keys produce the same evidence."""
+    date_range = query.get("date_range") or {}
+    return json.dumps(
+        [
+            query.get("local_event_text", ""),
+            list(query.get("entities", [])),
+            list(query.get("keywords", [])[:5]),
+            date_range.get("year") if isinstance(date_range, dict) else None,
+        ],
+        sort_keys=True,
+        default=str,
+    )
+
+
+def load_batch_items(path: str) -> List[Dict]:
+    """
+    Read batch input: JSONL (one object or string per line) or CSV.
+
+    A CSV with a node_type column (e.g. nodes_from_history.csv) is filtered to local
+    events, so the nodes file itself can be passed to analyze every LOC_* event.
+
+    Returns:
+        Items with input/date/location/top_k/allow_adhoc/local_event_override and a
+        stable "key" (id/node_id if given, else input|date|location).
+    """
+    raw: List[Dict] = []
+    if str(path).lower().endswith(".csv"):
+        with open(path, "r", encoding="utf-8-sig", newline="") as f:
+            rows = list(csv.DictReader(f))
+        if rows and "node_type" in rows[0]:
+            rows = [r for r in rows if str(r.get("node_type") or "").strip() == "local"]
+        raw = rows
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            for line_no, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    obj = json.loads(line)
+                except ValueError:
+                    print(f"[batch] Warning: skipping unparsable line {line_no} in {path}")
+                    continue
+                raw.append({"input": obj} if isinstance(obj, str) else obj)
+
+    items = []
+    for row in raw:
+        if not isinstance(row, dict):
+            continue
+        text = str(row.get("input") or row.get("input_text") or row.get("event_name") or row.get("title") or "").strip()
+        if not text:
+            continue
+        date = str(row.get("date") or "").strip() or None
+        location = str(row.get("location") or "").strip() or None
+        key = str(row.get("id") or row.get("node_id") or "").strip() or f"{text}|{date or ''}|{location or ''}"
+        item = {"key": key, "input": text, "date": date, "location": location}
+        if str(row.get("top_k") or "").strip():
+            item["top_k"] = int(row["top_k"])
+        if "allow_adhoc" in row and str(row["allow_adhoc"]).strip() != "":
+            item["allow_adhoc"] = str(row["allow_adhoc"]).strip().lower() in ("1", "true", "yes", "on")
+        if isinstance(row.get("local_event_override"), dict):
+            item["local_event_override"] = row["local_event_override"]
+        items.append(item)
+    return items
+
+
+def _read_completed_batch_keys(path: str) -> set:
+    """Keys already written with status "ok" (unreadable lines are ignored)."""
+    done = set()
+    if not Path(path).exists():
+        return done
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(rec, dict) and rec.get("status") == "ok" and rec.get("key"):
+                done.add(str(rec["key"]))
+    return done
+
+
+def _terminate_partial_line(path: str) -> None:
+    """A run killed mid-write leaves a partial last line; start the next record on a fresh one."""
+    p = Path(path)
+    if not p.exists() or p.stat().st_size == 0:
+        return
+    with open(p, "rb+") as f:
+        f.seek(-1, os.SEEK_END)
+        if f.read(1) != b"\n":
+            f.write(b"\n")
 
 
 def main():
@@ -555,6 +1144,60 @@ def main():
         action='store_true',
         help='Output results in a JSON block with markers for machine parsing'
     )
+    parser.add_argument(
+        '--offline',
+        action='store_true',
+        help='Layer 1 replays recorded responses from the on-disk cache only (no network)'
+    )
+    parser.add_argument(
+        '--ndjson',
+        action='store_true',
+        help='Stream progress events and the final result as one JSON object per line on stdout (logs go to stderr)'
+    )
+    parser.add_argument(
+        '--compact',
+        action='store_true',
+        help='With --json-output/--ndjson: unindented result without duplicated description fields '
+             '(see result_transport.py; mlBridge.expandResult restores them)'
+    )
+    parser.add_argument(
+        '--fields',
+        type=str,
+        default=None,
+        help='With --json-output/--ndjson: only these comma-separated dotted result fields, '
+             'e.g. top_influences.global_event.name,statistics'
+    )
+    parser.add_argument(
+        '--profile',
+        type=str,
+        nargs='?',
+        const='pipeline.prof',
+        default=None,
+        help='Profile the run: cProfile stats to this file (default pipeline.prof), '
+             'or a pyinstrument HTML report if the name ends in .html'
+    )
+    parser.add_argument(
+        '--batch',
+        type=str,
+        help='Run every event in a CSV/JSONL file (e.g. nodes_from_history.csv) and write JSONL results'
+    )
+    parser.add_argument(
+        '--batch-output',
+        type=str,
+        default='batch_results.jsonl',
+        help='JSONL file for --batch results (appended; completed events are skipped on rerun)'
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=None,
+        help='Worker processes for Layers 2-7 in --batch mode (default: CPU count, max 4)'
+    )
+    parser.add_argument(
+        '--no-resume',
+        action='store_true',
+        help='In --batch mode, overwrite --batch-output instead of skipping completed events'
+    )
 
     # Optional: provide a fully-specified local event (for frontend / ad-hoc inputs)
     parser.add_argument('--local-id', type=str, default='', help='Ad-hoc local event id (short unique identifier)')
@@ -570,12 +1213,76 @@ def main():
     parser.add_argument('--local-sources', type=str, default='', help='Local event sources text (for auto-add)')
     
     args = parser.parse_args()
+
+    if args.offline:
+        os.environ['KNOWLEDGE_OFFLINE'] = '1'
+
+    # Machine-readable output is UTF-8 JSON (not ASCII-escaped) whatever the console code page.
+    if (args.ndjson or args.json_output) and hasattr(sys.stdout, 'reconfigure'):
+        sys.stdout.reconfigure(encoding='utf-8')
+
+    # With --ndjson, stdout carries only the event stream; every log line goes to stderr.
+    event_stream = sys.stdout
+    if args.ndjson:
+        sys.stdout = sys.stderr
     
+    profiler = _start_profiler(args.profile) if args.profile else None
+    try:
+        _run_cli(args, event_stream)
+    finally:
+        if profiler is not None:
+            _stop_profiler(profiler, args.profile)
+
+
+def _start_profiler(path: str):
+    """Start cProfile, or pyinstrument for an .html report (optional dependency)."""
+    if path.lower().endswith('.html'):
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            print("[profile] pyinstrument is not installed; writing cProfile stats instead")
+        else:
+            profiler = Profiler()
+            profiler.start()
+            return profiler
+    import cProfile
+    profiler = cProfile.Profile()
+    profiler.enable()
+    return profiler
+
+
+def _stop_profiler(profiler, path: str) -> None:
+    import cProfile
+    import pstats
+    if isinstance(profiler, cProfile.Profile):
+        profiler.disable()
+        if path.lower().endswith('.html'):
+            path = path[:-5] + '.prof'
+        profiler.dump_stats(path)
+        print(f"[profile] cProfile stats written to {path} (top functions by cumulative time):", file=sys.stderr)
+        pstats.Stats(profiler, stream=sys.stderr).sort_stats('cumulative').print_stats(20)
+    else:
+        profiler.stop()
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(profiler.output_html())
+        print(f"[profile] pyinstrument report written to {path}", file=sys.stderr)
+
+
+def _run_cli(args, event_stream) -> None:
     # Initialize pipeline
     pipeline = CausalLogicPipeline(args.nodes, args.edges)
     
     # Process input
-    if args.input:
+    if args.batch:
+        pipeline.process_batch(
+            args.batch,
+            output_path=args.batch_output,
+            workers=args.workers,
+            top_k=args.top_k,
+            resume=not args.no_resume,
+            allow_adhoc=args.allow_adhoc,
+        )
+    elif args.input:
         local_override = None
         if any([
             args.local_id,
@@ -603,8 +1310,7 @@ def main():
                 "max_sources_required": int(args.local_max_sources) if args.local_max_sources is not None else 5,
                 "sources": (args.local_sources or "").strip(),
             }
-        results = pipeline.process(
-            args.input,
+        process_kwargs = dict(
             date=args.date,
             location=args.location,
             top_k=args.top_k,
@@ -613,26 +1319,21 @@ def main():
             auto_add_missing_local=args.auto_add_missing_local,
             history_file=args.history,
         )
+        fields = parse_fields(args.fields)
+        if args.ndjson:
+            def write_event(event: Dict):
+                event_stream.write(dumps_json(prepare_event(event, fields, args.compact)) + "\n")
+                event_stream.flush()
+
+            pipeline.process(args.input, on_event=write_event, **process_kwargs)
+            return
+
+        results = pipeline.process(args.input, **process_kwargs)
         
         if 'error' in results:
             if args.json_output:
-                import json
-                
-                def clean_for_json(obj):
-                    """Replace NaN, inf, -inf with None for JSON compliance."""
-                    if isinstance(obj, dict):
-                        return {k: clean_for_json(v) for k, v in obj.items()}
-                    elif isinstance(obj, list):
-                        return [clean_for_json(i) for i in obj]
-                    elif isinstance(obj, float):
-                        if math.isnan(obj) or math.isinf(obj):
-                            return None
-                    return obj
-                
-                results = clean_for_json(results)
-                
                 print("\n===JSON_START===")
-                print(json.dumps(results, indent=2))
+                print(dumps_json(prepare_result(results, fields, args.compact), indent=not args.compact))
                 print("===JSON_END===\n")
             else:
                 print(f"\n[ERROR] Error: {results['error']}")
@@ -651,25 +1352,8 @@ def main():
                         print(f"   One-shot command: {one_shot_cmd}")
         else:
             if args.json_output:
-                import json
-                
-                def clean_for_json(obj):
-                    """Replace NaN, inf, -inf with None for JSON compliance."""
-                    if isinstance(obj, dict):
-                        return {k: clean_for_json(v) for k, v in obj.items()}
-                    elif isinstance(obj, list):
-                        return [clean_for_json(i) for i in obj]
-                    elif isinstance(obj, float):
-                        if math.isnan(obj) or math.isinf(obj):
-                            return None
-                    return obj
-                
-                results = clean_for_json(results)
-                
                 print("\n===JSON_START===")
-                # Filter out potentially large/redundant evidence parts for JSON transport if needed,
-                # but for now we'll just dump the whole packaged results.
-                print(json.dumps(results, indent=2))
+                print(dumps_json(prepare_result(results, fields, args.compact), indent=not args.compact))
                 print("===JSON_END===\n")
             else:
                 # Format and display
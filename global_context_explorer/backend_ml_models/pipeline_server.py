@@ -0,0 +1,253 @@
+"""
+Resident pipeline worker.
+
+Keeps one warm CausalLogicPipeline (graph tensors, GNN weights, Layer 1 cache) in
+memory and serves `process()` calls over local HTTP, so the Node bridge does not
+pay the torch/pandas import + CSV parsing + model loading cost on every analyze call.
+
+Endpoints:
+  GET  /health   -> {"status": "ok", ...}
+  POST /analyze  -> same JSON that `pipeline_main.py --json-output` prints between markers
+                    (request "compact": true / "fields": "a.b,c" as --compact / --fields)
+  POST /analyze/stream -> NDJSON progress events as each layer finishes, then {"event": "result", ...}
+  POST /reload   -> re-read nodes/edges CSVs (after add_history_event.py / remove_history_event.py)
+
+Usage:
+  python pipeline_server.py --host 127.0.0.1 --port 5055 --max-concurrent 4
+"""
+
+import argparse
+import json
+import threading
+import time
+import traceback
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional
+
+from pipeline_main import CausalLogicPipeline
+from result_transport import dumps_bytes, parse_fields, prepare_event, prepare_result
+
+
+class _ReadWriteLock:
+    """
+    Many concurrent readers (analyze requests) or one writer (reload / auto-add).
+    Writers are preferred so a pending reload is not starved by a stream of requests.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._readers = 0
+        self._writer = False
+        self._writers_waiting = 0
+
+    def acquire_read(self):
+        with self._cond:
+            while self._writer or self._writers_waiting:
+                self._cond.wait()
+            self._readers += 1
+
+    def release_read(self):
+        with self._cond:
+            self._readers -= 1
+            if self._readers == 0:
+                self._cond.notify_all()
+
+    def acquire_write(self):
+        with self._cond:
+            self._writers_waiting += 1
+            while self._writer or self._readers:
+                self._cond.wait()
+            self._writers_waiting -= 1
+            self._writer = True
+
+    def release_write(self):
+        with self._cond:
+            self._writer = False
+            self._cond.notify_all()
+
+
+class PipelineWorker:
+    """Owns the warm pipeline and serializes the requests that mutate it."""
+
+    def __init__(self, nodes_file: str, edges_file: str, max_concurrent: int = 4):
+        started = time.time()
+        self.pipeline = CausalLogicPipeline(nodes_file, edges_file)
+        self.load_seconds = time.time() - started
+        self.started_at = time.time()
+        self.requests_served = 0
+        self._lock = _ReadWriteLock()
+        self._slots = threading.BoundedSemaphore(max(1, int(max_concurrent)))
+        self._counter_lock = threading.Lock()
+
+    def analyze(self, payload: Dict, on_event: Optional[Callable[[Dict], None]] = None) -> Dict:
+        input_text = str(payload.get("input") or payload.get("input_text") or "").strip()
+        if not input_text:
+            return {"error": "Missing 'input' (local event text or exhibit name)."}
+
+        kwargs = {
+            "date": payload.get("date") or None,
+            "location": payload.get("location") or None,
+            "top_k": int(payload.get("top_k", payload.get("topK", 10)) or 10),
+            "local_event_override": payload.get("local_event_override") or None,
+            "allow_adhoc": bool(payload.get("allow_adhoc", False)),
+            "auto_add_missing_local": bool(payload.get("auto_add_missing_local", False)),
+            "history_file": payload.get("history_file") or "History (1).csv",
+        }
+
+        # Auto-adding a local event rebuilds the graph layers, so it must run alone.
+        mutates = kwargs["auto_add_missing_local"]
+        with self._slots:
+            if mutates:
+                self._lock.acquire_write()
+            else:
+                self._lock.acquire_read()
+            try:
+                results = self.pipeline.process(input_text, on_event=on_event, **kwargs)
+            finally:
+                if mutates:
+                    self._lock.release_write()
+                else:
+                    self._lock.release_read()
+
+        with self._counter_lock:
+            self.requests_served += 1
+        return results
+
+    def reload(self) -> Dict:
+        self._lock.acquire_write()
+        try:
+            started = time.time()
+            self.pipeline.reload_data()
+            return {"status": "reloaded", "seconds": round(time.time() - started, 3)}
+        finally:
+            self._lock.release_write()
+
+    def health(self) -> Dict:
+        return {
+            "status": "ok",
+            "uptime_seconds": round(time.time() - self.started_at, 1),
+            "load_seconds": round(self.load_seconds, 3),
+            "requests_served": self.requests_served,
+            "knowledge_cache": self.pipeline.layer1.get_cache_stats().get("http_cache"),
+            "result_cache": self.pipeline.result_cache.stats() if self.pipeline.result_cache is not None else None,
+        }
+
+
+def _make_handler(worker: PipelineWorker):
+    class Handler(BaseHTTPRequestHandler):
+        server_version = "CausalLogicWorker/1.0"
+
+        def _send_json(self, status: int, body: Dict):
+            data = dumps_bytes(body)
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _read_json(self) -> Optional[Dict]:
+            length = int(self.headers.get("Content-Length") or 0)
+            if length <= 0:
+                return {}
+            try:
+                body = json.loads(self.rfile.read(length).decode("utf-8"))
+            except Exception:
+                return None
+            return body if isinstance(body, dict) else None
+
+        def do_GET(self):
+            if self.path.rstrip("/") == "/health":
+                self._send_json(200, worker.health())
+            else:
+                self._send_json(404, {"error": f"Unknown path {self.path}"})
+
+        def do_POST(self):
+            path = self.path.rstrip("/")
+            if path == "/reload":
+                try:
+                    self._send_json(200, worker.reload())
+                except Exception as e:
+                    traceback.print_exc()
+                    self._send_json(500, {"error": f"Reload failed: {e}"})
+                return
+
+            if path not in ("/analyze", "/analyze/stream"):
+                self._send_json(404, {"error": f"Unknown path {self.path}"})
+                return
+
+            payload = self._read_json()
+            if payload is None:
+                self._send_json(400, {"error": "Request body must be a JSON object."})
+                return
+            fields = parse_fields(payload.get("fields"))
+            compact = bool(payload.get("compact", False))
+            if path == "/analyze/stream":
+                self._stream_analyze(payload, fields, compact)
+                return
+            try:
+                self._send_json(200, prepare_result(worker.analyze(payload), fields, compact))
+            except Exception as e:
+                traceback.print_exc()
+                self._send_json(500, {"error": f"Pipeline failed: {e}"})
+
+        def _stream_analyze(self, payload: Dict, fields: Optional[List[str]], compact: bool):
+            # HTTP/1.0 without Content-Length: the stream ends when the connection closes.
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+            state = {"connected": True, "result_sent": False}
+
+            def write_event(event: Dict):
+                if event.get("event") == "result":
+                    state["result_sent"] = True
+                if not state["connected"]:
+                    return
+                try:
+                    self.wfile.write(dumps_bytes(prepare_event(event, fields, compact)) + b"\n")
+                    self.wfile.flush()
+                except OSError:
+                    # Client went away; finish the run (it still warms the caches) without writing.
+                    state["connected"] = False
+
+            try:
+                result = worker.analyze(payload, on_event=write_event)
+                if not state["result_sent"]:
+                    # Rejected before the pipeline ran (e.g. missing input).
+                    write_event({"event": "result", "result": result})
+            except Exception as e:
+                traceback.print_exc()
+                write_event({"event": "error", "error": f"Pipeline failed: {e}"})
+
+        def log_message(self, format, *args):
+            print(f"[worker] {self.address_string()} - {format % args}")
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Resident worker for the 7-layer Causal Logic Engine")
+    parser.add_argument("--nodes", type=str, default="nodes_from_history.csv", help="Path to nodes CSV file")
+    parser.add_argument("--edges", type=str, default="edges_template.csv", help="Path to edges CSV file")
+    parser.add_argument("--host", type=str, default="127.0.0.1", help="Interface to bind (keep local)")
+    parser.add_argument("--port", type=int, default=5055, help="Port to listen on")
+    parser.add_argument("--max-concurrent", type=int, default=4, help="Max pipeline runs in flight at once")
+    args = parser.parse_args()
+
+    worker = PipelineWorker(args.nodes, args.edges, max_concurrent=args.max_concurrent)
+    server = ThreadingHTTPServer((args.host, args.port), _make_handler(worker))
+    server.daemon_threads = True
+    print(f"[worker] pipeline loaded in {worker.load_seconds:.2f}s")
+    print(f"===WORKER_READY===http://{args.host}:{args.port}===")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        worker.pipeline.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Per-request timing for the 7-layer pipeline.
+
+CausalLogicPipeline.process activates a RequestTimings for the duration of a request;
+code deeper down (Layer 1 HTTP requests, Layer 4 GNN calls) records into whatever
+timings object is active through the module-level helpers, so no layer needs a new
+parameter. The active object lives in a ContextVar: concurrent requests on the resident
+worker each see their own, and ContextThreadPoolExecutor carries it into Layer 1's
+fan-out threads.
+
+The result is attached to the pipeline output as a `timings` block:
+
+    {"total": {"wall_seconds", "cpu_seconds"},
+     "layers": [{"layer", "name", "wall_seconds", "cpu_seconds", "counts": {...}}, ...],
+     "http": {"<source>": {"requests", "cache_hits", "seconds", "max_seconds"}},
+     "operations": {"gnn_forward": {"calls", "seconds"}, ...}}
+
+CPU time is process CPU (time.process_time), so it includes torch's worker threads and,
+on the resident worker, any request running at the same time.
+"""
+
+import contextvars
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+
+_current: contextvars.ContextVar = contextvars.ContextVar('pipeline_timings', default=None)
+
+
+def layer_clock() -> Tuple[float, float]:
+    """Start marker for a layer: (wall, cpu)."""
+    return time.perf_counter(), time.process_time()
+
+
+class RequestTimings:
+    """Timings and counters collected while one request runs."""
+
+    def __init__(self):
+        self.started = layer_clock()
+        self.layers: List[Dict] = []
+        self.http: Dict[str, Dict] = {}
+        self.operations: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    def add_layer(self, layer: int, name: str, started: Tuple[float, float], counts: Optional[Dict] = None) -> float:
+        """Record a finished layer started at `started` (see layer_clock). Returns wall seconds."""
+        wall, cpu = layer_clock()
+        entry = {
+            'layer': layer,
+            'name': name,
+            'wall_seconds': round(wall - started[0], 4),
+            'cpu_seconds': round(cpu - started[1], 4),
+        }
+        if counts:
+            entry['counts'] = dict(counts)
+        with self._lock:
+            self.layers.append(entry)
+        return wall - started[0]
+
+    def add_http(self, source: str, seconds: float, cached: bool) -> None:
+        with self._lock:
+            stats = self.http.setdefault(source, {'requests': 0, 'cache_hits': 0, 'seconds': 0.0, 'max_seconds': 0.0})
+            stats['requests'] += 1
+            if cached:
+                stats['cache_hits'] += 1
+            stats['seconds'] += seconds
+            stats['max_seconds'] = max(stats['max_seconds'], seconds)
+
+    def add_operation(self, name: str, seconds: float) -> None:
+        with self._lock:
+            stats = self.operations.setdefault(name, {'calls': 0, 'seconds': 0.0})
+            stats['calls'] += 1
+            stats['seconds'] += seconds
+
+    def as_dict(self) -> Dict:
+        """JSON-ready timings block."""
+        wall, cpu = layer_clock()
+        with self._lock:
+            return {
+                'total': {
+                    'wall_seconds': round(wall - self.started[0], 4),
+                    'cpu_seconds': round(cpu - self.started[1], 4),
+                },
+                'layers': [dict(entry) for entry in self.layers],
+                'http': {
+                    source: {**stats, 'seconds': round(stats['seconds'], 4), 'max_seconds': round(stats['max_seconds'], 4)}
+                    for source, stats in self.http.items()
+                },
+                'operations': {
+                    name: {**stats, 'seconds': round(stats['seconds'], 4)}
+                    for name, stats in self.operations.items()
+                },
+            }
+
+
+def current_timings() -> Optional[RequestTimings]:
+    """Timings of the request running in this context, if any."""
+    return _current.get()
+
+
+@contextmanager
+def activate(timings: RequestTimings) -> Iterator[RequestTimings]:
+    """Make `timings` the active collector for this context."""
+    token = _current.set(timings)
+    try:
+        yield timings
+    finally:
+        _current.reset(token)
+
+
+def record_layer(layer: int, name: str, started: Tuple[float, float], counts: Optional[Dict] = None) -> float:
+    """Record a finished layer on the active timings. Returns wall seconds since `started`."""
+    timings = _current.get()
+    if timings is None:
+        return time.perf_counter() - started[0]
+    return timings.add_layer(layer, name, started, counts)
+
+
+def record_http(source: str, seconds: float, cached: bool = False) -> None:
+    """Record one outbound (or cache-served) HTTP request on the active timings."""
+    timings = _current.get()
+    if timings is not None:
+        timings.add_http(source, seconds, cached)
+
+
+@contextmanager
+def timed(name: str) -> Iterator[None]:
+    """Time a block as operation `name` on the active timings (no-op outside a request)."""
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add_operation(name, time.perf_counter() - started)
+
+
+class ContextThreadPoolExecutor(ThreadPoolExecutor):
+    """ThreadPoolExecutor whose tasks run in a copy of the submitter's context."""
+
+    def submit(self, fn, /, *args, **kwargs):
+        return super().submit(contextvars.copy_context().run, fn, *args, **kwargs)
@@ -48,6 +48,13 @@ def main():
     node_id = args.node_id.strip()
 
     if remove_event_by_id(history_path, node_id):
+        # Cached pipeline results were computed from the old data
+        try:
+            from result_cache import invalidate_results
+            invalidate_results()
+        except Exception as e:
+            print(f"[remove_history_event] Warning: could not clear pipeline result cache: {e}")
+
         if args.rebuild_nodes:
             try:
                 from build_nodes_from_history import build_nodes, write_nodes_csv
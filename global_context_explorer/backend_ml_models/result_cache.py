@@ -0,0 +1,197 @@
+"""
+Result cache in front of CausalLogicPipeline.process.
+
+Curators re-run "analyze" on the same local event many times while nothing it depends on
+has changed. This module stores finished results in a SQLite file keyed by the normalized
+request (input text, date, location, top_k and the local-event options) plus a data
+fingerprint:
+
+- SHA-256 of the nodes and edges CSVs (re-hashed only when their size/mtime change)
+- size and mtime of the trained model file
+
+Editing the CSVs or retraining therefore misses the cache on its own; add_history_event.py,
+add_edge.py and remove_history_event.py also clear it explicitly. Entries expire after a TTL
+(Layer 1 evidence from Wikipedia drifts) and the file is size-bounded (least recently used
+first), like the Layer 1 response cache.
+
+Environment:
+  RESULT_CACHE=off             disable the result cache
+  RESULT_CACHE_PATH=...        SQLite file (default: cache/result_cache.sqlite)
+  RESULT_CACHE_TTL_HOURS=24    entry lifetime
+  RESULT_CACHE_MAX_MB=50       size bound before eviction
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlite_lru import LruStore, env_number
+
+
+DEFAULT_PATH = Path('cache') / 'result_cache.sqlite'
+
+
+def results_enabled() -> bool:
+    """False when RESULT_CACHE is set to off/0/false/no."""
+    return str(os.getenv('RESULT_CACHE', 'on')).strip().lower() not in ('off', '0', 'false', 'no')
+
+
+def normalize_text(value) -> str:
+    """Lower-case with collapsed whitespace; None -> ''."""
+    return ' '.join(str(value or '').split()).lower()
+
+
+def _json_default(value):
+    # numpy scalars and the like
+    if hasattr(value, 'item'):
+        return value.item()
+    return str(value)
+
+
+class DataFingerprint:
+    """Fingerprint of the files a result depends on; cheap to re-check when nothing changed."""
+
+    def __init__(self, hashed_files: Iterable[str], stat_files: Iterable[str] = ()):
+        """
+        Args:
+            hashed_files: Files identified by their content hash (CSVs)
+            stat_files: Files identified by size + mtime (model weights)
+        """
+        self.hashed_files = [str(p) for p in hashed_files if p]
+        self.stat_files = [str(p) for p in stat_files if p]
+        self._hashes: Dict[str, Tuple[Optional[Tuple[int, int]], str]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _stat(path: str) -> Optional[Tuple[int, int]]:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return st.st_size, st.st_mtime_ns
+
+    def _content_hash(self, path: str) -> str:
+        stamp = self._stat(path)
+        cached = self._hashes.get(path)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+        if stamp is None:
+            digest = 'missing'
+        else:
+            h = hashlib.sha256()
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1 << 20), b''):
+                    h.update(chunk)
+            digest = h.hexdigest()
+        self._hashes[path] = (stamp, digest)
+        return digest
+
+    def current(self) -> str:
+        """Hex digest over every tracked file."""
+        parts = []
+        with self._lock:
+            for path in self.hashed_files:
+                parts.append(f"{path}={self._content_hash(path)}")
+        for path in self.stat_files:
+            parts.append(f"{path}@{self._stat(path)}")
+        return hashlib.sha256('|'.join(parts).encode('utf-8')).hexdigest()
+
+
+class ResultCache:
+    """SQLite-backed cache of finished pipeline results."""
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        ttl_seconds: Optional[float] = None,
+        max_bytes: Optional[int] = None,
+    ):
+        """
+        Args:
+            path: SQLite file (default: $RESULT_CACHE_PATH or cache/result_cache.sqlite)
+            ttl_seconds: Entry lifetime (default: $RESULT_CACHE_TTL_HOURS, 24 h)
+            max_bytes: Size bound for stored results (default: $RESULT_CACHE_MAX_MB, 50 MB)
+        """
+        self.path = Path(path or os.getenv('RESULT_CACHE_PATH') or DEFAULT_PATH)
+        if ttl_seconds is None:
+            ttl_seconds = env_number('RESULT_CACHE_TTL_HOURS', 24) * 3600
+        self.ttl_seconds = max(0.0, float(ttl_seconds))
+        if max_bytes is None:
+            max_bytes = int(env_number('RESULT_CACHE_MAX_MB', 50) * 1024 * 1024)
+        self.store = LruStore(self.path, 'results', max_bytes=max_bytes)
+
+    @property
+    def max_bytes(self) -> int:
+        return self.store.max_bytes
+
+    @staticmethod
+    def make_key(fingerprint: str, input_text: str, **options) -> str:
+        """Hash of the normalized request and the data fingerprint."""
+        request = {
+            'input': normalize_text(input_text),
+            'date': normalize_text(options.pop('date', None)),
+            'location': normalize_text(options.pop('location', None)),
+            **options,
+        }
+        body = json.dumps([fingerprint, request], sort_keys=True, default=_json_default)
+        return hashlib.sha256(body.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Stored result if present and younger than the TTL (a fresh copy each call)."""
+        row = self.store.get(key, lambda values, age: age <= self.ttl_seconds)
+        return json.loads(row[0]) if row is not None else None
+
+    def put(self, key: str, result: Dict) -> None:
+        """Store a result (must be JSON-serializable after numpy scalars are unwrapped)."""
+        try:
+            body = json.dumps(result, default=_json_default)
+        except (TypeError, ValueError):
+            return
+        # Expired rows go first, then least recently used ones beyond max_bytes.
+        self.store.put(key, body, expired_before=time.time() - self.ttl_seconds)
+
+    def clear(self) -> int:
+        """Remove every stored result. Returns the number of rows removed."""
+        return self.store.clear()
+
+    def close(self) -> None:
+        """Close the SQLite connection."""
+        self.store.close()
+
+    def stats(self) -> Dict:
+        """Entry count, stored bytes and hit/miss counters for this process."""
+        return {**self.store.stats(), 'ttl_seconds': self.ttl_seconds}
+
+
+def get_result_cache(path: Optional[str] = None) -> Optional[ResultCache]:
+    """Result cache, or None when RESULT_CACHE=off or the file cannot be opened."""
+    if not results_enabled():
+        return None
+    try:
+        return ResultCache(path)
+    except Exception as e:
+        print(f"[result cache] Warning: unavailable ({e}); continuing without it")
+        return None
+
+
+def invalidate_results(path: Optional[str] = None) -> int:
+    """
+    Clear the result cache file (for scripts that edit History / nodes / edges).
+    Returns the number of entries removed; 0 if there is no cache file.
+    """
+    resolved = Path(path or os.getenv('RESULT_CACHE_PATH') or DEFAULT_PATH)
+    if not resolved.exists():
+        return 0
+    try:
+        cache = ResultCache(str(resolved))
+    except Exception as e:
+        print(f"[result cache] Warning: could not clear {resolved}: {e}")
+        return 0
+    try:
+        return cache.clear()
+    finally:
+        cache.close()
@@ -0,0 +1,159 @@
+"""
+Serialization of pipeline results for the Node bridge (stdout, NDJSON events, worker HTTP).
+
+- dumps() uses orjson when it is installed (optional dependency, `pip install orjson`) and
+  compact `json.dumps` otherwise. Layer 7 already returns JSON-safe values (NaN/inf become
+  None at packaging time), so there is no recursive cleaning pass on the way out; the json
+  fallback only re-runs clean_for_json() if something non-finite slipped through.
+- project() keeps only the requested dotted field paths (`--fields` / request "fields"),
+  e.g. "top_influences.global_event.name,statistics". Lists are projected element-wise.
+  Error results are never projected.
+- compact_result() drops text that is a copy of another field in the same object
+  (`description` == `description_short` of each global event, the local event's
+  `description_full` == `description`). The bridge restores them (mlBridge.expandResult).
+
+Usage:
+  python pipeline_main.py --input "Tea Heritage Exhibit" --ndjson --compact
+  python pipeline_main.py --input "Tea Heritage Exhibit" --json-output --fields top_influences.global_event.name
+"""
+
+import json
+import math
+from typing import Dict, Iterable, List, Optional, Union
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+
+SERIALIZER = "orjson" if orjson is not None else "json"
+
+# Copied fields dropped by compact_result: (dropped field, field it equals)
+_GLOBAL_EVENT_COPIES = (("description", "description_short"),)
+_LOCAL_EVENT_COPIES = (("description_full", "description"),)
+
+
+def clean_for_json(obj):
+    """Replace NaN, inf, -inf with None for JSON compliance."""
+    if isinstance(obj, dict):
+        return {k: clean_for_json(v) for k, v in obj.items()}
+    elif isinstance(obj, list):
+        return [clean_for_json(i) for i in obj]
+    elif isinstance(obj, float):
+        if math.isnan(obj) or math.isinf(obj):
+            return None
+    return obj
+
+
+def _json_default(value):
+    # numpy scalars and the like
+    if hasattr(value, 'item'):
+        return value.item()
+    return str(value)
+
+
+def dumps_bytes(obj, indent: bool = False) -> bytes:
+    """UTF-8 JSON for `obj`; NaN/inf are written as null."""
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=_json_default, option=option)
+    return dumps(obj, indent=indent).encode('utf-8')
+
+
+def dumps(obj, indent: bool = False) -> str:
+    """JSON text for `obj` (see dumps_bytes)."""
+    if orjson is not None:
+        return dumps_bytes(obj, indent=indent).decode('utf-8')
+    kwargs = {'indent': 2} if indent else {'separators': (',', ':')}
+    try:
+        return json.dumps(obj, ensure_ascii=False, allow_nan=False, default=_json_default, **kwargs)
+    except ValueError:
+        return json.dumps(clean_for_json(obj), ensure_ascii=False, default=_json_default, **kwargs)
+
+
+def parse_fields(spec: Union[str, Iterable[str], None]) -> Optional[List[str]]:
+    """Comma-separated string or list of dotted paths -> list, or None for "everything"."""
+    if not spec:
+        return None
+    items = spec.split(',') if isinstance(spec, str) else spec
+    fields = [str(item).strip() for item in items if str(item).strip()]
+    return fields or None
+
+
+def _field_tree(fields: List[str]) -> Dict:
+    """["a.b", "a.c", "d"] -> {"a": {"b": None, "c": None}, "d": None} (None keeps the whole value)."""
+    tree: Dict = {}
+    for field in fields:
+        parts = [part for part in field.split('.') if part]
+        if not parts:
+            continue
+        node = tree
+        for part in parts[:-1]:
+            child = node.get(part, {})
+            if child is None:
+                break  # a shorter path already keeps all of it
+            node[part] = child
+            node = child
+        else:
+            node[parts[-1]] = None
+    return tree
+
+
+def _apply_tree(value, tree: Optional[Dict]):
+    if tree is None:
+        return value
+    if isinstance(value, list):
+        return [_apply_tree(item, tree) for item in value]
+    if isinstance(value, dict):
+        return {k: _apply_tree(value[k], sub) for k, sub in tree.items() if k in value}
+    return value
+
+
+def project(result: Dict, fields: Optional[List[str]]) -> Dict:
+    """New dict with only `fields` (dotted paths) of `result`; `result` is not modified."""
+    if not fields or not isinstance(result, dict) or 'error' in result:
+        return result
+    return _apply_tree(result, _field_tree(fields))
+
+
+def _without_copies(obj, copies) -> Dict:
+    if not isinstance(obj, dict):
+        return obj
+    dropped = [field for field, source in copies if field in obj and source in obj and obj[field] == obj[source]]
+    if not dropped:
+        return obj
+    return {k: v for k, v in obj.items() if k not in dropped}
+
+
+def compact_result(result: Dict) -> Dict:
+    """Shallow copy of `result` without duplicated description text (see module docstring)."""
+    if not isinstance(result, dict):
+        return result
+    out = dict(result)
+    influences = result.get('top_influences')
+    if isinstance(influences, list):
+        out['top_influences'] = [
+            {**inf, 'global_event': _without_copies(inf['global_event'], _GLOBAL_EVENT_COPIES)}
+            if isinstance(inf, dict) and isinstance(inf.get('global_event'), dict) else inf
+            for inf in influences
+        ]
+    local_event = result.get('local_event')
+    if isinstance(local_event, dict) and isinstance(local_event.get('data'), dict):
+        out['local_event'] = {**local_event, 'data': _without_copies(local_event['data'], _LOCAL_EVENT_COPIES)}
+    return out
+
+
+def prepare_result(result: Dict, fields: Optional[List[str]] = None, compact: bool = False) -> Dict:
+    """project() then, with compact=True, compact_result(); never modifies `result`."""
+    result = project(result, fields)
+    return compact_result(result) if compact else result
+
+
+def prepare_event(event: Dict, fields: Optional[List[str]] = None, compact: bool = False) -> Dict:
+    """Apply prepare_result to the result carried by a {"event": "result"} progress event."""
+    if event.get('event') != 'result' or not (fields or compact):
+        return event
+    return {**event, 'result': prepare_result(event.get('result'), fields, compact)}
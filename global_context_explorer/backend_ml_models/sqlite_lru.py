@@ -0,0 +1,172 @@
+"""
+Size-bounded SQLite key/value table shared by the on-disk caches (http_cache.py, result_cache.py).
+
+Each cache is one table of (key, extra columns..., body, size, created_at, accessed_at) in its
+own file. Reads refresh accessed_at; when the stored bodies outgrow max_bytes the least
+recently used rows are dropped, down to 90% of the bound so eviction does not run on every
+subsequent put. Freshness (TTLs) stays with the caller: get() takes an is_fresh check and
+delete_expired() removes old rows.
+
+One connection guarded by a lock (pipeline_server runs requests on threads); WAL + busy
+timeout lets per-request CLI processes share the same file.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Optional, Sequence, Tuple
+
+
+def env_flag(name: str) -> bool:
+    """True if an environment variable is set to 1/true/yes/on."""
+    return str(os.getenv(name, '')).strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def env_number(name: str, default: float) -> float:
+    """Float environment variable, or `default` when unset or unparsable."""
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+class LruStore:
+    """One SQLite table with LRU eviction by stored body size."""
+
+    def __init__(self, path, table: str, columns: Sequence[str] = (), max_bytes: int = 0):
+        """
+        Args:
+            path: SQLite file (parent directories are created)
+            table: Table name
+            columns: Extra column definitions stored next to the body, e.g. "kind TEXT NOT NULL"
+            max_bytes: Bound for the summed body sizes (0 = unbounded)
+        """
+        self.path = Path(path)
+        self.table = table
+        self.columns = [definition.split()[0] for definition in columns]
+        self.max_bytes = max(0, int(max_bytes))
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        extra = ''.join(f'{definition},\n                ' for definition in columns)
+        self._conn.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                key TEXT PRIMARY KEY,
+                {extra}body TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(f'CREATE INDEX IF NOT EXISTS idx_{table}_accessed ON {table}(accessed_at)')
+        self._conn.commit()
+
+    def get(
+        self,
+        key: str,
+        is_fresh: Optional[Callable[[Tuple, float], bool]] = None,
+    ) -> Optional[Tuple]:
+        """
+        (extra columns..., body) for `key`, or None if missing or stale.
+
+        Args:
+            is_fresh: Called with (extra column values, age in seconds); False counts as a miss
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                f'SELECT {", ".join(self.columns + ["body", "created_at"])} FROM {self.table} WHERE key = ?',
+                (key,)
+            ).fetchone()
+            if row is None or (is_fresh is not None and not is_fresh(row[:-2], now - row[-1])):
+                self.misses += 1
+                return None
+            self._conn.execute(f'UPDATE {self.table} SET accessed_at = ? WHERE key = ?', (now, key))
+            self._conn.commit()
+            self.hits += 1
+        return row[:-1]
+
+    def put(self, key: str, body: str, values: Sequence = (), expired_before: Optional[float] = None) -> None:
+        """
+        Store `body` (and the extra column `values`, in column order), then evict.
+
+        Args:
+            expired_before: Also delete rows created before this timestamp
+        """
+        now = time.time()
+        names = ['key'] + self.columns + ['body', 'size', 'created_at', 'accessed_at']
+        with self._lock:
+            self._conn.execute(
+                f'INSERT OR REPLACE INTO {self.table} ({", ".join(names)}) VALUES ({", ".join("?" * len(names))})',
+                (key, *values, body, len(body.encode('utf-8')), now, now)
+            )
+            if expired_before is not None:
+                self._conn.execute(f'DELETE FROM {self.table} WHERE created_at < ?', (expired_before,))
+            self._evict_locked()
+            self._conn.commit()
+
+    def _evict_locked(self) -> None:
+        """Drop least recently used rows until the stored bodies fit in max_bytes."""
+        if not self.max_bytes:
+            return
+        total = self._conn.execute(f'SELECT COALESCE(SUM(size), 0) FROM {self.table}').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        target = int(self.max_bytes * 0.9)
+        doomed = []
+        for key, size in self._conn.execute(f'SELECT key, size FROM {self.table} ORDER BY accessed_at ASC'):
+            if total <= target:
+                break
+            doomed.append((key,))
+            total -= size
+        self._conn.executemany(f'DELETE FROM {self.table} WHERE key = ?', doomed)
+
+    def delete_expired(self, max_age: float, where: str = '', params: Sequence = ()) -> int:
+        """
+        Delete rows older than `max_age` seconds, optionally only those matching `where`
+        (an SQL condition on the extra columns). Returns the number of rows removed.
+        """
+        condition = 'created_at < ?' + (f' AND ({where})' if where else '')
+        with self._lock:
+            removed = self._conn.execute(
+                f'DELETE FROM {self.table} WHERE {condition}', (time.time() - max_age, *params)
+            ).rowcount
+            self._conn.commit()
+        return removed
+
+    def clear(self) -> int:
+        """Remove every row. Returns the number of rows removed."""
+        with self._lock:
+            removed = self._conn.execute(f'DELETE FROM {self.table}').rowcount
+            self._conn.commit()
+        return removed
+
+    def close(self) -> None:
+        """Close the connection; the store cannot be used afterwards."""
+        with self._lock:
+            self._conn.close()
+
+    def stats(self) -> Dict:
+        """Entry count, stored bytes and hit/miss counters for this process."""
+        with self._lock:
+            entries, size = self._conn.execute(
+                f'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM {self.table}'
+            ).fetchone()
+        return {
+            'path': str(self.path),
+            'entries': entries,
+            'bytes': size,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+        }
@@ -93,7 +93,8 @@ def test_wikipedia_apis():
     print("\n[Test 7] Cache Statistics")
     print("-" * 80)
     stats = collector.get_cache_stats()
-    print(f"✓ Cache size: {stats['cache_size']} entries")
+    if stats['http_cache'] is not None:
+        print(f"✓ Cached responses: {stats['http_cache']['entries']} entries")
     print(f"✓ Total requests: {stats['request_count']}")
     
     print("\n" + "=" * 80)
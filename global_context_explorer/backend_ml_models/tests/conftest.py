@@ -0,0 +1,14 @@
+"""
+Tests for the backend modules.
+
+Rewritten hot paths are checked against a copy of the code they replaced on seeded
+random inputs, so a failure reproduces with the same seed.
+
+Usage (from backend_ml_models/):
+    python -m pytest tests
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
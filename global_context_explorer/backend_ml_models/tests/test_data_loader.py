@@ -0,0 +1,150 @@
+"""
+HistoricalDataLoader.build_graph on generated CSVs: duplicated node ids, ids that only
+appear in edges, unparseable numbers and the date formats History (1).csv uses.
+"""
+
+import math
+import random
+
+import pandas as pd
+import pytest
+import torch
+
+from data_loader import HistoricalDataLoader
+from date_utils import parse_year_range
+
+DATES = [
+    "1867-01-01", "1864-06-15", "1948-02-04", "1867", "247 BCE", "1st century BCE–2nd century CE",
+    "19th–early 20th century", "1869–1880s", "993–1070 CE", "", "unknown",
+]
+
+
+def _old_build_graph(loader):
+    """Node features, types, dates and edge arrays as build_graph produced them before the rewrite."""
+    nodes_df, edges_df = loader.nodes_df, loader.edges_df
+    node_features, node_types, node_dates = [], [], []
+    for node_id in sorted(loader.node_to_idx.keys()):
+        node_data = nodes_df[nodes_df['node_id'] == node_id]
+        if len(node_data) == 0:
+            node_features.append([0.0] * 10)
+            node_types.append(0)
+            node_dates.append(None)
+        else:
+            row = node_data.iloc[0]
+            features = [
+                1.0 if row['node_type'] == 'local' else 0.0,
+                float(row.get('source_count', 0)),
+                float(row.get('max_sources_required', 5)),
+                float(row.get('source_count', 0)) / max(float(row.get('max_sources_required', 5)), 1.0),
+            ]
+            while len(features) < 10:
+                features.append(0.0)
+            node_features.append(features[:10])
+            node_types.append(1 if row['node_type'] == 'local' else 0)
+            node_dates.append(row['date'])
+
+    edge_indices, edge_attrs, edge_metadata = [], [], []
+    for _, edge_row in edges_df.iterrows():
+        source_node_data = nodes_df[nodes_df['node_id'] == edge_row['source_node_id']]
+        target_node_data = nodes_df[nodes_df['node_id'] == edge_row['target_node_id']]
+        temporal_gap = 0.0
+        if len(source_node_data) > 0 and len(target_node_data) > 0:
+            temporal_gap = loader.calculate_temporal_gap_flexible(
+                source_node_data.iloc[0]['date'], target_node_data.iloc[0]['date']
+            )
+        edge_indices.append([loader.node_to_idx[edge_row['source_node_id']], loader.node_to_idx[edge_row['target_node_id']]])
+
+        def _float(column, default):
+            try:
+                return float(edge_row.get(column, default))
+            except (ValueError, TypeError):
+                return default
+
+        edge_attrs.append([
+            _float('directness_score', 0.5),
+            _float('source_count', 0.0),
+            _float('max_sources_required', 5.0),
+            temporal_gap,
+        ])
+        edge_metadata.append({
+            'edge_id': edge_row['edge_id'],
+            'causal_description': edge_row.get('causal_description', ''),
+            'source_node_id': edge_row['source_node_id'],
+            'target_node_id': edge_row['target_node_id'],
+        })
+
+    return {
+        'x': torch.tensor(node_features, dtype=torch.float),
+        'edge_index': torch.tensor(edge_indices, dtype=torch.long).t().contiguous(),
+        'edge_attr': torch.tensor(edge_attrs, dtype=torch.float),
+        'node_types': node_types,
+        'node_dates': node_dates,
+        'edge_metadata': edge_metadata,
+    }
+
+
+def _write_random_csvs(rng, tmp_path, with_year_columns):
+    n_nodes = rng.randint(2, 40)
+    ids = [f"{'LOC' if rng.random() < 0.6 else 'GLB'}_{i:03d}" for i in range(n_nodes)]
+    nodes = []
+    for node_id in ids + rng.sample(ids, max(1, n_nodes // 8)):  # some duplicated ids
+        date = rng.choice(DATES)
+        row = {
+            "node_id": node_id,
+            "node_type": "local" if node_id.startswith("LOC") else "global",
+            "event_name": f"Event {node_id}",
+            "date": date,
+            "source_count": rng.choice([0, 1, 3, 6, ""]),
+            "max_sources_required": rng.choice([0, 1, 5, 8, ""]),
+        }
+        if with_year_columns:
+            start, end = parse_year_range(date)
+            row["start_year"] = "" if start is None else start
+            row["end_year"] = "" if end is None else end
+        nodes.append(row)
+
+    # Edges may point at ids that are not in the nodes CSV (global nodes without a row)
+    pool = ids + [f"EXT_{i}" for i in range(rng.randint(0, 5))]
+    edges = []
+    for i in range(rng.randint(1, 80)):
+        edges.append({
+            "edge_id": f"E{i}",
+            "source_node_id": rng.choice(pool),
+            "target_node_id": rng.choice(pool),
+            "directness_score": rng.choice([0.1, 0.9, "", "high"]),
+            "source_count": rng.choice([0, 2, "", "n/a"]),
+            "max_sources_required": rng.choice([5, 7, ""]),
+            "causal_description": rng.choice(["caused", "", "led to"]),
+        })
+
+    nodes_file, edges_file = tmp_path / "nodes.csv", tmp_path / "edges.csv"
+    pd.DataFrame(nodes).to_csv(nodes_file, index=False)
+    pd.DataFrame(edges).to_csv(edges_file, index=False)
+    return str(nodes_file), str(edges_file)
+
+
+def _same(a, b):
+    if isinstance(a, float) and isinstance(b, float) and math.isnan(a) and math.isnan(b):
+        return True
+    return a == b
+
+
+@pytest.mark.parametrize("with_year_columns", [False, True])
+@pytest.mark.parametrize("seed", range(10))
+def test_build_graph_matches_old_builder(tmp_path, seed, with_year_columns):
+    rng = random.Random(seed)
+    loader = HistoricalDataLoader(*_write_random_csvs(rng, tmp_path, with_year_columns))
+    loader.load_data()
+    expected = _old_build_graph(loader)
+    data = loader.build_graph()
+
+    torch.testing.assert_close(data.x, expected['x'], equal_nan=True, rtol=0, atol=0)
+    assert torch.equal(data.edge_index, expected['edge_index'])
+    torch.testing.assert_close(data.edge_attr, expected['edge_attr'], equal_nan=True, rtol=0, atol=0)
+    assert data.node_types == expected['node_types']
+    assert all(_same(a, b) for a, b in zip(data.node_dates, expected['node_dates']))
+    assert len(data.node_dates) == len(expected['node_dates'])
+    assert len(data.edge_metadata) == len(expected['edge_metadata'])
+    for new, old in zip(data.edge_metadata, expected['edge_metadata']):
+        assert new.keys() == old.keys()
+        assert all(_same(new[k], old[k]) for k in new)
@@ -0,0 +1,95 @@
+"""EvidenceIndex (layer5_constraint_scoring) against the per-prediction snippet scan it replaced."""
+
+import random
+
+import pytest
+
+from layer5_constraint_scoring import EvidenceIndex
+
+WORDS = [
+    "british", "colonial", "colonialism", "empire", "imperial", "trade", "export",
+    "exports", "coffee", "tea", "plantation", "plantations", "railway", "rail",
+    "ceylon", "war", "world", "crisis", "labour", "migration", "suez", "canal",
+]
+SOURCES = ["Wikipedia", "National Archives", "Colonial Records", "Book: History", "publication", "UNESCO", ""]
+
+
+def _old_mentions(snippets, event_keywords):
+    """Mention count and source buckets as _calculate_evidence_strength computed them before the index."""
+    mention_count = 0
+    source_types = {'archive': 0, 'book': 0, 'wikipedia': 0, 'other': 0}
+    for snippet in snippets:
+        text = snippet.get('extract', '').lower()
+        source = snippet.get('source', '').lower()
+        text_words = set(text.split())
+        keyword_matches = len(event_keywords & text_words)
+        if keyword_matches > 0 or any(keyword in text for keyword in event_keywords if len(keyword) > 4):
+            mention_count += 1
+            if 'archive' in source or 'record' in source:
+                source_types['archive'] += 1
+            elif 'book' in source or 'publication' in source:
+                source_types['book'] += 1
+            elif 'wikipedia' in source:
+                source_types['wikipedia'] += 1
+            else:
+                source_types['other'] += 1
+    return mention_count, source_types
+
+
+def _new_mentions(index, event_keywords):
+    mentioned = set()
+    for keyword in event_keywords:
+        mentioned |= index.matches(keyword)
+    source_types = {'archive': 0, 'book': 0, 'wikipedia': 0, 'other': 0}
+    for snippet_id in mentioned:
+        source_types[index.source_types[snippet_id]] += 1
+    return len(mentioned), source_types
+
+
+def _random_word(rng):
+    word = rng.choice(WORDS)
+    roll = rng.random()
+    if roll < 0.2:
+        word = word.upper() if rng.random() < 0.5 else word.capitalize()
+    elif roll < 0.35:
+        word += rng.choice([",", ".", "'s", ")", "-era"])
+    elif roll < 0.45:
+        word = rng.choice(["anti", "(", "post-"]) + word
+    return word
+
+
+def _random_snippet(rng):
+    words = [_random_word(rng) for _ in range(rng.randint(0, 25))]
+    separators = [" ", " ", " ", "\n", "\t", "  "]
+    text = "".join(w + rng.choice(separators) for w in words)
+    return {'extract': text, 'source': rng.choice(SOURCES)}
+
+
+def _random_keywords(rng):
+    keywords = set()
+    for _ in range(rng.randint(1, 8)):
+        word = rng.choice(WORDS)
+        if rng.random() < 0.3 and len(word) > 3:
+            # Fragments exercise the substring rule (and its length > 4 cut-off)
+            start = rng.randint(0, len(word) - 3)
+            word = word[start:start + rng.randint(3, len(word) - start)]
+        keywords.add(word)
+    return keywords
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_matches_old_scan(seed):
+    rng = random.Random(seed)
+    snippets = [_random_snippet(rng) for _ in range(rng.randint(0, 40))]
+    index = EvidenceIndex(snippets)
+    assert index.size == len(snippets)
+    for _ in range(50):
+        keywords = _random_keywords(rng)
+        assert _new_mentions(index, keywords) == _old_mentions(snippets, keywords)
+
+
+def test_missing_fields_count_as_empty():
+    index = EvidenceIndex([{'extract': None, 'source': None}, {}])
+    assert index.size == 2
+    assert index.source_types == ['other', 'other']
+    assert index.matches('colonial') == frozenset()
@@ -0,0 +1,94 @@
+"""
+GNNReasoner keeps its cached node embeddings in step with the shared GraphStore:
+refreshing only the nodes a change can reach gives the same rows as a full forward pass.
+"""
+
+import random
+
+import pandas as pd
+import pytest
+import torch
+
+from layer4_gnn_reasoning import GNNReasoner
+
+CHAIN = 8
+
+
+def _write_graph(tmp_path, seed=0):
+    """
+    A GLOBAL_000 -> ... -> GLOBAL_007 chain feeding local events, plus random extra edges,
+    so a change at the head of the chain reaches further than the GNN's layers.
+    """
+    rng = random.Random(seed)
+    nodes = [
+        {"node_id": f"GLOBAL_{i:03d}", "node_type": "global", "event_name": f"Global event {i}",
+         "date": str(1800 + i), "source_count": rng.randint(0, 5), "max_sources_required": 5}
+        for i in range(CHAIN)
+    ] + [
+        {"node_id": f"LOC_{i:03d}", "node_type": "local", "event_name": f"Local event {i}",
+         "date": str(1860 + i), "source_count": rng.randint(0, 5), "max_sources_required": 5}
+        for i in range(6)
+    ]
+    pairs = [(f"GLOBAL_{i:03d}", f"GLOBAL_{i + 1:03d}") for i in range(CHAIN - 1)]
+    pairs += [(f"GLOBAL_{CHAIN - 1:03d}", "LOC_000")]
+    pairs += [(f"GLOBAL_{rng.randrange(CHAIN):03d}", f"LOC_{rng.randrange(6):03d}") for _ in range(10)]
+    edges = [
+        {"edge_id": f"EDGE_{i:03d}", "source_node_id": src, "target_node_id": dst,
+         "causal_description": "", "directness_score": rng.random(), "source_count": 3,
+         "max_sources_required": 5}
+        for i, (src, dst) in enumerate(pairs)
+    ]
+    nodes_file, edges_file = tmp_path / "nodes.csv", tmp_path / "edges.csv"
+    pd.DataFrame(nodes).to_csv(nodes_file, index=False)
+    pd.DataFrame(edges).to_csv(edges_file, index=False)
+    return str(nodes_file), str(edges_file)
+
+
+@pytest.fixture
+def reasoner(tmp_path, monkeypatch):
+    monkeypatch.setenv("GRAPH_SNAPSHOT_DIR", str(tmp_path / "snapshots"))
+    reasoner = GNNReasoner(*_write_graph(tmp_path))
+    assert reasoner.node_embeddings is not None
+    yield reasoner
+    reasoner.close()
+
+
+def _full_forward(reasoner):
+    data = reasoner.graph_data
+    with torch.no_grad():
+        return reasoner.model(data.x, data.edge_index, data.edge_attr)
+
+
+def test_appended_node_matches_full_recompute(reasoner):
+    assert not reasoner.model.training
+    version = reasoner.graph_version
+    num_nodes = reasoner.graph_data.x.shape[0]
+
+    idx = reasoner.graph_store.add_local_node({
+        "node_id": "LOC_TEST_APPENDED", "node_type": "local", "event_name": "Appended test event",
+        "date": "1867", "source_count": 2, "max_sources_required": 5,
+    })
+    assert idx == num_nodes
+    assert reasoner.graph_store.added_since(version) == [idx]
+
+    before = reasoner.node_embeddings.clone()
+    reasoner.sync_graph()
+
+    assert reasoner.graph_version == reasoner.graph_store.version
+    assert reasoner.node_embeddings.shape[0] == num_nodes + 1
+    assert torch.equal(reasoner.node_embeddings[:num_nodes], before)
+    assert torch.allclose(reasoner.node_embeddings, _full_forward(reasoner), atol=1e-6)
+
+
+def test_edited_node_refresh_matches_full_recompute(reasoner):
+    data = reasoner.graph_data
+    idx = reasoner.graph_store.data_loader.node_to_idx["GLOBAL_000"]
+    data.x[idx] = data.x[idx] + 1.0
+    stale = reasoner.node_embeddings.clone()
+
+    reasoner.refresh_embeddings([idx])
+
+    # The edit reached beyond the head's direct neighbours
+    changed = (reasoner.node_embeddings - stale).abs().amax(dim=1) > 1e-6
+    assert int(changed.sum()) > 2
+    assert torch.allclose(reasoner.node_embeddings, _full_forward(reasoner), atol=1e-6)
@@ -0,0 +1,96 @@
+"""
+IncrementalTfidf against a TfidfVectorizer batch fit on the same documents, plus its
+on-disk table: save/load round trip, max_docs decay and files with unhashed keys.
+"""
+
+import json
+import random
+from collections import Counter
+
+import numpy as np
+import pytest
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from layer2_candidate_generation import IncrementalTfidf, _term_counts
+
+WORDS = [
+    "tea", "plantation", "railway", "coffee", "rust", "colonial", "trade", "labour", "migration",
+    "port", "export", "steam", "shipping", "cotton", "textile", "ceylon", "kandy", "colombo",
+    "revolution", "industrial", "empire", "harbour", "crisis", "reform",
+]
+
+
+def _documents(seed, n=30):
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(WORDS) for _ in range(rng.randint(5, 40))) for _ in range(n)]
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_one_at_a_time_matches_batch_fit(seed):
+    docs = _documents(seed)
+    query = " ".join(random.Random(seed + 100).choice(WORDS) for _ in range(12))
+
+    tfidf = IncrementalTfidf(max_docs=0)
+    for i, doc in enumerate(docs):
+        tfidf.add_documents([(f"GLB_{i}", _term_counts(doc))])
+    sims = tfidf.similarities(_term_counts(query), [_term_counts(d) for d in docs])
+
+    vectorizer = TfidfVectorizer(stop_words="english")
+    doc_matrix = vectorizer.fit_transform(docs)
+    expected = (doc_matrix @ vectorizer.transform([query]).T).toarray().ravel()
+
+    assert tfidf.n_docs == len(docs)
+    np.testing.assert_allclose(sims, expected, atol=1e-9)
+
+
+def test_seen_keys_are_counted_once():
+    tfidf = IncrementalTfidf(max_docs=0)
+    tfidf.add_documents([("GLB_1", Counter(tea=2)), ("GLB_2", Counter(rust=1))])
+    tfidf.add_documents([("GLB_1", Counter(tea=5, coffee=1))])
+
+    assert tfidf.n_docs == 2
+    assert tfidf.df == Counter(tea=1, rust=1)
+
+
+def test_save_load_round_trip(tmp_path):
+    path = tmp_path / "tfidf.json"
+    docs = _documents(3)
+    query_counts = _term_counts(docs[0])
+    doc_counts = [_term_counts(d) for d in docs]
+
+    tfidf = IncrementalTfidf(str(path), max_docs=0)
+    tfidf.add_documents([(f"GLB_{i}", counts) for i, counts in enumerate(doc_counts)])
+    tfidf.save()
+    loaded = IncrementalTfidf(str(path), max_docs=0)
+
+    assert loaded.n_docs == tfidf.n_docs
+    assert loaded.df == tfidf.df
+    assert list(loaded.doc_keys) == list(tfidf.doc_keys)
+    np.testing.assert_array_equal(loaded.similarities(query_counts, doc_counts),
+                                  tfidf.similarities(query_counts, doc_counts))
+
+
+def test_max_docs_halves_the_corpus():
+    tfidf = IncrementalTfidf(max_docs=4)
+    tfidf.add_documents([(f"GLB_{i}", Counter(tea=1, **({"rust": 1} if i == 0 else {}))) for i in range(5)])
+
+    assert tfidf.n_docs == 2
+    # tea: 5 // 2; rust fell below 2 and is dropped
+    assert tfidf.df == Counter(tea=2)
+    # The newer half of the keys is kept
+    assert list(tfidf.doc_keys) == [IncrementalTfidf._hash_key(f"GLB_{i}") for i in (2, 3, 4)]
+
+
+def test_unhashed_keys_are_hashed_on_load(tmp_path):
+    path = tmp_path / "tfidf.json"
+    path.write_text(json.dumps({"n_docs": 1, "df": {"tea": 1}, "doc_keys": ["GLB_1"]}), encoding="utf-8")
+
+    tfidf = IncrementalTfidf(str(path), max_docs=0)
+    assert list(tfidf.doc_keys) == [IncrementalTfidf._hash_key("GLB_1")]
+    tfidf.add_documents([("GLB_1", Counter(tea=1))])
+    assert tfidf.n_docs == 1
+
+    tfidf.save()
+    payload = json.loads(path.read_text(encoding="utf-8"))
+    assert payload["version"] == IncrementalTfidf.VERSION
+    assert "GLB_1" not in payload["doc_keys"]
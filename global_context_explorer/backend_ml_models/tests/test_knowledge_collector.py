@@ -0,0 +1,59 @@
+"""KnowledgeCollector lookups go through the on-disk response cache and its per-source TTLs."""
+
+import json
+import time
+
+import pytest
+
+from http_cache import CachedResponse
+from layer1_knowledge_collection import KnowledgeCollector
+
+
+class CountingSession:
+    """Answers every summary request with a new revision number."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def get(self, url, params=None, timeout=None, **kwargs):
+        self.calls += 1
+        return CachedResponse(200, json.dumps({"title": "Tea", "extract": f"revision {self.calls}"}))
+
+
+@pytest.fixture
+def collector(tmp_path, monkeypatch):
+    monkeypatch.delenv("KNOWLEDGE_CACHE", raising=False)
+    collector = KnowledgeCollector(rate_limit=0, cache_path=str(tmp_path / "knowledge.sqlite"), offline=False)
+    collector.session = CountingSession()
+    return collector
+
+
+def test_repeat_lookup_is_served_from_the_response_cache(collector):
+    first = collector._get_wikipedia_summary("Tea")
+    second = collector._get_wikipedia_summary("Tea")
+
+    assert first == second
+    assert collector.session.calls == 1
+    assert collector.get_cache_stats()["http_cache"]["hits"] == 1
+
+
+def test_expired_entry_is_refetched(collector):
+    assert collector._get_wikipedia_summary("Tea")["extract"] == "revision 1"
+
+    collector.http_cache.ttls["summary"] = 0
+    time.sleep(0.01)
+
+    assert collector._get_wikipedia_summary("Tea")["extract"] == "revision 2"
+    assert collector.session.calls == 2
+
+
+def test_no_memo_when_the_response_cache_is_off(monkeypatch):
+    monkeypatch.setenv("KNOWLEDGE_CACHE", "off")
+    collector = KnowledgeCollector(rate_limit=0, offline=False)
+    collector.session = CountingSession()
+
+    collector._get_wikipedia_summary("Tea")
+    collector._get_wikipedia_summary("Tea")
+
+    assert collector.http_cache is None
+    assert collector.session.calls == 2
@@ -0,0 +1,78 @@
+"""InfluenceEnricher against llm_stub_server.py: concurrency, paragraph cache and its key."""
+
+import json
+import threading
+import urllib.request
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+from llm_influence_enricher import EnrichmentCache, InfluenceEnricher
+from llm_stub_server import make_handler
+
+
+@pytest.fixture
+def stub_endpoint():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(0.0))
+    server.RequestHandlerClass.log_message = lambda *args: None
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    host, port = server.server_address
+    yield f"http://{host}:{port}"
+    server.shutdown()
+    server.server_close()
+
+
+def _completions(base_url):
+    with urllib.request.urlopen(f"{base_url}/health") as resp:
+        return json.loads(resp.read())["completions"]
+
+
+def _jobs(n):
+    local = {"node_id": "LOC_001", "event_name": "Establishment of Tea Plantations", "date": "1867"}
+    return [
+        {
+            "local_event": local,
+            "global_event": {"id": f"GLB_{i}", "name": f"Global event {i}", "date": "1850"},
+            "mechanism": "trade",
+            "influence_type": "direct",
+            "evidence_snippets": [f"snippet {i}"],
+        }
+        for i in range(n)
+    ]
+
+
+@pytest.fixture(autouse=True)
+def api_key(monkeypatch):
+    monkeypatch.setenv("INFLUENCE_LLM_API_KEY", "stub")
+    monkeypatch.delenv("INFLUENCE_LLM_CACHE", raising=False)
+
+
+def test_second_run_is_served_from_cache(stub_endpoint, tmp_path):
+    endpoint = f"{stub_endpoint}/v1/chat/completions"
+    enricher = InfluenceEnricher(endpoint=endpoint, rate_limit=0, cache_path=str(tmp_path / "llm.sqlite"))
+
+    first = enricher.enrich_many(_jobs(4))
+    assert all(text and "Global event" in text for text in first)
+    assert _completions(stub_endpoint) == 4
+    assert (enricher.cache.hits, enricher.cache.misses) == (0, 4)
+
+    second = enricher.enrich_many(_jobs(4))
+    assert second == first
+    assert _completions(stub_endpoint) == 4
+    assert (enricher.cache.hits, enricher.cache.misses) == (4, 4)
+
+
+def test_cache_is_keyed_by_endpoint(stub_endpoint, tmp_path):
+    cache_path = str(tmp_path / "llm.sqlite")
+    stub = InfluenceEnricher(endpoint=f"{stub_endpoint}/v1/chat/completions", rate_limit=0, cache_path=cache_path)
+    stub.enrich_many(_jobs(2))
+
+    # Same model and cache file, different endpoint: stub paragraphs must not be reused
+    other = InfluenceEnricher(endpoint=f"{stub_endpoint}/other/v1/chat/completions", rate_limit=0,
+                              cache_path=cache_path)
+    assert other.model == stub.model
+    other.enrich_many(_jobs(2))
+    assert _completions(stub_endpoint) == 4
+
+    assert EnrichmentCache.make_key("L", "G", "m", "a") != EnrichmentCache.make_key("L", "G", "m", "b")
@@ -0,0 +1,175 @@
+"""Local-event matching: every query must resolve to the same node as the old row scans."""
+
+import math
+import random
+import re
+
+import pandas as pd
+import pytest
+
+from local_event_index import LocalEventIndex
+
+NAME_WORDS = [
+    "tea", "plantations", "railway", "network", "establishment", "expansion", "ceylon",
+    "buddhism", "arrival", "colombo", "harbour", "coffee", "rust", "university",
+    "peradeniya", "airport", "katunayake", "labour", "migration", "indian", "tamil",
+    "independence", "reforms", "colebrooke", "cameron", "irrigation", "tanks", "history",
+]
+
+
+def _old_find_local_event(nodes_df, text):
+    """Copy of CausalLogicPipeline._find_local_event before LocalEventIndex."""
+    locals_df = nodes_df[nodes_df["node_type"] == "local"].copy()
+    if len(locals_df) == 0:
+        return None, None
+
+    def _norm(s: str) -> str:
+        s = str(s or "").lower().strip()
+        s = re.sub(r"[^a-z0-9\s]+", " ", s)
+        s = re.sub(r"\s+", " ", s).strip()
+        return s
+
+    low_specific = {
+        "the", "and", "for", "with", "from", "into", "under", "over", "about",
+        "establishment", "introduction", "development", "expansion", "rise", "decline",
+        "formation", "construction", "opening", "arrival", "migration", "impact", "effects",
+        "transition", "growth", "reforms", "convention", "commission", "crisis",
+        "bring", "brings", "bringing", "brought", "introduced", "introducing",
+        "event", "history", "exhibit",
+        "sri", "lanka", "ceylon", "colombo", "kandy",
+    }
+
+    def _signal_terms(text: str):
+        toks = re.findall(r"[a-z0-9]+", _norm(text))
+        return [t for t in toks if len(t) >= 4 and t not in low_specific]
+
+    def _result(row):
+        return row["node_id"], {
+            "node_id": row["node_id"],
+            "event_name": row["event_name"],
+            "date": str(row["date"]),
+            "location": row.get("location", ""),
+            "description": row.get("description", ""),
+            "exhibit_name": row.get("exhibit_name", ""),
+        }
+
+    search_text = _norm(text)
+    if not search_text:
+        return None, None
+
+    for _, row in locals_df.iterrows():
+        ev = _norm(row.get("event_name", ""))
+        ex = _norm(row.get("exhibit_name", ""))
+        if search_text == ev or search_text == ex:
+            return _result(row)
+
+    query_terms = _signal_terms(search_text)
+    if not query_terms:
+        return None, None
+
+    candidates = []
+    for _, row in locals_df.iterrows():
+        ev = _norm(row.get("event_name", ""))
+        ex = _norm(row.get("exhibit_name", ""))
+        hay = f"{ev} {ex}"
+        if search_text in hay or ev in search_text or ex in search_text:
+            matched_terms = sum(1 for t in query_terms if t in hay)
+            if len(query_terms) <= 1:
+                required_terms = 1
+            else:
+                required_terms = max(2, math.ceil(0.6 * len(query_terms)))
+            if matched_terms >= required_terms:
+                candidates.append((row, matched_terms))
+
+    if len(candidates) == 1:
+        return _result(candidates[0][0])
+
+    strict = []
+    for _, row in locals_df.iterrows():
+        ev = _norm(row.get("event_name", ""))
+        ex = _norm(row.get("exhibit_name", ""))
+        hay = f"{ev} {ex}"
+        if all(t in hay for t in query_terms):
+            strict.append(row)
+
+    if len(strict) == 1:
+        return _result(strict[0])
+
+    return None, None
+
+
+def _comparable(result):
+    """NaN fields compare equal (pandas hands out distinct NaN objects per row)."""
+    node_id, data = result
+    if data is None:
+        return node_id, None
+    return node_id, {k: None if isinstance(v, float) and math.isnan(v) else v for k, v in data.items()}
+
+
+def _random_name(rng, low=1, high=5):
+    words = rng.sample(NAME_WORDS, rng.randint(low, high))
+    name = " ".join(words)
+    if rng.random() < 0.3:
+        name = name.title()
+    if rng.random() < 0.2:
+        name = name.replace(" ", rng.choice([" - ", ", ", " & ", "  "]), 1)
+    return name
+
+
+def _random_nodes(rng, n):
+    rows = []
+    for i in range(n):
+        rows.append({
+            "node_id": f"{'LOC' if i % 3 else 'GLB'}_{i:03d}",
+            "node_type": "local" if i % 3 else "global",
+            "event_name": _random_name(rng) if rng.random() > 0.05 else float("nan"),
+            "date": rng.choice(["1867-01-01", "247 BCE", "19th century", "1869–1880s", float("nan")]),
+            "location": rng.choice(["Sri Lanka", "Colombo", float("nan")]),
+            "description": rng.choice(["", "Some description", float("nan")]),
+            "exhibit_name": _random_name(rng, 1, 3) + " Exhibit" if rng.random() > 0.2 else float("nan"),
+        })
+    # A few duplicated names: the first row in file order must win
+    for _ in range(max(1, n // 10)):
+        src, dst = rng.randrange(n), rng.randrange(n)
+        rows[dst]["event_name"] = rows[src]["event_name"]
+    return pd.DataFrame(rows)
+
+
+def _random_queries(rng, nodes_df):
+    names = [str(v) for v in nodes_df["event_name"].tolist() + nodes_df["exhibit_name"].tolist()]
+    queries = []
+    for _ in range(150):
+        roll = rng.random()
+        if roll < 0.25:
+            queries.append(rng.choice(names))
+        elif roll < 0.4:
+            queries.append(rng.choice(names).upper() + rng.choice(["", "!", " ?", "."]))
+        elif roll < 0.6:
+            words = rng.choice(names).split()
+            queries.append(" ".join(rng.sample(words, rng.randint(1, len(words)))))
+        elif roll < 0.75:
+            queries.append(f"{rng.choice(names)} {rng.choice(names)}")
+        elif roll < 0.9:
+            word = rng.choice(NAME_WORDS)
+            queries.append(word[:rng.randint(3, len(word))])
+        else:
+            queries.append(_random_name(rng))
+    return queries + ["", "   ", "the and", "sri lanka"]
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_match_agrees_with_old_scan(seed):
+    rng = random.Random(seed)
+    nodes_df = _random_nodes(rng, rng.randint(5, 60))
+    index = LocalEventIndex(nodes_df)
+    for query in _random_queries(rng, nodes_df):
+        assert _comparable(index.match(query)) == _comparable(_old_find_local_event(nodes_df, query)), query
+
+
+def test_event_names_skip_missing():
+    nodes_df = pd.DataFrame([
+        {"node_id": "LOC_1", "node_type": "local", "event_name": "Tea", "date": "1867", "exhibit_name": "Tea Exhibit"},
+        {"node_id": "LOC_2", "node_type": "local", "event_name": float("nan"), "date": "1867", "exhibit_name": "X"},
+        {"node_id": "GLB_1", "node_type": "global", "event_name": "War", "date": "1914", "exhibit_name": ""},
+    ])
+    assert LocalEventIndex(nodes_df).event_names == ["Tea"]
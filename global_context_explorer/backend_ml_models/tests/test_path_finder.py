@@ -0,0 +1,93 @@
+"""PathFinder.find_paths_to on small random digraphs with cycles and parallel edges."""
+
+import random
+
+import pytest
+import torch
+from torch_geometric.data import Data
+
+from gnn_model import PathFinder
+
+
+def _old_find_paths(edges, source_idx, target_idx, max_depth, max_paths):
+    """Copy of the original PathFinder.find_paths BFS (edge-order adjacency, visited-path set)."""
+    adj_list = {}
+    for source, target in edges:
+        adj_list.setdefault(source, []).append(target)
+
+    paths = []
+    queue = [(source_idx, [source_idx])]
+    visited_paths = set()
+    while queue and len(paths) < max_paths:
+        current_idx, path = queue.pop(0)
+        if current_idx == target_idx and len(path) > 1:
+            paths.append(path)
+            continue
+        if len(path) >= max_depth + 1:
+            continue
+        for neighbor_idx in adj_list.get(current_idx, []):
+            if neighbor_idx not in path:
+                new_path = path + [neighbor_idx]
+                if tuple(new_path) not in visited_paths:
+                    visited_paths.add(tuple(new_path))
+                    queue.append((neighbor_idx, new_path))
+    return paths
+
+
+def _random_graph(rng):
+    num_nodes = rng.randint(2, 30)
+    edges = []
+    for _ in range(rng.randint(0, num_nodes * 3)):
+        edge = (rng.randrange(num_nodes), rng.randrange(num_nodes))
+        edges.append(edge)
+        if rng.random() < 0.1:
+            edges.append(edge)  # parallel edge
+    data = Data(
+        x=torch.zeros((num_nodes, 10)),
+        edge_index=torch.tensor(edges, dtype=torch.long).t().reshape(2, -1).contiguous(),
+    )
+    data.node_to_idx = {f"N{i}": i for i in range(num_nodes)}
+    data.idx_to_node = {i: f"N{i}" for i in range(num_nodes)}
+    return data, edges
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_first_path_matches_old_bfs(seed):
+    rng = random.Random(seed)
+    data, edges = _random_graph(rng)
+    finder = PathFinder(data)
+    num_nodes = data.x.shape[0]
+
+    for _ in range(5):
+        target = rng.randrange(num_nodes)
+        max_depth = rng.randint(1, 4)
+        sources = [f"N{i}" for i in range(num_nodes)] + ["missing"]
+        found = finder.find_paths_to(f"N{target}", sources, max_depth=max_depth)
+
+        for source in range(num_nodes):
+            old = _old_find_paths(edges, source, target, max_depth, max_paths=1)
+            new = found.get(f"N{source}")
+            if not old:
+                assert new is None
+                continue
+            assert new[0]['path'] == old[0]
+            assert new[0]['path_node_ids'] == [f"N{i}" for i in old[0]]
+            assert new[0]['length'] == len(old[0]) - 1
+        assert "missing" not in found
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_several_paths_are_the_old_shortest_ones(seed):
+    rng = random.Random(seed)
+    data, edges = _random_graph(rng)
+    finder = PathFinder(data)
+    num_nodes = data.x.shape[0]
+
+    target = rng.randrange(num_nodes)
+    found = finder.find_paths_to(f"N{target}", [f"N{i}" for i in range(num_nodes)], max_depth=3, paths_per_source=4)
+    for source in range(num_nodes):
+        old = _old_find_paths(edges, source, target, 3, max_paths=10_000)
+        if not old:
+            continue
+        shortest = [p for p in old if len(p) == len(old[0])][:4]
+        assert [p['path'] for p in found[f"N{source}"]] == shortest
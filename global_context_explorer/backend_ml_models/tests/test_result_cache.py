@@ -0,0 +1,80 @@
+"""ResultCache: round trip, TTL expiry, size bound and invalidate_results."""
+
+import os
+import time
+
+import pytest
+
+from result_cache import ResultCache, invalidate_results
+
+
+@pytest.fixture
+def cache_path(tmp_path):
+    return str(tmp_path / "results.sqlite")
+
+
+def test_put_get_round_trip(cache_path):
+    cache = ResultCache(cache_path, ttl_seconds=60)
+    key = ResultCache.make_key("fp", "Tea Heritage Exhibit", date=None, location=None, top_k=10)
+    result = {"top_influences": [{"name": "Coffee rust", "score": 0.5}], "statistics": {"n": 1}}
+    cache.put(key, result)
+
+    assert cache.get(key) == result
+    # Callers get a fresh copy each time
+    cache.get(key)["statistics"]["n"] = 2
+    assert cache.get(key) == result
+    assert cache.stats()["hits"] == 3
+    cache.close()
+
+
+def test_key_normalizes_request(cache_path):
+    a = ResultCache.make_key("fp", "  Tea   Heritage Exhibit ", date="1867", location=None, top_k=10)
+    b = ResultCache.make_key("fp", "tea heritage exhibit", date=" 1867", location="", top_k=10)
+    assert a == b
+    assert a != ResultCache.make_key("other-fp", "tea heritage exhibit", date="1867", location="", top_k=10)
+    assert a != ResultCache.make_key("fp", "tea heritage exhibit", date="1867", location="", top_k=5)
+
+
+def test_expired_entries_miss(cache_path):
+    cache = ResultCache(cache_path, ttl_seconds=0.05)
+    cache.put("k", {"v": 1})
+    assert cache.get("k") == {"v": 1}
+    time.sleep(0.1)
+    assert cache.get("k") is None
+    assert cache.stats()["misses"] == 1
+    # The next put drops rows past the TTL
+    cache.put("k2", {"v": 2})
+    assert cache.stats()["entries"] == 1
+    cache.close()
+
+
+def test_size_bound_evicts_least_recently_used(cache_path):
+    cache = ResultCache(cache_path, ttl_seconds=60, max_bytes=300)
+    for i in range(3):
+        cache.put(f"k{i}", {"text": "x" * 80})
+        time.sleep(0.01)
+    cache.get("k0")  # k1 is now the least recently used
+    cache.put("k3", {"text": "x" * 80})
+    assert cache.get("k1") is None
+    assert cache.get("k0") is not None and cache.get("k3") is not None
+    assert cache.stats()["bytes"] <= 300
+    cache.close()
+
+
+def test_invalidate_results_clears_file(cache_path):
+    cache = ResultCache(cache_path, ttl_seconds=60)
+    cache.put("a", {"v": 1})
+    cache.put("b", {"v": 2})
+    cache.close()
+
+    assert invalidate_results(cache_path) == 2
+    reopened = ResultCache(cache_path, ttl_seconds=60)
+    assert reopened.get("a") is None
+    assert reopened.stats()["entries"] == 0
+    reopened.close()
+
+
+def test_invalidate_results_without_file(tmp_path):
+    missing = str(tmp_path / "missing.sqlite")
+    assert invalidate_results(missing) == 0
+    assert not os.path.exists(missing)
@@ -4,49 +4,50 @@ Train a GNN for causal link prediction using your local CSV data.
 This script trains CausalGNN embeddings + a small link predictor head on:
   - Positive edges from edges CSV (source_node_id -> target_node_id)
   - Negative edges sampled from non-existing (GLOBAL_* -> LOC_*) pairs
+    (optionally --hard-neg-ratio of them from temporally close GLOBAL_* events)
 
 It saves weights to:
   models/causal_gnn.pt
 
 Layer 4 (layer4_gnn_reasoning.py) will automatically load these weights if present.
+
+By default every epoch is one full-graph forward pass. For large graphs use
+--batch-size: each step then runs the GNN on the sampled neighbourhood of one batch
+of pairs (--fanout neighbours per layer), with fresh negatives drawn per batch by
+--num-workers loader processes, so peak memory depends on the batch, not the graph.
+--patience stops on validation loss (the best weights are saved) and --checkpoint /
+--resume continue an interrupted run.
 """
 
 import argparse
+import copy
+import math
+import os
 from pathlib import Path
-from typing import List, Tuple, Set, Dict
+from typing import List, Optional, Tuple, Dict
 
 import numpy as np
 import torch
 import torch.nn as nn
 from torch.optim import Adam
+from torch.utils.data import DataLoader, Dataset
 
 from data_loader import HistoricalDataLoader
-from gnn_model import CausalGNN
-
-
-class LinkPredictor(nn.Module):
-    """Simple MLP link predictor over concatenated node embeddings."""
-
-    def __init__(self, emb_dim: int, hidden_dim: int = 64, dropout: float = 0.2):
-        super().__init__()
-        self.net = nn.Sequential(
-            nn.Linear(emb_dim * 2, hidden_dim),
-            nn.ReLU(),
-            nn.Dropout(dropout),
-            nn.Linear(hidden_dim, 1),
-        )
-
-    def forward(self, src_emb: torch.Tensor, dst_emb: torch.Tensor) -> torch.Tensor:
-        x = torch.cat([src_emb, dst_emb], dim=-1)
-        return self.net(x).squeeze(-1)
+from date_utils import year_columns
+from gnn_model import CausalGNN, LinkPredictor
 
 
 def _build_edge_pairs(
     loader: HistoricalDataLoader,
     negative_multiplier: int = 3,
     seed: int = 42,
+    hard_neg_ratio: float = 0.0,
+    hard_neg_window: float = 50.0,
 ) -> Tuple[np.ndarray, np.ndarray]:
     """
+    Positives are the edges of the graph; negatives are distinct non-edges from the
+    GLOBAL_* x LOC_* space (see NegativeSampler for hard negatives).
+
     Returns:
       edge_index_pairs: shape [N, 2] with integer node indices (src_idx, dst_idx)
       labels: shape [N] with 1 for positive, 0 for negative
@@ -55,22 +56,31 @@ def _build_edge_pairs(
         loader.load_data()
 
     node_to_idx = loader.node_to_idx
-    nodes_df = loader.nodes_df
     edges_df = loader.edges_df
 
-    # positives from edges_df
-    pos_pairs: List[Tuple[int, int]] = []
-    pos_set: Set[Tuple[int, int]] = set()
+    # positives from edges_df (rows whose endpoints are both known nodes)
+    src = edges_df["source_node_id"].map(node_to_idx)
+    dst = edges_df["target_node_id"].map(node_to_idx)
+    known = (src.notna() & dst.notna()).to_numpy()
+    pos = np.stack([src[known].to_numpy(dtype=np.int64), dst[known].to_numpy(dtype=np.int64)], axis=1)
+
+    rng = np.random.default_rng(seed)
+    num_negs = max(len(pos) * negative_multiplier, 1)
+
+    sampler = NegativeSampler(loader, pos, hard_ratio=hard_neg_ratio, hard_window=hard_neg_window)
+    neg = sampler.sample(rng, num_negs, unique=True)
+
+    all_pairs = np.concatenate([pos, neg]).astype(np.int64)
+    labels = np.concatenate([np.ones(len(pos), dtype=np.int64), np.zeros(len(neg), dtype=np.int64)])
+
+    # shuffle
+    perm = rng.permutation(len(all_pairs))
+    return all_pairs[perm], labels[perm]
+
 
-    for _, row in edges_df.iterrows():
-        s = row["source_node_id"]
-        t = row["target_node_id"]
-        if s in node_to_idx and t in node_to_idx:
-            pair = (node_to_idx[s], node_to_idx[t])
-            pos_pairs.append(pair)
-            pos_set.add(pair)
 
-    # candidate negative space: GLOBAL_* -> LOC_* pairs (common for this project)
+def _negative_space(node_to_idx: Dict[str, int]) -> Tuple[List[str], List[str]]:
+    """Candidate negative space: GLOBAL_* -> LOC_* pairs (common for this project)."""
     global_ids = [nid for nid in node_to_idx.keys() if str(nid).startswith("GLOBAL_")]
     local_ids = [nid for nid in node_to_idx.keys() if str(nid).startswith("LOC_")]
 
@@ -79,32 +89,237 @@ def _build_edge_pairs(
         global_ids = list(node_to_idx.keys())
     if not local_ids:
         local_ids = list(node_to_idx.keys())
+    return global_ids, local_ids
 
-    rng = np.random.default_rng(seed)
-    num_negs = max(len(pos_pairs) * negative_multiplier, 1)
-
-    neg_pairs: List[Tuple[int, int]] = []
-    tries = 0
-    max_tries = num_negs * 50
-
-    while len(neg_pairs) < num_negs and tries < max_tries:
-        tries += 1
-        s = rng.choice(global_ids)
-        t = rng.choice(local_ids)
-        pair = (node_to_idx[s], node_to_idx[t])
-        if pair in pos_set:
-            continue
-        # avoid duplicates
-        if pair in neg_pairs:
-            continue
-        neg_pairs.append(pair)
-
-    all_pairs = np.array(pos_pairs + neg_pairs, dtype=np.int64)
-    labels = np.array([1] * len(pos_pairs) + [0] * len(neg_pairs), dtype=np.int64)
 
-    # shuffle
-    perm = rng.permutation(len(all_pairs))
-    return all_pairs[perm], labels[perm]
+class NegativeSampler:
+    """
+    Array-based sampler of (global, local) index pairs that are not positive edges.
+
+    Positive pairs are hashed to int64 keys (src * num_nodes + dst) kept as a sorted array
+    plus a boolean hash table (~8 slots per positive). A draw is a batch of vectorized
+    integer ops: the table rejects most keys in O(1) and only its hits are confirmed by a
+    searchsorted on the sorted keys, with no per-pair Python work.
+
+    Hard negatives: with hard_ratio > 0 that share of draws picks, for the sampled local
+    event, a global event whose year (date_utils.year_columns) lies within
+    hard_window years of it. Temporally close non-links are the confusable ones, since
+    Layer 4 candidates are already filtered by time. Draws without a dated neighbour in
+    the window fall back to uniform.
+    """
+
+    def __init__(
+        self,
+        loader: HistoricalDataLoader,
+        pos_pairs: np.ndarray,
+        hard_ratio: float = 0.0,
+        hard_window: float = 50.0,
+    ):
+        node_to_idx = loader.node_to_idx
+        self.num_nodes = len(node_to_idx)
+        global_ids, local_ids = _negative_space(node_to_idx)
+        self.global_idx = np.fromiter((node_to_idx[g] for g in global_ids), dtype=np.int64, count=len(global_ids))
+        self.local_idx = np.fromiter((node_to_idx[t] for t in local_ids), dtype=np.int64, count=len(local_ids))
+        pos_pairs = np.asarray(pos_pairs, dtype=np.int64).reshape(-1, 2)
+        self.pos_keys = np.unique(pos_pairs[:, 0] * self.num_nodes + pos_pairs[:, 1])
+        self._hash_bits = max(10, int(np.ceil(np.log2(max(len(self.pos_keys), 1) * 8))))
+        self._hash_table = np.zeros(1 << self._hash_bits, dtype=bool)
+        self._hash_table[self._hash(self.pos_keys)] = True
+
+        self.hard_ratio = float(hard_ratio)
+        self.hard_window = float(hard_window)
+        self.years = np.full(self.num_nodes, np.nan)
+        self.hard_globals = np.empty(0, dtype=np.int64)
+        self.hard_years = np.empty(0)
+        if self.hard_ratio > 0:
+            self.years = _node_years(loader)
+            g_years = self.years[self.global_idx]
+            dated = ~np.isnan(g_years)
+            order = np.argsort(g_years[dated], kind="stable")
+            self.hard_globals = self.global_idx[dated][order]
+            self.hard_years = g_years[dated][order]
+            if not len(self.hard_globals):
+                print("[train] warning: no dated GLOBAL_* nodes; hard negatives fall back to uniform sampling")
+
+    def _hash(self, keys: np.ndarray) -> np.ndarray:
+        # Fibonacci hashing: top bits of key * 2^64/phi (wrapping uint64 multiply).
+        return ((keys.astype(np.uint64) * np.uint64(0x9E3779B97F4A7C15)) >> np.uint64(64 - self._hash_bits)).astype(np.int64)
+
+    def is_positive(self, keys: np.ndarray) -> np.ndarray:
+        out = self._hash_table[self._hash(keys)]
+        hits = np.flatnonzero(out)
+        if len(hits):
+            pos = np.minimum(np.searchsorted(self.pos_keys, keys[hits]), len(self.pos_keys) - 1)
+            out[hits] = self.pos_keys[pos] == keys[hits]
+        return out
+
+    def _draw(self, rng: np.random.Generator, m: int) -> Tuple[np.ndarray, np.ndarray]:
+        s = self.global_idx[rng.integers(0, len(self.global_idx), size=m)]
+        t = self.local_idx[rng.integers(0, len(self.local_idx), size=m)]
+        if self.hard_ratio > 0 and len(self.hard_globals):
+            hard = np.flatnonzero(rng.random(m) < self.hard_ratio)
+            t_years = self.years[t[hard]]
+            hard, t_years = hard[~np.isnan(t_years)], t_years[~np.isnan(t_years)]
+            lo = np.searchsorted(self.hard_years, t_years - self.hard_window, side="left")
+            hi = np.searchsorted(self.hard_years, t_years + self.hard_window, side="right")
+            ok = hi > lo
+            pick = lo[ok] + (rng.random(int(ok.sum())) * (hi - lo)[ok]).astype(np.int64)
+            s[hard[ok]] = self.hard_globals[pick]
+        return s, t
+
+    def sample(self, rng: np.random.Generator, count: int, unique: bool = False) -> np.ndarray:
+        """
+        Args:
+            rng: Random generator (callers seed it for reproducible draws)
+            count: Number of pairs wanted
+            unique: Return distinct pairs (fewer than `count` if the space runs out)
+
+        Returns:
+            int64 array of shape [<= count, 2] with (src_idx, dst_idx)
+        """
+        if count <= 0 or not len(self.global_idx) or not len(self.local_idx):
+            return np.empty((0, 2), dtype=np.int64)
+        if unique:
+            count = min(count, len(self.global_idx) * len(self.local_idx))
+
+        keys = np.empty(0, dtype=np.int64)
+        for _ in range(50):
+            need = count - len(keys)
+            if need <= 0:
+                break
+            s, t = self._draw(rng, need + need // 8 + 64)
+            new = s * self.num_nodes + t
+            new = new[(s != t) & ~self.is_positive(new)]
+            if unique:
+                # distinct, in draw order, and not already taken
+                _, first = np.unique(new, return_index=True)
+                new = new[np.sort(first)]
+                if len(keys):
+                    new = new[~np.isin(new, keys)]
+            keys = np.concatenate([keys, new[:need]])
+        return np.stack([keys // self.num_nodes, keys % self.num_nodes], axis=1)
+
+
+def _node_years(loader: HistoricalDataLoader) -> np.ndarray:
+    """Start year per node index (NaN when the node has no parseable date)."""
+    years = np.full(len(loader.node_to_idx), np.nan)
+    nodes = loader.nodes_df.drop_duplicates(subset="node_id", keep="first")
+    idx = nodes["node_id"].map(loader.node_to_idx)
+    known = idx.notna().to_numpy()
+    years[idx[known].to_numpy(dtype=np.int64)] = year_columns(nodes)[0][known]
+    return years
+
+
+class NeighborSampler:
+    """
+    Samples the computation graph of a set of seed nodes.
+
+    GCN layers aggregate along edge_index (source -> target), so each hop takes up to
+    `fanout` incoming edges of every frontier node (-1 keeps all of them). Incoming
+    edges are kept in CSR form (sorted by target) so a hop is a slice per node.
+    """
+
+    def __init__(self, edge_index: torch.Tensor, num_nodes: int, fanouts: List[int]):
+        src, dst = edge_index.cpu().numpy()
+        order = np.argsort(dst, kind="stable")
+        self.src = src[order]
+        self.eid = order
+        self.rowptr = np.zeros(num_nodes + 1, dtype=np.int64)
+        np.cumsum(np.bincount(dst, minlength=num_nodes), out=self.rowptr[1:])
+        self.fanouts = fanouts
+
+    def sample(self, seeds: np.ndarray, rng: np.random.Generator) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns:
+          n_id: node indices of the subgraph (seeds first)
+          e_id: columns of edge_index inside the subgraph
+        """
+        n_id = list(dict.fromkeys(int(v) for v in seeds))
+        seen = set(n_id)
+        frontier = n_id
+        e_ids: List[int] = []
+        for fanout in self.fanouts:
+            next_frontier = []
+            for v in frontier:
+                lo, hi = self.rowptr[v], self.rowptr[v + 1]
+                if hi == lo:
+                    continue
+                picks = np.arange(lo, hi)
+                if 0 <= fanout < hi - lo:
+                    picks = rng.choice(picks, size=fanout, replace=False)
+                e_ids.extend(self.eid[picks].tolist())
+                for u in self.src[picks].tolist():
+                    if u not in seen:
+                        seen.add(u)
+                        n_id.append(u)
+                        next_frontier.append(u)
+            frontier = next_frontier
+            if not frontier:
+                break
+        return np.asarray(n_id, dtype=np.int64), np.unique(np.asarray(e_ids, dtype=np.int64))
+
+
+def _subgraph_batch(data, sampler: NeighborSampler, pairs: np.ndarray, labels: np.ndarray, rng) -> Dict[str, torch.Tensor]:
+    """Features, relabelled edges and pair positions for the sampled subgraph of `pairs`."""
+    n_id, e_id = sampler.sample(np.unique(pairs.ravel()), rng)
+    order = np.argsort(n_id)
+    sorted_ids = n_id[order]
+
+    def local(idx: np.ndarray) -> torch.Tensor:
+        return torch.from_numpy(order[np.searchsorted(sorted_ids, idx)])
+
+    edge_attr = getattr(data, "edge_attr", None)
+    e = torch.from_numpy(e_id)
+    return {
+        "x": data.x[torch.from_numpy(n_id)],
+        "edge_index": torch.stack([local(data.edge_index[0, e].numpy()), local(data.edge_index[1, e].numpy())])
+        if len(e_id) else torch.empty((2, 0), dtype=torch.long),
+        "edge_attr": edge_attr[e] if edge_attr is not None else None,
+        "src": local(pairs[:, 0]),
+        "dst": local(pairs[:, 1]),
+        "y": torch.tensor(labels, dtype=torch.float32),
+    }
+
+
+class LinkBatches(Dataset):
+    """
+    Item i of an epoch = batch i of shuffled positive training pairs plus fresh negatives
+    and its sampled subgraph. Randomness is seeded by (seed, epoch, i), so results do not
+    depend on how many loader workers build the batches.
+    """
+
+    def __init__(
+        self,
+        data,
+        sampler: NeighborSampler,
+        negatives: NegativeSampler,
+        pos_pairs: np.ndarray,
+        batch_size: int,
+        neg_mult: int,
+        seed: int,
+    ):
+        self.data = data
+        self.sampler = sampler
+        self.negatives = negatives
+        self.pos_pairs = pos_pairs
+        self.batch_size = max(1, int(batch_size))
+        self.neg_mult = neg_mult
+        self.seed = seed
+        self.epoch = 0
+        self._perm: Optional[Tuple[int, np.ndarray]] = None
+
+    def __len__(self) -> int:
+        return math.ceil(len(self.pos_pairs) / self.batch_size)
+
+    def __getitem__(self, i: int) -> Dict[str, torch.Tensor]:
+        if self._perm is None or self._perm[0] != self.epoch:
+            self._perm = (self.epoch, np.random.default_rng([self.seed, self.epoch]).permutation(len(self.pos_pairs)))
+        rng = np.random.default_rng([self.seed, self.epoch, i])
+        pos = self.pos_pairs[self._perm[1][i * self.batch_size:(i + 1) * self.batch_size]]
+        neg = self.negatives.sample(rng, len(pos) * self.neg_mult)
+        pairs = np.concatenate([pos, neg])
+        labels = np.concatenate([np.ones(len(pos)), np.zeros(len(neg))])
+        return _subgraph_batch(self.data, self.sampler, pairs, labels, rng)
 
 
 def _train_val_split(pairs: np.ndarray, labels: np.ndarray, val_ratio: float = 0.2):
@@ -136,9 +351,47 @@ def _evaluate(
     src_idx = torch.tensor(pairs[:, 0], dtype=torch.long, device=device)
     dst_idx = torch.tensor(pairs[:, 1], dtype=torch.long, device=device)
     logits = head(emb[src_idx], emb[dst_idx])
-    probs = torch.sigmoid(logits)
-
     y = torch.tensor(labels, dtype=torch.float32, device=device)
+    return _metrics(logits, y)
+
+
+@torch.no_grad()
+def _evaluate_sampled(
+    gnn: CausalGNN,
+    head: LinkPredictor,
+    data,
+    sampler: NeighborSampler,
+    pairs: np.ndarray,
+    labels: np.ndarray,
+    batch_size: int,
+    device: str,
+    seed: int,
+) -> Dict[str, float]:
+    """Like _evaluate, but on sampled subgraphs in chunks of batch_size (bounded memory)."""
+    gnn.eval()
+    head.eval()
+
+    rng = np.random.default_rng(seed)
+    all_logits, all_y = [], []
+    for start in range(0, len(pairs), max(1, batch_size)):
+        batch = _subgraph_batch(data, sampler, pairs[start:start + batch_size], labels[start:start + batch_size], rng)
+        emb = _forward_batch(gnn, batch, device)
+        all_logits.append(head(emb[batch["src"].to(device)], emb[batch["dst"].to(device)]))
+        all_y.append(batch["y"].to(device))
+    return _metrics(torch.cat(all_logits), torch.cat(all_y))
+
+
+def _forward_batch(gnn: CausalGNN, batch: Dict[str, torch.Tensor], device: str) -> torch.Tensor:
+    edge_attr = batch.get("edge_attr")
+    return gnn(
+        batch["x"].to(device),
+        batch["edge_index"].to(device),
+        edge_attr.to(device) if edge_attr is not None else None,
+    )
+
+
+def _metrics(logits: torch.Tensor, y: torch.Tensor) -> Dict[str, float]:
+    probs = torch.sigmoid(logits)
     preds = (probs >= 0.5).float()
     acc = (preds == y).float().mean().item()
 
@@ -149,7 +402,70 @@ def _evaluate(
     precision = tp / (tp + fp) if (tp + fp) else 0.0
     recall = tp / (tp + fn) if (tp + fn) else 0.0
 
-    return {"acc": acc, "precision": precision, "recall": recall}
+    loss = nn.functional.binary_cross_entropy_with_logits(logits, y).item() if len(y) else 0.0
+
+    return {"acc": acc, "precision": precision, "recall": recall, "loss": loss}
+
+
+def _parse_fanout(value: str, num_layers: int) -> List[int]:
+    """'10,5' -> [10, 5, 5] (last value repeats for the remaining GCN layers)."""
+    fanouts = [int(v) for v in str(value).split(",") if v.strip()] or [-1]
+    return (fanouts + [fanouts[-1]] * num_layers)[:num_layers]
+
+
+class _EarlyStopping:
+    """Tracks the best validation loss and keeps a copy of the best weights."""
+
+    def __init__(self, patience: int):
+        self.patience = patience
+        self.best_loss = float("inf")
+        self.best_epoch = 0
+        self.bad_evals = 0
+        self.best_states: Optional[Dict] = None
+
+    def update(self, epoch: int, val_loss: float, gnn: CausalGNN, head: LinkPredictor) -> bool:
+        """Record one evaluation. Returns True when training should stop."""
+        if val_loss < self.best_loss:
+            self.best_loss = val_loss
+            self.best_epoch = epoch
+            self.bad_evals = 0
+            self.best_states = {
+                "gnn": copy.deepcopy(gnn.state_dict()),
+                "head": copy.deepcopy(head.state_dict()),
+            }
+            return False
+        self.bad_evals += 1
+        return self.patience > 0 and self.bad_evals >= self.patience
+
+    def state(self) -> Dict:
+        return {
+            "best_loss": self.best_loss,
+            "best_epoch": self.best_epoch,
+            "bad_evals": self.bad_evals,
+            "best_states": self.best_states,
+        }
+
+    def load(self, state: Dict) -> None:
+        self.best_loss = state.get("best_loss", float("inf"))
+        self.best_epoch = state.get("best_epoch", 0)
+        self.bad_evals = state.get("bad_evals", 0)
+        self.best_states = state.get("best_states")
+
+
+def _save_checkpoint(path: Path, epoch: int, gnn, head, opt, stopper: _EarlyStopping, meta: Dict) -> None:
+    """Everything needed to continue training after `epoch` (written atomically)."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    torch.save({
+        "epoch": epoch,
+        "gnn_state_dict": gnn.state_dict(),
+        "link_head_state_dict": head.state_dict(),
+        "optimizer_state_dict": opt.state_dict(),
+        "early_stopping": stopper.state(),
+        "torch_rng_state": torch.get_rng_state(),
+        "meta": meta,
+    }, tmp)
+    os.replace(tmp, path)
 
 
 def main():
@@ -159,9 +475,25 @@ def main():
     parser.add_argument("--epochs", type=int, default=200, help="Training epochs")
     parser.add_argument("--lr", type=float, default=1e-2, help="Learning rate")
     parser.add_argument("--neg-mult", type=int, default=3, help="Negative samples per positive")
+    parser.add_argument("--hard-neg-ratio", type=float, default=0.0,
+                        help="Share of negatives drawn from temporally close GLOBAL_* events (0 = uniform)")
+    parser.add_argument("--hard-neg-window", type=float, default=50.0,
+                        help="Year window for hard negatives")
     parser.add_argument("--val-ratio", type=float, default=0.2, help="Validation ratio")
     parser.add_argument("--seed", type=int, default=42, help="Random seed")
     parser.add_argument("--device", type=str, default="cpu", help="cpu or cuda")
+    parser.add_argument("--batch-size", type=int, default=0,
+                        help="Positive pairs per mini-batch with neighbour sampling (0 = full-graph epochs)")
+    parser.add_argument("--fanout", type=str, default="10",
+                        help="Neighbours sampled per node per GCN layer, e.g. 10 or 15,10,5 (-1 = all)")
+    parser.add_argument("--num-workers", type=int, default=0,
+                        help="Loader processes that sample negatives and subgraphs in --batch-size mode")
+    parser.add_argument("--eval-every", type=int, default=20, help="Evaluate (and checkpoint) every N epochs")
+    parser.add_argument("--patience", type=int, default=0,
+                        help="Stop after N evaluations without a lower val loss and keep the best weights (0 = off)")
+    parser.add_argument("--checkpoint", type=str, default="",
+                        help="Write a resumable checkpoint here at every evaluation")
+    parser.add_argument("--resume", action="store_true", help="Continue from --checkpoint")
 
     args = parser.parse_args()
 
@@ -176,7 +508,13 @@ def main():
     loader = HistoricalDataLoader(args.nodes, args.edges)
     data = loader.build_graph()
 
-    pairs, labels = _build_edge_pairs(loader, negative_multiplier=args.neg_mult, seed=args.seed)
+    pairs, labels = _build_edge_pairs(
+        loader,
+        negative_multiplier=args.neg_mult,
+        seed=args.seed,
+        hard_neg_ratio=args.hard_neg_ratio,
+        hard_neg_window=args.hard_neg_window,
+    )
     (train_pairs, train_labels), (val_pairs, val_labels) = _train_val_split(pairs, labels, val_ratio=args.val_ratio)
 
     print(f"[train] total pairs: {len(pairs)} (pos+neg)")
@@ -195,36 +533,133 @@ def main():
     opt = Adam(list(gnn.parameters()) + list(head.parameters()), lr=args.lr)
     loss_fn = nn.BCEWithLogitsLoss()
 
-    data_x = data.x.to(device)
-    data_edge_index = data.edge_index.to(device)
-    data_edge_attr = getattr(data, "edge_attr", None)
-    if data_edge_attr is not None:
-        data_edge_attr = data_edge_attr.to(device)
-
-    y_train = torch.tensor(train_labels, dtype=torch.float32, device=device)
-    train_src = torch.tensor(train_pairs[:, 0], dtype=torch.long, device=device)
-    train_dst = torch.tensor(train_pairs[:, 1], dtype=torch.long, device=device)
-
-    for epoch in range(1, args.epochs + 1):
-        gnn.train()
-        head.train()
-
-        opt.zero_grad()
-
-        emb = gnn(data_x, data_edge_index, data_edge_attr)
-        logits = head(emb[train_src], emb[train_dst])
-        loss = loss_fn(logits, y_train)
-        loss.backward()
-        opt.step()
-
-        if epoch == 1 or epoch % 20 == 0 or epoch == args.epochs:
-            train_metrics = _evaluate(gnn, head, data, train_pairs, train_labels, device)
-            val_metrics = _evaluate(gnn, head, data, val_pairs, val_labels, device)
-            print(
-                f"[epoch {epoch:03d}] loss={loss.item():.4f} | "
-                f"train acc={train_metrics['acc']:.3f} prec={train_metrics['precision']:.3f} rec={train_metrics['recall']:.3f} | "
-                f"val acc={val_metrics['acc']:.3f} prec={val_metrics['precision']:.3f} rec={val_metrics['recall']:.3f}"
-            )
+    meta = {
+        "nodes": args.nodes,
+        "edges": args.edges,
+        "epochs": args.epochs,
+        "lr": args.lr,
+        "neg_mult": args.neg_mult,
+        "hard_neg_ratio": args.hard_neg_ratio,
+        "hard_neg_window": args.hard_neg_window,
+        "val_ratio": args.val_ratio,
+        "seed": args.seed,
+        "batch_size": args.batch_size,
+        "fanout": args.fanout,
+    }
+    stopper = _EarlyStopping(args.patience)
+    checkpoint_path = Path(args.checkpoint) if args.checkpoint else None
+    eval_every = max(1, args.eval_every)
+    start_epoch = 1
+
+    if args.resume:
+        if checkpoint_path is None or not checkpoint_path.exists():
+            print(f"[train] --resume: no checkpoint at {checkpoint_path or '(set --checkpoint)'}; starting fresh")
+        else:
+            ckpt = torch.load(checkpoint_path, map_location=device, weights_only=False)
+            for key in ("nodes", "edges", "batch_size"):
+                if ckpt.get("meta", {}).get(key) != meta[key]:
+                    print(f"[train] warning: checkpoint {key}={ckpt.get('meta', {}).get(key)!r} differs from {meta[key]!r}")
+            gnn.load_state_dict(ckpt["gnn_state_dict"])
+            head.load_state_dict(ckpt["link_head_state_dict"])
+            opt.load_state_dict(ckpt["optimizer_state_dict"])
+            stopper.load(ckpt.get("early_stopping") or {})
+            if ckpt.get("torch_rng_state") is not None:
+                torch.set_rng_state(ckpt["torch_rng_state"])
+            start_epoch = int(ckpt["epoch"]) + 1
+            print(f"[train] resumed from {checkpoint_path} at epoch {start_epoch}")
+
+    def after_eval(epoch: int, val_loss: float) -> bool:
+        stop = stopper.update(epoch, val_loss, gnn, head)
+        if checkpoint_path is not None:
+            _save_checkpoint(checkpoint_path, epoch, gnn, head, opt, stopper, meta)
+        if stop:
+            print(f"[train] early stopping at epoch {epoch}: no val loss improvement in {args.patience} evaluations "
+                  f"(best {stopper.best_loss:.4f} at epoch {stopper.best_epoch})")
+        return stop
+
+    if args.batch_size > 0:
+        fanouts = _parse_fanout(args.fanout, gnn.num_layers)
+        sampler = NeighborSampler(data.edge_index, data.x.shape[0], fanouts)
+        negatives = NegativeSampler(
+            loader, pairs[labels == 1], hard_ratio=args.hard_neg_ratio, hard_window=args.hard_neg_window
+        )
+        batches = LinkBatches(
+            data,
+            sampler,
+            negatives,
+            pos_pairs=train_pairs[train_labels == 1],
+            batch_size=args.batch_size,
+            neg_mult=args.neg_mult,
+            seed=args.seed,
+        )
+        print(f"[train] mini-batch mode: {len(batches)} batches/epoch, fanout={fanouts}, workers={args.num_workers}")
+
+        for epoch in range(start_epoch, args.epochs + 1):
+            gnn.train()
+            head.train()
+            batches.epoch = epoch
+            total_loss, seen = 0.0, 0
+            for batch in DataLoader(batches, batch_size=None, shuffle=False, num_workers=max(0, args.num_workers)):
+                opt.zero_grad()
+                emb = _forward_batch(gnn, batch, device)
+                logits = head(emb[batch["src"].to(device)], emb[batch["dst"].to(device)])
+                loss = loss_fn(logits, batch["y"].to(device))
+                loss.backward()
+                opt.step()
+                total_loss += loss.item() * len(batch["y"])
+                seen += len(batch["y"])
+
+            if epoch == 1 or epoch % eval_every == 0 or epoch == args.epochs:
+                val_metrics = _evaluate_sampled(
+                    gnn, head, data, sampler, val_pairs, val_labels, args.batch_size, device, args.seed
+                )
+                print(
+                    f"[epoch {epoch:03d}] loss={total_loss / max(seen, 1):.4f} | "
+                    f"val acc={val_metrics['acc']:.3f} prec={val_metrics['precision']:.3f} "
+                    f"rec={val_metrics['recall']:.3f} loss={val_metrics['loss']:.4f}"
+                )
+                if after_eval(epoch, val_metrics["loss"]):
+                    break
+    else:
+        data_x = data.x.to(device)
+        data_edge_index = data.edge_index.to(device)
+        data_edge_attr = getattr(data, "edge_attr", None)
+        if data_edge_attr is not None:
+            data_edge_attr = data_edge_attr.to(device)
+
+        y_train = torch.tensor(train_labels, dtype=torch.float32, device=device)
+        train_src = torch.tensor(train_pairs[:, 0], dtype=torch.long, device=device)
+        train_dst = torch.tensor(train_pairs[:, 1], dtype=torch.long, device=device)
+
+        for epoch in range(start_epoch, args.epochs + 1):
+            gnn.train()
+            head.train()
+
+            opt.zero_grad()
+
+            emb = gnn(data_x, data_edge_index, data_edge_attr)
+            logits = head(emb[train_src], emb[train_dst])
+            loss = loss_fn(logits, y_train)
+            loss.backward()
+            opt.step()
+
+            if epoch == 1 or epoch % eval_every == 0 or epoch == args.epochs:
+                train_metrics = _evaluate(gnn, head, data, train_pairs, train_labels, device)
+                val_metrics = _evaluate(gnn, head, data, val_pairs, val_labels, device)
+                print(
+                    f"[epoch {epoch:03d}] loss={loss.item():.4f} | "
+                    f"train acc={train_metrics['acc']:.3f} prec={train_metrics['precision']:.3f} rec={train_metrics['recall']:.3f} | "
+                    f"val acc={val_metrics['acc']:.3f} prec={val_metrics['precision']:.3f} rec={val_metrics['recall']:.3f}"
+                )
+                if after_eval(epoch, val_metrics["loss"]):
+                    break
+
+    if args.patience > 0 and stopper.best_states is not None:
+        gnn.load_state_dict(stopper.best_states["gnn"])
+        head.load_state_dict(stopper.best_states["head"])
+        meta["best_epoch"] = stopper.best_epoch
+        meta["best_val_loss"] = stopper.best_loss
+        print(f"[train] keeping best weights from epoch {stopper.best_epoch} (val loss {stopper.best_loss:.4f})")
 
     out_dir = Path("models")
     out_dir.mkdir(parents=True, exist_ok=True)
@@ -233,15 +668,7 @@ def main():
     payload = {
         "gnn_state_dict": gnn.state_dict(),
         "link_head_state_dict": head.state_dict(),
-        "meta": {
-            "nodes": args.nodes,
-            "edges": args.edges,
-            "epochs": args.epochs,
-            "lr": args.lr,
-            "neg_mult": args.neg_mult,
-            "val_ratio": args.val_ratio,
-            "seed": args.seed,
-        },
+        "meta": meta,
     }
     torch.save(payload, out_path)
     print(f"[train] saved model to: {out_path}")
@@ -7,5 +7,9 @@ module.exports = {
     jwtExpire: process.env.JWT_EXPIRE || '7d',
     mlPythonPath: process.env.ML_PYTHON_PATH || 'python',
     mlPipelineDir: process.env.ML_PIPELINE_DIR || '../backend_ml_models',
+    // Resident pipeline worker (pipeline_server.py). Set ML_WORKER=off to spawn per request.
+    mlWorkerEnabled: (process.env.ML_WORKER || 'on') !== 'off',
+    mlWorkerUrl: process.env.ML_WORKER_URL || '',
+    mlWorkerPort: parseInt(process.env.ML_WORKER_PORT || '5055', 10),
     nodeEnv: process.env.NODE_ENV || 'development',
 };
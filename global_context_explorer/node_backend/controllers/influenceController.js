@@ -2,14 +2,43 @@ const GlobalInfluence = require('../models/GlobalInfluence');
 const LocalEvent = require('../models/LocalEvent');
 const { runPipeline } = require('../services/mlBridge');
 
+// The parts of the pipeline result analyzeEvent reads (the rest is not transferred).
+const PIPELINE_RESULT_FIELDS = [
+    'local_event.data',
+    'evidence_summary.wikipedia_pages',
+    'statistics',
+    'top_influences',
+    'enrichment',
+];
+
 // POST /api/influences/analyze/:eventId  — run the ML pipeline
+// With ?stream=1 the response is NDJSON: pipeline progress events (evidence sources,
+// candidates, predictions) as each layer finishes, then {event: 'result', status, data}.
 exports.analyzeEvent = async (req, res) => {
+    const streaming = ['1', 'true'].includes(String(req.query.stream || '').toLowerCase());
+    const send = (status, body) => {
+        if (!streaming) return res.status(status).json(body);
+        if (!res.headersSent) res.setHeader('Content-Type', 'application/x-ndjson');
+        res.end(JSON.stringify({ event: 'result', status, data: body }) + '\n');
+    };
+
     try {
         const event = await LocalEvent.findById(req.params.eventId);
-        if (!event) return res.status(404).json({ message: 'Event not found' });
+        if (!event) return send(404, { message: 'Event not found' });
 
         if (event.noGlobalInfluence) {
-            return res.status(400).json({ message: 'Global influence analysis is disabled for this event by curator.' });
+            return send(400, { message: 'Global influence analysis is disabled for this event by curator.' });
+        }
+
+        let onEvent;
+        if (streaming) {
+            res.setHeader('Content-Type', 'application/x-ndjson');
+            res.setHeader('Cache-Control', 'no-cache');
+            res.flushHeaders();
+            onEvent = (progress) => {
+                // The final pipeline result is reshaped below before it is sent.
+                if (progress.event !== 'result') res.write(JSON.stringify(progress) + '\n');
+            };
         }
 
         // Run the Python ML pipeline
@@ -18,10 +47,12 @@ exports.analyzeEvent = async (req, res) => {
             date: event.date || undefined,
             location: event.location || undefined,
             topK: 10,
+            onEvent,
+            fields: PIPELINE_RESULT_FIELDS,
         });
 
         if (pipelineResult.error) {
-            return res.status(400).json({ message: pipelineResult.error });
+            return send(400, { message: pipelineResult.error });
         }
 
         // Update LocalEvent with improved descriptions and discovery references
@@ -77,7 +108,7 @@ exports.analyzeEvent = async (req, res) => {
 
         const updatedEvent = await LocalEvent.findById(event._id);
 
-        res.json({
+        send(200, {
             eventId: event._id,
             eventName: event.eventName,
             event: updatedEvent,
@@ -86,7 +117,7 @@ exports.analyzeEvent = async (req, res) => {
         });
     } catch (err) {
         console.error('[ML Bridge Error]', err.message);
-        res.status(500).json({ message: err.message });
+        send(500, { message: err.message });
     }
 };
 
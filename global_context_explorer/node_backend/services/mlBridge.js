@@ -1,90 +1,318 @@
 /**
  * ML Bridge Service
- * Spawns the Python pipeline_main.py as a child process
- * and parses the JSON output.
+ * Talks to the resident Python worker (pipeline_server.py), starting it on first use.
+ * Falls back to spawning pipeline_main.py per request if the worker is unavailable.
  */
-const { execFile } = require('child_process');
+const { execFile, spawn } = require('child_process');
 const path = require('path');
 const config = require('../config/config');
 
+const WORKER_START_TIMEOUT_MS = 3 * 60 * 1000; // torch + graph + weights load
+const WORKER_REQUEST_TIMEOUT_MS = 5 * 60 * 1000;
+
+let workerProcess = null;
+let workerReady = null; // Promise<string> resolving to the worker base URL
+
 /**
- * Run the 7-Layer Causal Logic Engine for a given local event.
+ * The worker could not be started or reached, so the request never ran there.
+ * Only this error makes runPipeline fall back to spawning pipeline_main.py.
+ */
+class WorkerUnavailableError extends Error {}
+
+function workerBaseUrl() {
+    return config.mlWorkerUrl || `http://127.0.0.1:${config.mlWorkerPort}`;
+}
+
+async function workerHealthy(baseUrl) {
+    try {
+        const res = await fetch(`${baseUrl}/health`, { signal: AbortSignal.timeout(2000) });
+        return res.ok;
+    } catch (err) {
+        return false;
+    }
+}
+
+/**
+ * Return the URL of a warm worker, spawning pipeline_server.py once if needed.
+ * Concurrent callers share the same startup promise.
  *
- * @param {Object}  opts
- * @param {string}  opts.input        - Event name / text
- * @param {string}  [opts.date]       - Date string
- * @param {string}  [opts.location]   - Location string
- * @param {number}  [opts.topK=10]    - Number of results
- * @returns {Promise<Object>}         - Parsed JSON result from the pipeline
+ * @returns {Promise<string>}
  */
-async function runPipeline({ input, date, location, topK = 10 }) {
-    return new Promise((resolve, reject) => {
+function ensureWorker() {
+    if (workerReady) return workerReady;
+
+    workerReady = (async () => {
+        const baseUrl = workerBaseUrl();
+        if (await workerHealthy(baseUrl)) return baseUrl;
+        if (config.mlWorkerUrl) {
+            throw new Error(`ML worker at ${baseUrl} is not responding`);
+        }
+
         const pipelineDir = path.resolve(__dirname, '..', config.mlPipelineDir);
         const pythonPath = path.resolve(config.mlPythonPath);
-        const scriptPath = path.join(pipelineDir, 'pipeline_main.py');
-
         const args = [
-            scriptPath,
-            '--input',
-            input,
-            '--top-k',
-            String(topK),
-            '--json-output',
+            path.join(pipelineDir, 'pipeline_server.py'),
+            '--port',
+            String(config.mlWorkerPort),
         ];
 
-        if (date) {
-            args.push('--date', date);
+        console.log('[ML Bridge] Starting resident worker:', pythonPath, args.join(' '));
+        workerProcess = spawn(pythonPath, args, { cwd: pipelineDir, stdio: ['ignore', 'inherit', 'inherit'] });
+        workerProcess.on('exit', (code) => {
+            console.warn(`[ML Bridge] Worker exited with code ${code}`);
+            workerProcess = null;
+            workerReady = null;
+        });
+
+        const deadline = Date.now() + WORKER_START_TIMEOUT_MS;
+        while (Date.now() < deadline) {
+            if (!workerProcess) throw new Error('ML worker exited during startup');
+            if (await workerHealthy(baseUrl)) {
+                console.log('[ML Bridge] Worker ready at', baseUrl);
+                return baseUrl;
+            }
+            await new Promise((r) => setTimeout(r, 500));
         }
-        if (location) {
-            args.push('--location', location);
+        throw new Error('Timed out waiting for ML worker to start');
+    })();
+
+    workerReady.catch(() => {
+        workerReady = null;
+    });
+    return workerReady;
+}
+
+/**
+ * POST a JSON body to the worker. Startup and connection failures become
+ * WorkerUnavailableError; a timeout (TimeoutError) means the worker took the request.
+ */
+async function fetchWorker(route, body, timeoutMs) {
+    let baseUrl;
+    try {
+        baseUrl = await ensureWorker();
+    } catch (err) {
+        throw new WorkerUnavailableError(err.message);
+    }
+    try {
+        return await fetch(`${baseUrl}${route}`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify(body || {}),
+            signal: AbortSignal.timeout(timeoutMs),
+        });
+    } catch (err) {
+        if (err.name === 'TimeoutError' || err.name === 'AbortError') {
+            throw new Error(`ML worker did not answer ${route} within ${Math.round(timeoutMs / 1000)}s`);
         }
+        throw new WorkerUnavailableError(`ML worker unreachable: ${err.message}`);
+    }
+}
 
-        console.log('[ML Bridge] Spawning:', pythonPath);
-        console.log('[ML Bridge] Args:', args.join(' '));
+async function postToWorker(route, body, timeoutMs) {
+    const res = await fetchWorker(route, body, timeoutMs);
+    const result = await res.json();
+    if (res.status >= 500) {
+        throw new Error(result.error || `ML worker returned HTTP ${res.status}`);
+    }
+    return result;
+}
 
-        const child = execFile(pythonPath, args, {
-            cwd: pipelineDir,
-            maxBuffer: 10 * 1024 * 1024, // 10 MB
-            timeout: 5 * 60 * 1000, // 5 minutes
-        }, (error, stdout, stderr) => {
-            if (error) {
-                return reject(
-                    new Error(`Pipeline exited with code ${error.code}: ${stderr || error.message}`)
-                );
-            }
+/**
+ * Restore the fields dropped by the pipeline's compact transport (result_transport.py
+ * compact_result): copies of other description fields in the same object.
+ *
+ * @param {Object} result
+ * @returns {Object} the same result, expanded in place
+ */
+function expandResult(result) {
+    for (const inf of result?.top_influences || []) {
+        const ge = inf.global_event;
+        if (ge && ge.description === undefined && ge.description_short !== undefined) {
+            ge.description = ge.description_short;
+        }
+    }
+    const le = result?.local_event?.data;
+    if (le && le.description_full === undefined && le.description !== undefined) {
+        le.description_full = le.description;
+    }
+    return result;
+}
 
-            // The pipeline may print log lines before the JSON block.
-            // We look for the JSON block delimited by ===JSON_START=== / ===JSON_END===
-            const startMarker = '===JSON_START===';
-            const endMarker = '===JSON_END===';
-            const startIdx = stdout.indexOf(startMarker);
-            const endIdx = stdout.indexOf(endMarker);
-
-            if (startIdx === -1 || endIdx === -1) {
-                return reject(
-                    new Error(
-                        'Pipeline output did not contain JSON markers. Raw output: ' +
-                        stdout.slice(0, 500)
-                    )
-                );
-            }
+/**
+ * Apply an "enrichment" event (LLM paragraphs sent after the result, INFLUENCE_LLM_ASYNC=1)
+ * to the influences of an already received result.
+ *
+ * @param {Object} result
+ * @param {Array<Object>} updates - [{global_event_id, description, description_full, ...}]
+ */
+function applyEnrichment(result, updates) {
+    const influences = result?.top_influences || [];
+    for (const { global_event_id: id, ...fields } of updates || []) {
+        const influence = influences.find((inf) => inf.global_event?.id === id);
+        if (influence) Object.assign(influence.global_event, fields);
+    }
+    if (result?.enrichment) result.enrichment = { status: 'done', count: (updates || []).length };
+}
 
-            const jsonStr = stdout
-                .substring(startIdx + startMarker.length, endIdx)
-                .trim();
+/**
+ * Consume an NDJSON event stream (fetch body or child stdout), passing every progress
+ * event to onEvent and keeping the final result (with any later enrichment applied).
+ *
+ * @param {AsyncIterable<Uint8Array|string>} stream
+ * @param {Function} [onEvent]
+ * @returns {Promise<{result: (Object|null), error: (string|null)}>}
+ */
+async function collectEventStream(stream, onEvent) {
+    const decoder = new TextDecoder();
+    const outcome = { result: null, error: null };
+    let buffer = '';
 
+    const handleLine = (line) => {
+        line = line.trim();
+        if (!line) return;
+        let event;
+        try {
+            event = JSON.parse(line);
+        } catch (err) {
+            return; // not an event line
+        }
+        if (event.event === 'result') outcome.result = expandResult(event.result);
+        if (event.event === 'enrichment' && outcome.result) applyEnrichment(outcome.result, event.influences);
+        if (event.event === 'error') outcome.error = event.error;
+        if (onEvent) {
             try {
-                const result = JSON.parse(jsonStr);
-                resolve(result);
-            } catch (parseErr) {
-                reject(
-                    new Error(
-                        `Failed to parse pipeline JSON: ${parseErr.message}\nRaw: ${jsonStr.slice(0, 300)}`
-                    )
-                );
+                onEvent(event);
+            } catch (err) {
+                console.warn('[ML Bridge] Progress handler failed:', err.message);
             }
-        });
+        }
+    };
+
+    for await (const chunk of stream) {
+        buffer += typeof chunk === 'string' ? chunk : decoder.decode(chunk, { stream: true });
+        let newline;
+        while ((newline = buffer.indexOf('\n')) !== -1) {
+            handleLine(buffer.slice(0, newline));
+            buffer = buffer.slice(newline + 1);
+        }
+    }
+    handleLine(buffer + decoder.decode());
+    return outcome;
+}
+
+async function streamFromWorker(body, onEvent, timeoutMs) {
+    const res = await fetchWorker('/analyze/stream', body, timeoutMs);
+    if (!res.ok) {
+        throw new Error(`ML worker returned HTTP ${res.status}`);
+    }
+    const { result, error } = await collectEventStream(res.body, onEvent);
+    if (!result) {
+        throw new Error(error || 'ML worker stream ended without a result');
+    }
+    return result;
+}
+
+/**
+ * Tell the worker that the nodes/edges CSVs changed. Best effort: if no worker is
+ * running yet, the next start reads the fresh files anyway.
+ */
+async function reloadWorker() {
+    if (!config.mlWorkerEnabled || !workerReady) return;
+    try {
+        await postToWorker('/reload', {}, WORKER_REQUEST_TIMEOUT_MS);
+        console.log('[ML Bridge] Worker reloaded graph data');
+    } catch (err) {
+        console.warn('[ML Bridge] Worker reload failed:', err.message);
+    }
+}
+
+/**
+ * Run the 7-Layer Causal Logic Engine for a given local event.
+ *
+ * @param {Object}  opts
+ * @param {string}  opts.input        - Event name / text
+ * @param {string}  [opts.date]       - Date string
+ * @param {string}  [opts.location]   - Location string
+ * @param {number}  [opts.topK=10]    - Number of results
+ * @param {Function} [opts.onEvent]   - Receives progress events ({event: 'layer', layer, name, seconds, data})
+ *                                      as each layer finishes, then the {event: 'result'} event
+ * @param {Array<string>} [opts.fields] - Only these dotted result fields (e.g. 'top_influences.global_event.name');
+ *                                      error results are always complete
+ * @returns {Promise<Object>}         - Parsed JSON result from the pipeline
+ */
+async function runPipeline({ input, date, location, topK = 10, onEvent, fields }) {
+    if (config.mlWorkerEnabled) {
+        const body = { input, date, location, top_k: topK, compact: true, fields };
+        try {
+            if (onEvent) {
+                return await streamFromWorker(body, onEvent, WORKER_REQUEST_TIMEOUT_MS);
+            }
+            return expandResult(await postToWorker('/analyze', body, WORKER_REQUEST_TIMEOUT_MS));
+        } catch (err) {
+            // Pipeline errors and timeouts already cost a full run (and streamed its
+            // progress events); only a worker that never got the request is retried cold.
+            if (!(err instanceof WorkerUnavailableError)) throw err;
+            console.warn('[ML Bridge] Worker unavailable, spawning pipeline instead:', err.message);
+        }
+    }
+    return runPipelineProcess({ input, date, location, topK, onEvent, fields });
+}
+
+/**
+ * Cold path: spawn pipeline_main.py --ndjson for a single request and read its event
+ * stream line by line (logs arrive on stderr).
+ *
+ * @returns {Promise<Object>}
+ */
+async function runPipelineProcess({ input, date, location, topK = 10, onEvent, fields }) {
+    const pipelineDir = path.resolve(__dirname, '..', config.mlPipelineDir);
+    const pythonPath = path.resolve(config.mlPythonPath);
+    const scriptPath = path.join(pipelineDir, 'pipeline_main.py');
+
+    const args = [
+        scriptPath,
+        '--input',
+        input,
+        '--top-k',
+        String(topK),
+        '--ndjson',
+        '--compact',
+    ];
+
+    if (date) {
+        args.push('--date', date);
+    }
+    if (location) {
+        args.push('--location', location);
+    }
+    if (fields && fields.length) {
+        args.push('--fields', fields.join(','));
+    }
+
+    console.log('[ML Bridge] Spawning:', pythonPath);
+    console.log('[ML Bridge] Args:', args.join(' '));
+
+    const child = spawn(pythonPath, args, { cwd: pipelineDir, stdio: ['ignore', 'pipe', 'pipe'] });
+    let stderrTail = '';
+    child.stderr.on('data', (data) => {
+        stderrTail = (stderrTail + data.toString()).slice(-4000);
+    });
+    const exited = new Promise((resolve) => {
+        child.on('error', (err) => resolve({ code: null, err }));
+        child.on('close', (code) => resolve({ code }));
     });
+    const timer = setTimeout(() => child.kill(), WORKER_REQUEST_TIMEOUT_MS);
+
+    try {
+        const { result, error } = await collectEventStream(child.stdout, onEvent);
+        const { code, err } = await exited;
+        if (result) return result;
+        throw new Error(
+            error || `Pipeline exited with code ${code}: ${stderrTail || (err && err.message) || 'no result'}`
+        );
+    } finally {
+        clearTimeout(timer);
+    }
 }
 
 /**
@@ -132,7 +360,9 @@ async function addEventToHistory({ eventName, date, location, description, purpo
                 assignedNodeId = match[1];
             }
 
-            resolve({ success: true, nodeId: assignedNodeId, output: stdout });
+            reloadWorker().finally(() => {
+                resolve({ success: true, nodeId: assignedNodeId, output: stdout });
+            });
         });
     });
 }
@@ -163,7 +393,6 @@ async function retrainModel() {
         const out = fs.openSync(logPath, 'a');
         const err = fs.openSync(logPath, 'a');
 
-        const { spawn } = require('child_process');
         const child = spawn(pythonPath, args, {
             cwd: pipelineDir,
             detached: true,
@@ -171,6 +400,10 @@ async function retrainModel() {
         });
 
         child.unref(); // Allow the parent process to exit independently
+        // Pick up the new weights in the resident worker once training finishes.
+        child.on('exit', (code) => {
+            if (code === 0) reloadWorker();
+        });
 
         resolve({ success: true, message: `Retraining started in background. Logs: ${logPath}` });
     });
@@ -201,9 +434,11 @@ async function removeEventFromHistory(nodeId) {
                 return reject(new Error(`Failed to remove history event: ${stderr || error.message}`));
             }
             console.log('[ML Bridge] remove_history_event output:', stdout);
-            resolve({ success: true, output: stdout });
+            reloadWorker().finally(() => {
+                resolve({ success: true, output: stdout });
+            });
         });
     });
 }
 
-module.exports = { runPipeline, addEventToHistory, removeEventFromHistory, retrainModel };
+module.exports = { runPipeline, addEventToHistory, removeEventFromHistory, retrainModel, reloadWorker };